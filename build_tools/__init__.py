@@ -0,0 +1 @@
+"""The build script's code, split by concern. build.py is the command line and import entry point."""
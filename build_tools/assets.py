@@ -0,0 +1,1353 @@
+"""
+Assets: the -cook-assets cooker and its .mesh/.tex formats (identical
+cooked files are stored once), the -pack-assets pack, the -asset-report
+budgets and the incremental copy of assets into build directories.
+"""
+
+import os
+import shutil
+import functools
+import sys
+import hashlib
+
+from . import common
+from .common import Build_Error, IS_LINUX, traced, file_digest, write_if_changed, format_bytes, make_dirs
+from .common import locked_print as print
+
+ASSETS_DIR = "assets"
+
+COOKED_ASSETS_DIR = "build/cooked_assets"
+COOK_CACHE_DIR = "build/cook_cache"
+
+def asset_source_dirs():
+	"""Directories merged into a build's assets folder. Cooked files sit next to the files they were cooked from."""
+	if common.args.cook_assets:
+		return [ASSETS_DIR, COOKED_ASSETS_DIR]
+
+	return [ASSETS_DIR]
+
+@traced
+def cook_assets():
+	"""
+	Cooks every .glb under assets/ into load-ready files in COOKED_ASSETS_DIR,
+	mirroring the assets/ layout: a .mesh with the mesh buffers and a .tex
+	with the base color texture's baked mip chain, block compressed if
+	-texture-compression says so. Results are cached by a hash of the input
+	(the whole file for meshes, the embedded image for textures) and the
+	cooker version, so unchanged GLBs are never re-cooked and an image
+	embedded in several GLBs is cooked once. The rest are cooked on up to -j
+	processes. Outputs with the same contents are stored once, see
+	store_cooked_outputs. Outputs whose source was removed are deleted.
+	"""
+	print("Cooking assets...")
+	make_dirs(COOK_CACHE_DIR)
+	make_dirs(COOKED_ASSETS_DIR)
+
+	try:
+		import numpy
+		optimize = True
+		texture_version = str(COOKED_TEXTURE_VERSION)
+
+		if common.args.texture_compression != "none":
+			# Web builds resolve "auto" differently, so they get their own cache entries
+			compression = common.args.texture_compression + ("-web" if common.args.texture_compression == "auto" and common.args.web else "")
+			texture_version = "%i-%s-q%i" % (COOKED_TEXTURE_VERSION, compression, common.args.texture_quality)
+
+		cookers = [
+			(".mesh", "%i-optimized" % COOKED_MESH_VERSION, functools.partial(cook_mesh, optimize=True), file_digest),
+			(".tex", texture_version, functools.partial(cook_texture, compression=common.args.texture_compression, quality=common.args.texture_quality, web=common.args.web), base_color_image_digest),
+		]
+	except ImportError:
+		print("Warning: NumPy not found, meshes are cooked without optimization and textures are not baked. Textures are decoded and mip-mapped at runtime instead. (pip install numpy)")
+		optimize = False
+		cookers = [(".mesh", str(COOKED_MESH_VERSION), cook_mesh, file_digest)]
+
+	import json
+
+	jobs = []
+
+	for root, dirs, files in os.walk(ASSETS_DIR):
+		for file in sorted(files):
+			if not file.lower().endswith(".glb"):
+				continue
+
+			src = os.path.join(root, file)
+			rel = os.path.relpath(src, ASSETS_DIR)
+
+			for extension, version, cook, source_digest in cookers:
+				out = os.path.join(COOKED_ASSETS_DIR, os.path.splitext(rel)[0] + extension)
+				key = hashlib.sha256(("%s:%s:%s" % (extension, version, source_digest(src))).encode()).hexdigest()
+				jobs.append((src, out, extension, cook, os.path.join(COOK_CACHE_DIR, key + extension)))
+
+	# One job per cache entry, GLBs sharing an image share its texture
+	pending = list({job[4]: job for job in reversed(jobs) if not os.path.exists(job[4])}.values())[::-1]
+	failed = set()  # cache paths
+
+	def store(job, result):
+		src, out, extension, cook, cache_path = job
+		data = result
+
+		# Cookers may return a report along with the data, kept next to it in the cache
+		if isinstance(result, tuple):
+			data, report = result
+			write_if_changed(cache_path + ".json", json.dumps(report).encode())
+
+		with open(cache_path + ".tmp", 'wb') as f:
+			f.write(data)
+		os.replace(cache_path + ".tmp", cache_path)
+		print(f"Cooked {out}")
+
+	def cook_failed(job, e):
+		print(f"Failed cooking {job[2]} from {job[0]}: {e}")
+		failed.add(job[4])
+
+	# Texture encoding is CPU bound NumPy code, so cook on processes rather than threads
+	if len(pending) > 1 and common.args.j > 1:
+		from concurrent.futures import ProcessPoolExecutor
+		import multiprocessing
+
+		# Cooking runs as a build graph task, next to other threads. Forking
+		# would copy whatever locks those hold, so workers are spawned.
+		with ProcessPoolExecutor(max_workers=min(common.args.j, len(pending)), mp_context=multiprocessing.get_context("spawn")) as pool:
+			futures = [(job, pool.submit(job[3], job[0])) for job in pending]
+
+			for job, future in futures:
+				try:
+					result = future.result()
+				except Exception as e:
+					cook_failed(job, e)
+					continue
+
+				store(job, result)
+	else:
+		for job in pending:
+			try:
+				result = job[3](job[0])
+			except Exception as e:
+				cook_failed(job, e)
+				continue
+
+			store(job, result)
+
+	reports = []
+	outputs = []
+
+	for src, out, extension, cook, cache_path in jobs:
+		if cache_path in failed:
+			continue
+
+		if os.path.exists(cache_path + ".json"):
+			with open(cache_path + ".json", 'r', encoding='utf-8') as f:
+				reports.append((src, json.load(f)))
+
+		outputs.append((src, out, cache_path))
+
+	cooked, total_bytes, stored_bytes, shared = store_cooked_outputs(outputs)
+
+	for root, dirs, files in os.walk(COOKED_ASSETS_DIR):
+		for file in files:
+			path = os.path.normpath(os.path.join(root, file))
+			if path not in cooked:
+				os.remove(path)
+
+	num_cooked = len(pending) - len(failed)
+	num_cached = len(jobs) - len(pending)
+	num_failed = sum(1 for job in jobs if job[4] in failed)
+	common.TRACE.note(cooked=num_cooked, cache_hits=num_cached, failed=num_failed)
+	print("Cooked %i file(s), %i unchanged" % (num_cooked, num_cached))
+
+	mesh_reports = [(src, r) for src, r in reports if "vertices_before" in r]
+	texture_reports = [(src, r) for src, r in reports if "psnr" in r]
+
+	if mesh_reports:
+		print("Meshes (ACMR = vertex shader runs per triangle, lower is better):")
+
+		for src, r in mesh_reports:
+			acmr = "ACMR %.2f -> %.2f" % (r["acmr_before"], r["acmr_after"]) if r.get("acmr_before") is not None else ""
+			print(f"  {src:<32} vertices {r['vertices_before']:>6} -> {r['vertices_after']:<6} u{r['index_size'] * 8:<3} {acmr}")
+
+		if not optimize:
+			print("Warning: %i mesh(es) not optimized, NumPy is not installed" % len(mesh_reports))
+
+	if texture_reports:
+		print("Textures (sizes of the whole mip chain, PSNR of mip 0 against the source, higher is better):")
+		total_rgba8 = sum(r["bytes_rgba8"] for src, r in texture_reports)
+		total = sum(r["bytes"] for src, r in texture_reports)
+
+		for src, r in texture_reports:
+			size = "%ix%i" % (r["width"], r["height"])
+			psnr = "" if r["format"] == "rgba8" else ("PSNR %.1f dB" % r["psnr"] if r["psnr"] is not None else "lossless")
+			print(f"  {src:<32} {size:>9} {r['format']:<10} {format_bytes(r['bytes_rgba8']):>10} -> {format_bytes(r['bytes']):<10} {psnr}")
+
+		print("  %i texture(s): %s -> %s (%.1fx smaller)" % (len(texture_reports), format_bytes(total_rgba8), format_bytes(total), total_rgba8 / max(1, total)))
+
+	print_cooked_sharing_report(total_bytes, stored_bytes, shared)
+
+	if failed:
+		# The game falls back to loading from the .glb when a cooked file is missing
+		print("%i file(s) failed to cook, their data will be loaded from the .glb at runtime" % num_failed)
+
+# Cooked outputs with the same contents are stored once in this directory
+# under COOKED_ASSETS_DIR, the per-asset files become references to them.
+COOKED_SHARED_DIR = "_shared"
+
+# Cooked reference layout: header, then the UTF-8 path of the shared file as
+# the game asks for it. Must match Cooked_Reference_Header in engine_core/asset/types.odin.
+COOKED_REFERENCE_MAGIC = b"TREF"
+COOKED_REFERENCE_VERSION = 1
+COOKED_REFERENCE_FORMAT = "<4sII"  # magic, version, path length
+
+def cooked_reference(target):
+	"""Contents of a cooked file pointing at target, e.g. 'assets/_shared/0123abcd.tex'"""
+	import struct
+
+	encoded = target.encode()
+	return struct.pack(COOKED_REFERENCE_FORMAT, COOKED_REFERENCE_MAGIC, COOKED_REFERENCE_VERSION, len(encoded)) + encoded
+
+def read_cooked_reference(path):
+	"""The path a cooked reference file points at, None if the file isn't a reference"""
+	import struct
+
+	header_size = struct.calcsize(COOKED_REFERENCE_FORMAT)
+
+	with open(path, 'rb') as f:
+		data = f.read(header_size + 1024)
+
+	if len(data) < header_size or data[:4] != COOKED_REFERENCE_MAGIC:
+		return None
+
+	magic, version, length = struct.unpack_from(COOKED_REFERENCE_FORMAT, data, 0)
+	return data[header_size:header_size + length].decode()
+
+def store_cooked_outputs(outputs):
+	"""
+	Installs cooked files from the cook cache, outputs being (source .glb,
+	output path, cache path). Outputs that have the same contents (e.g. the
+	texture of GLBs exported with the same image) are written once to
+	COOKED_SHARED_DIR, and each output becomes a small reference to it that
+	the game's read_cooked_asset follows. Returns the paths written, and the
+	bytes the outputs would take on their own and the bytes actually stored.
+	"""
+	groups = {}
+
+	for src, out, cache_path in outputs:
+		groups.setdefault(file_digest(cache_path), []).append((src, out, cache_path))
+
+	written = set()
+	total_bytes = 0
+	stored_bytes = 0
+	shared = []
+
+	for digest, group in groups.items():
+		cache_path = group[0][2]
+		size = os.path.getsize(cache_path)
+		total_bytes += size * len(group)
+		stored_bytes += size
+
+		with open(cache_path, 'rb') as f:
+			data = f.read()
+
+		if len(group) == 1:
+			out = group[0][1]
+			make_dirs(os.path.dirname(out))
+			write_if_changed(out, data)
+			written.add(os.path.normpath(out))
+			continue
+
+		extension = os.path.splitext(cache_path)[1]
+		shared_path = os.path.join(COOKED_ASSETS_DIR, COOKED_SHARED_DIR, digest[:16] + extension)
+		make_dirs(os.path.dirname(shared_path))
+		write_if_changed(shared_path, data)
+		written.add(os.path.normpath(shared_path))
+
+		reference = cooked_reference("assets/" + os.path.relpath(shared_path, COOKED_ASSETS_DIR).replace(os.sep, "/"))
+		stored_bytes += len(reference) * len(group)
+
+		for src, out, _ in group:
+			make_dirs(os.path.dirname(out))
+			write_if_changed(out, reference)
+			written.add(os.path.normpath(out))
+
+		shared.append((shared_path, size, [src for src, _, _ in group]))
+
+	return written, total_bytes, stored_bytes, shared
+
+def glb_base_color_image(gltf, bin_chunk):
+	"""Bytes of the image embedded for the base color texture of the first material, what load_texture_from_glb_data loads"""
+	pbr = gltf["materials"][0]["pbrMetallicRoughness"]
+	texture = gltf["textures"][pbr["baseColorTexture"]["index"]]
+	image = gltf["images"][texture["source"]]
+
+	if "bufferView" not in image:
+		raise ValueError("only images embedded in the GLB binary chunk are supported")
+
+	view = gltf["bufferViews"][image["bufferView"]]
+	start = view.get("byteOffset", 0)
+	return bin_chunk[start:start + view["byteLength"]]
+
+def base_color_image_digest(path):
+	"""SHA-256 of the base color image embedded in a .glb, which is all cook_texture reads. The file's digest if it has none."""
+	try:
+		gltf, bin_chunk = read_glb(path)
+		return hashlib.sha256(glb_base_color_image(gltf, bin_chunk)).hexdigest()
+	except (ValueError, KeyError, IndexError, TypeError):
+		return file_digest(path)
+
+def glb_blobs(path):
+	"""(kind, SHA-256, size) of every buffer view in a .glb, kind being "image" for views holding an image and "buffer" otherwise"""
+	gltf, bin_chunk = read_glb(path)
+	image_views = {image["bufferView"] for image in gltf.get("images", []) if "bufferView" in image}
+	blobs = []
+
+	for i, view in enumerate(gltf.get("bufferViews", [])):
+		if view.get("buffer", 0) != 0:
+			continue
+
+		start = view.get("byteOffset", 0)
+		data = bin_chunk[start:start + view["byteLength"]]
+		blobs.append(("image" if i in image_views else "buffer", hashlib.sha256(data).hexdigest(), len(data)))
+
+	return blobs
+
+def print_cooked_sharing_report(total_bytes, stored_bytes, shared):
+	"""
+	Prints the cooked bytes against the bytes stored once identical cooked
+	files are shared, and which GLBs share each file. The images and buffer
+	views embedded in assets/*.glb are only counted here, to show what
+	whole-file sharing leaves duplicated.
+	"""
+	totals = {}
+
+	for root, dirs, files in os.walk(ASSETS_DIR):
+		for file in sorted(files):
+			if not file.lower().endswith(".glb"):
+				continue
+
+			try:
+				blobs = glb_blobs(os.path.join(root, file))
+			except (ValueError, KeyError) as e:
+				print(f"Skipping {file} in the cooked file sharing report: {e}")
+				continue
+
+			for kind, digest, size in blobs:
+				count, num_bytes, unique = totals.setdefault(kind, [0, 0, {}])
+				totals[kind][0] += 1
+				totals[kind][1] += size
+				unique[digest] = size
+
+	print("Cooked file sharing (identical cooked files are stored once, GLB contents by content hash):")
+
+	for kind, label in (("image", "images"), ("buffer", "buffer views")):
+		if kind in totals:
+			count, num_bytes, unique = totals[kind]
+			print(f"  {label:<14} {count:>4} {format_bytes(num_bytes):>10} -> {len(unique):>4} unique {format_bytes(sum(unique.values())):>10}")
+
+	print(f"  {'cooked files':<14} {'':>4} {format_bytes(total_bytes):>10} -> {'':>4} stored {format_bytes(stored_bytes):>10}")
+
+	for shared_path, size, sources in shared:
+		print(f"  {os.path.relpath(shared_path, COOKED_ASSETS_DIR)} ({format_bytes(size)}) shared by " + ", ".join(os.path.relpath(src, ASSETS_DIR) for src in sources))
+
+GLB_MAGIC = 0x46546C67      # "glTF"
+GLB_CHUNK_JSON = 0x4E4F534A # "JSON"
+GLB_CHUNK_BIN = 0x004E4942  # "BIN\0"
+
+GLTF_COMPONENT_FORMATS = {
+	5120: "b",  # BYTE
+	5121: "B",  # UNSIGNED_BYTE
+	5122: "h",  # SHORT
+	5123: "H",  # UNSIGNED_SHORT
+	5125: "I",  # UNSIGNED_INT
+	5126: "f",  # FLOAT
+}
+
+GLTF_TYPE_COMPONENTS = {
+	"SCALAR": 1,
+	"VEC2": 2,
+	"VEC3": 3,
+	"VEC4": 4,
+	"MAT2": 4,
+	"MAT3": 9,
+	"MAT4": 16,
+}
+
+def read_glb(path):
+	"""Returns (json dict, binary chunk bytes) of a .glb file"""
+	import json
+	import struct
+
+	with open(path, 'rb') as f:
+		data = f.read()
+
+	if len(data) < 12:
+		raise ValueError(f"{path} is too short to be a GLB file")
+
+	magic, version, length = struct.unpack_from("<III", data, 0)
+
+	if magic != GLB_MAGIC or version != 2:
+		raise ValueError(f"{path} is not a glTF 2.0 binary file")
+
+	if length > len(data):
+		raise ValueError(f"{path} is truncated: {len(data)} of {length} bytes")
+
+	gltf = None
+	bin_chunk = b""
+	offset = 12
+
+	while offset + 8 <= length:
+		chunk_length, chunk_type = struct.unpack_from("<II", data, offset)
+
+		if offset + 8 + chunk_length > length:
+			raise ValueError(f"{path} is truncated: chunk at byte {offset} runs past the end of the file")
+
+		chunk = data[offset + 8:offset + 8 + chunk_length]
+
+		if chunk_type == GLB_CHUNK_JSON:
+			gltf = json.loads(chunk.decode('utf-8'))
+		elif chunk_type == GLB_CHUNK_BIN and not bin_chunk:
+			bin_chunk = chunk
+
+		# Chunks are 4-byte aligned
+		offset += 8 + ((chunk_length + 3) & ~3)
+
+	if gltf is None:
+		raise ValueError(f"{path} has no JSON chunk")
+
+	return gltf, bin_chunk
+
+def read_gltf_accessor(gltf, bin_chunk, accessor_index):
+	"""
+	Returns (tightly packed little-endian bytes, struct format char, component
+	count) of an accessor, de-interleaving strided buffer views.
+	"""
+	accessor = gltf["accessors"][accessor_index]
+
+	if "sparse" in accessor:
+		raise ValueError(f"sparse accessor {accessor_index} is not supported")
+
+	if "bufferView" not in accessor:
+		raise ValueError(f"accessor {accessor_index} has no buffer view")
+
+	view = gltf["bufferViews"][accessor["bufferView"]]
+
+	if view.get("buffer", 0) != 0:
+		raise ValueError(f"accessor {accessor_index} does not use the GLB binary chunk")
+
+	fmt = GLTF_COMPONENT_FORMATS[accessor["componentType"]]
+	components = GLTF_TYPE_COMPONENTS[accessor["type"]]
+	count = accessor["count"]
+	element_size = struct_size(fmt) * components
+	start = view.get("byteOffset", 0) + accessor.get("byteOffset", 0)
+	stride = view.get("byteStride", element_size)
+
+	if stride == element_size:
+		return bytes(bin_chunk[start:start + count * element_size]), fmt, components
+
+	view_bytes = memoryview(bin_chunk)
+	return b"".join(view_bytes[start + i * stride:start + i * stride + element_size] for i in range(count)), fmt, components
+
+def struct_size(fmt):
+	import struct
+	return struct.calcsize("<" + fmt)
+
+# Cooked mesh layout. Must match Cooked_Mesh_Header in engine_core/asset/types.odin.
+COOKED_MESH_MAGIC = b"TMSH"
+COOKED_MESH_VERSION = 2
+COOKED_MESH_HEADER_SIZE = 96
+COOKED_MESH_MAX_SECTIONS = 8
+COOKED_MESH_ALIGNMENT = 16
+
+# Section slots in the header, in the order of Cooked_Mesh_Section_Kind
+COOKED_MESH_POSITIONS = 0
+COOKED_MESH_NORMALS = 1
+COOKED_MESH_UVS = 2
+COOKED_MESH_INDICES = 3
+COOKED_MESH_SMOOTH_NORMALS = 4
+
+def cook_mesh(path, optimize=False):
+	"""
+	Cooks the first primitive of the first mesh in a .glb (what the engine
+	loads) into the cooked mesh format: a fixed header followed by aligned
+	sections holding exactly the buffers bind_opaque_render_props and
+	bind_shadow_render_props upload: float3 positions, float3 normals,
+	float2 UVs and u16 indices (u32 if there are more than 65536 vertices).
+
+	With optimize (needs NumPy) the mesh also goes through optimize_mesh and
+	gets the smoothed outline normals baked in. Returns (data, report).
+	"""
+	from array import array
+
+	gltf, bin_chunk = read_glb(path)
+	primitive = gltf["meshes"][0]["primitives"][0]
+	attributes = primitive["attributes"]
+
+	def float_attribute(name, components):
+		if name not in attributes:
+			print(f"{path}: primitive has no {name} attribute")
+			return b"", 0
+
+		data, fmt, count = read_gltf_accessor(gltf, bin_chunk, attributes[name])
+
+		if fmt != "f" or count != components:
+			raise ValueError(f"{name} must be {components} floats per vertex")
+
+		return data, len(data) // (4 * components)
+
+	positions, vertex_count = float_attribute("POSITION", 3)
+	normals, _ = float_attribute("NORMAL", 3)
+	uvs, _ = float_attribute("TEXCOORD_0", 2)
+
+	if "indices" in primitive:
+		data, fmt, _ = read_gltf_accessor(gltf, bin_chunk, primitive["indices"])
+		values = array(fmt, data)
+
+		if sys.byteorder == "big":
+			values.byteswap()
+	else:
+		print(f"{path}: primitive has no indices defined")
+		values = array("I", range(vertex_count))
+
+	report = {"vertices_before": vertex_count, "acmr_before": None}
+	smooth_normals = b""
+
+	if optimize:
+		from . import mesh_optimize
+		positions, normals, uvs, smooth_normals, values, report = mesh_optimize.optimize_mesh(positions, normals, uvs, values)
+		vertex_count = len(positions) // 12
+
+	index_size = 2 if vertex_count <= 0x10000 else 4
+	values = array("H" if index_size == 2 else "I", values)
+
+	if sys.byteorder == "big":
+		values.byteswap()
+
+	report.update(vertices_after=vertex_count, index_size=index_size)
+
+	sections = [None] * COOKED_MESH_MAX_SECTIONS
+	sections[COOKED_MESH_POSITIONS] = positions
+	sections[COOKED_MESH_NORMALS] = normals
+	sections[COOKED_MESH_UVS] = uvs
+	sections[COOKED_MESH_INDICES] = values.tobytes()
+	sections[COOKED_MESH_SMOOTH_NORMALS] = smooth_normals
+
+	return pack_cooked_mesh(vertex_count, len(values), index_size, sections), report
+
+def pack_cooked_mesh(vertex_count, index_count, index_size, sections):
+	"""
+	Header (COOKED_MESH_HEADER_SIZE bytes, little-endian):
+	  magic[4] version vertex_count index_count index_size section_count
+	  then COOKED_MESH_MAX_SECTIONS x (offset, size), unused slots are zero
+	followed by the section payloads, each aligned to COOKED_MESH_ALIGNMENT.
+	"""
+	import struct
+
+	table = []
+	payload = bytearray()
+	offset = COOKED_MESH_HEADER_SIZE
+
+	for data in sections:
+		if not data:
+			table += [0, 0]
+			continue
+
+		padding = -offset % COOKED_MESH_ALIGNMENT
+		payload += b"\0" * padding
+		offset += padding
+		table += [offset, len(data)]
+		payload += data
+		offset += len(data)
+
+	header = struct.pack("<4s5I%iI" % (2 * COOKED_MESH_MAX_SECTIONS), COOKED_MESH_MAGIC, COOKED_MESH_VERSION,
+		vertex_count, index_count, index_size, COOKED_MESH_MAX_SECTIONS, *table)
+	header += b"\0" * (COOKED_MESH_HEADER_SIZE - len(header))
+
+	return header + bytes(payload)
+
+# Cooked texture layout. Must match Cooked_Texture_Header in engine_core/asset/types.odin.
+COOKED_TEXTURE_MAGIC = b"TTEX"
+COOKED_TEXTURE_VERSION = 1
+COOKED_TEXTURE_HEADER_SIZE = 160
+COOKED_TEXTURE_MAX_MIPS = 16
+COOKED_TEXTURE_FORMAT_RGBA8 = 1
+COOKED_TEXTURE_FORMAT_BC1 = 2
+COOKED_TEXTURE_FORMAT_BC3 = 3
+COOKED_TEXTURE_FORMAT_BC7 = 4
+COOKED_TEXTURE_FORMAT_ETC2_RGB8 = 5
+COOKED_TEXTURE_FORMAT_ETC2_RGBA8 = 6
+
+# Same chain length load_texture_from_glb_data asks fill_mip_chain for
+TEXTURE_MIP_LEVELS = 5
+
+def cook_texture(path, compression="none", quality=1, web=False):
+	"""
+	Bakes the base color texture of the first material in a .glb (what
+	load_texture_from_glb_data loads): decodes the embedded PNG, expands RGB
+	to RGBA and generates the mip chain like fill_mip_chain does, so the game
+	can upload it as is. With a compression other than "none" the mips are
+	block compressed (see texture_block_format). Returns the cooked file and
+	a report with the sizes and the PSNR of mip 0. Needs NumPy.
+	"""
+	import struct
+	from . import texture_encode
+
+	gltf, bin_chunk = read_glb(path)
+	pixels = decode_png_rgba(glb_base_color_image(gltf, bin_chunk))
+	height, width = pixels.shape[:2]
+	mips = build_mip_chain(pixels, TEXTURE_MIP_LEVELS)
+	rgba8_bytes = sum(mip.nbytes for mip in mips)
+	block_format = texture_encode.texture_block_format(compression, bool((pixels[..., 3] != 255).any()), web)
+	pixel_format = COOKED_TEXTURE_FORMAT_RGBA8
+	psnr = None
+
+	if block_format is not None:
+		pixel_format = texture_encode.TEXTURE_BLOCK_FORMATS[block_format]
+		encoded = []
+
+		for level, mip in enumerate(mips):
+			data, decoded = texture_encode.encode_texture_blocks(mip, block_format, quality)
+			encoded.append(data)
+
+			if level == 0:
+				# Opaque formats decode alpha as 255, which is what the source has too
+				psnr = texture_encode.texture_psnr(mip, decoded, 3 if block_format in ("bc1", "etc2_rgb8") else 4)
+
+		mips = encoded
+	else:
+		mips = [mip.tobytes() for mip in mips]
+
+	table = []
+	payload = bytearray()
+	offset = COOKED_TEXTURE_HEADER_SIZE
+
+	for data in mips:
+		padding = -offset % COOKED_MESH_ALIGNMENT
+		payload += b"\0" * padding
+		offset += padding
+		table += [offset, len(data)]
+		payload += data
+		offset += len(data)
+
+	table += [0, 0] * (COOKED_TEXTURE_MAX_MIPS - len(mips))
+	header = struct.pack("<4s5I%iI" % (2 * COOKED_TEXTURE_MAX_MIPS), COOKED_TEXTURE_MAGIC, COOKED_TEXTURE_VERSION,
+		width, height, pixel_format, len(mips), *table)
+	header += b"\0" * (COOKED_TEXTURE_HEADER_SIZE - len(header))
+
+	report = {
+		"format": block_format or "rgba8",
+		"width": width,
+		"height": height,
+		"bytes_rgba8": rgba8_bytes,
+		"bytes": sum(len(data) for data in mips),
+		"psnr": psnr,
+		"quality": quality if block_format else None,
+	}
+
+	return header + bytes(payload), report
+
+def build_mip_chain(pixels, levels):
+	"""
+	Mip chain of an (height, width, 4) uint8 image with the same semantics as
+	fill_mip_chain: halve each dimension (never below 1), average 2x2 blocks
+	with integer division, clamp to the edge on odd sizes and repeat the 1x1
+	level once it is reached.
+	"""
+	import numpy as np
+
+	chain = [pixels]
+
+	for i in range(1, max(1, levels)):
+		prev = chain[-1]
+		prev_height, prev_width = prev.shape[:2]
+
+		if prev_width == 1 and prev_height == 1:
+			chain.append(prev)
+			continue
+
+		width = max(1, prev_width // 2)
+		height = max(1, prev_height // 2)
+		x0 = np.arange(width) * 2
+		y0 = np.arange(height) * 2
+		x1 = np.minimum(prev_width - 1, x0 + 1)
+		y1 = np.minimum(prev_height - 1, y0 + 1)
+
+		wide = prev.astype(np.uint16)
+		total = wide[y0][:, x0] + wide[y0][:, x1] + wide[y1][:, x0] + wide[y1][:, x1]
+		chain.append((total // 4).astype(np.uint8))
+
+	return chain
+
+def decode_png_rgba(data):
+	"""
+	Decodes an 8-bit RGB or RGBA, non-interlaced PNG (the formats
+	load_texture_from_glb_data accepts) into an (height, width, 4) uint8
+	NumPy array, expanding RGB with opaque alpha.
+	"""
+	import numpy as np
+	import struct
+	import zlib
+
+	if data[:8] != b"\x89PNG\r\n\x1a\n":
+		raise ValueError("image is not a PNG")
+
+	offset = 8
+	idat = bytearray()
+	width = height = bit_depth = color_type = interlace = None
+
+	while offset < len(data):
+		length, chunk_type = struct.unpack_from(">I4s", data, offset)
+		chunk = data[offset + 8:offset + 8 + length]
+		offset += 12 + length
+
+		if chunk_type == b"IHDR":
+			width, height, bit_depth, color_type, _, _, interlace = struct.unpack(">IIBBBBB", chunk)
+		elif chunk_type == b"IDAT":
+			idat += chunk
+		elif chunk_type == b"IEND":
+			break
+
+	channels = {2: 3, 6: 4}.get(color_type)
+
+	if bit_depth != 8 or channels is None or interlace != 0:
+		raise ValueError(f"unsupported PNG format (bit depth {bit_depth}, color type {color_type}, interlace {interlace})")
+
+	stride = width * channels
+	raw = np.frombuffer(zlib.decompress(bytes(idat)), dtype=np.uint8).reshape(height, stride + 1)
+	out = np.zeros((height, stride), dtype=np.uint8)
+	prev = np.zeros(stride, dtype=np.uint8)
+
+	for y in range(height):
+		filter_type = raw[y, 0]
+		line = raw[y, 1:]
+
+		if filter_type == 0:    # None
+			row = line.copy()
+		elif filter_type == 1:  # Sub: running sum per channel, wrapping at 256
+			row = np.cumsum(line.reshape(width, channels), axis=0, dtype=np.uint8).reshape(stride)
+		elif filter_type == 2:  # Up
+			row = line + prev
+		elif filter_type in (3, 4):
+			# Average and Paeth depend on the reconstructed left neighbour,
+			# so they are done per byte.
+			row = bytearray(line.tobytes())
+			up = prev.tobytes()
+
+			for x in range(stride):
+				a = row[x - channels] if x >= channels else 0
+				b = up[x]
+
+				if filter_type == 3:
+					row[x] = (row[x] + ((a + b) >> 1)) & 0xFF
+				else:
+					c = up[x - channels] if x >= channels else 0
+					p = a + b - c
+					pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+					predictor = a if pa <= pb and pa <= pc else (b if pb <= pc else c)
+					row[x] = (row[x] + predictor) & 0xFF
+
+			row = np.frombuffer(bytes(row), dtype=np.uint8)
+		else:
+			raise ValueError(f"invalid PNG filter type {filter_type}")
+
+		out[y] = row
+		prev = out[y]
+
+	pixels = out.reshape(height, width, channels)
+
+	if channels == 3:
+		alpha = np.full((height, width, 1), 255, dtype=np.uint8)
+		pixels = np.concatenate([pixels, alpha], axis=2)
+
+	return np.ascontiguousarray(pixels)
+
+# Budgets -asset-report and release builds check every .glb against. Any of
+# them can be set in ASSET_BUDGETS_FILE, and per asset under "overrides",
+# keyed by fnmatch patterns relative to assets/.
+ASSET_BUDGETS_FILE = "asset_budgets.json"
+ASSET_REPORT_PATH = "build/asset_report.json"
+ASSET_BUDGET_DEFAULTS = {
+	"max_vertices": 65536,            # more need u32 indices
+	"max_triangles": 100000,
+	"max_texture_size": 2048,         # largest side in pixels
+	"max_gpu_bytes": 32 * 1024 * 1024,
+	"max_total_gpu_bytes": 512 * 1024 * 1024,
+	"required_attributes": ["POSITION", "NORMAL", "TEXCOORD_0"],
+}
+
+# Channels of the PNG color types, by IHDR color type
+PNG_COLOR_TYPE_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+
+# GPU buffers the renderer makes per vertex: positions, normals and UVs for
+# the opaque pass, positions and smoothed normals for the outline pass and
+# positions for the shadow pass. Each pass also gets its own index buffer.
+GPU_BYTES_PER_VERTEX = (12 + 12 + 8) + (12 + 12) + 12
+GPU_INDEX_BUFFERS = 3
+
+def load_asset_budgets():
+	"""ASSET_BUDGET_DEFAULTS updated with ASSET_BUDGETS_FILE, if there is one"""
+	import json
+
+	budgets = dict(ASSET_BUDGET_DEFAULTS, overrides={})
+
+	if os.path.exists(ASSET_BUDGETS_FILE):
+		with open(ASSET_BUDGETS_FILE, 'r', encoding='utf-8') as f:
+			try:
+				budgets.update(json.load(f))
+			except ValueError as e:
+				raise Build_Error(f"{ASSET_BUDGETS_FILE} is not valid JSON: {e}")
+
+	for name in [name for name in budgets if name != "overrides"] + [n for o in budgets["overrides"].values() for n in o]:
+		if name not in ASSET_BUDGET_DEFAULTS:
+			raise Build_Error(f"Unknown budget '{name}' in {ASSET_BUDGETS_FILE}")
+
+	return budgets
+
+def glb_asset_stats(path):
+	"""
+	What the engine loads from a .glb (the first primitive of the first mesh
+	and the base color texture of the first material) and the GPU memory it
+	takes once loaded: the renderer's vertex and index buffers and the RGBA8
+	mip chain fill_mip_chain makes.
+	"""
+	import struct
+
+	gltf, bin_chunk = read_glb(path)
+	meshes = gltf.get("meshes", [])
+	stats = {
+		"vertices": 0,
+		"indices": 0,
+		"triangles": 0,
+		"index_bits": None,
+		"attributes": [],
+		"ignored_primitives": max(0, sum(len(m.get("primitives", [])) for m in meshes) - 1),
+		"texture": None,
+		"gpu_bytes": 0,
+		"problems": [],
+	}
+
+	if not meshes or not meshes[0].get("primitives"):
+		stats["problems"].append("no mesh")
+		return stats
+
+	primitive = meshes[0]["primitives"][0]
+	attributes = primitive.get("attributes", {})
+	stats["attributes"] = sorted(attributes)
+
+	if "POSITION" in attributes:
+		stats["vertices"] = gltf["accessors"][attributes["POSITION"]]["count"]
+
+	if "indices" in primitive:
+		accessor = gltf["accessors"][primitive["indices"]]
+		stats["indices"] = accessor["count"]
+		stats["index_bits"] = struct_size(GLTF_COMPONENT_FORMATS[accessor["componentType"]]) * 8
+
+		# load_mesh_from_glb_data reads anything but u32 as u16
+		if stats["index_bits"] == 8:
+			stats["problems"].append("u8 indices, which load_mesh_from_glb_data reads as u16")
+	else:
+		stats["problems"].append("no indices")
+
+	stats["triangles"] = stats["indices"] // 3
+	stats["gpu_bytes"] = stats["vertices"] * GPU_BYTES_PER_VERTEX + GPU_INDEX_BUFFERS * stats["indices"] * (stats["index_bits"] or 16) // 8
+
+	try:
+		image = glb_base_color_image(gltf, bin_chunk)
+	except (ValueError, KeyError, IndexError, TypeError):
+		stats["problems"].append("no embedded base color texture")
+		return stats
+
+	if len(image) < 26 or image[:8] != b"\x89PNG\r\n\x1a\n" or image[12:16] != b"IHDR":
+		stats["problems"].append("base color texture is not a PNG")
+		return stats
+
+	width, height, bit_depth, color_type = struct.unpack_from(">IIBB", image, 16)
+	channels = PNG_COLOR_TYPE_CHANNELS.get(color_type, 0)
+	stats["texture"] = {"width": width, "height": height, "channels": channels, "bit_depth": bit_depth}
+
+	# load_texture_from_glb_data only takes 8 bit RGB and RGBA
+	if bit_depth != 8 or channels not in (3, 4) or color_type == 3:
+		stats["problems"].append(f"unsupported PNG format ({channels} channels, {bit_depth} bits)")
+
+	for i in range(TEXTURE_MIP_LEVELS):
+		stats["gpu_bytes"] += width * height * 4
+		width, height = max(1, width // 2), max(1, height // 2)
+
+	return stats
+
+def asset_budget_violations(stats, budgets):
+	"""Descriptions of the budgets stats breaks"""
+	violations = list(stats["problems"])
+
+	if stats["vertices"] > budgets["max_vertices"]:
+		violations.append(f"{stats['vertices']} vertices > {budgets['max_vertices']}")
+
+	if stats["triangles"] > budgets["max_triangles"]:
+		violations.append(f"{stats['triangles']} triangles > {budgets['max_triangles']}")
+
+	texture = stats["texture"]
+
+	if texture and max(texture["width"], texture["height"]) > budgets["max_texture_size"]:
+		violations.append(f"{texture['width']}x{texture['height']} texture > {budgets['max_texture_size']}")
+
+	if stats["gpu_bytes"] > budgets["max_gpu_bytes"]:
+		violations.append(f"{format_bytes(stats['gpu_bytes'])} GPU memory > {format_bytes(budgets['max_gpu_bytes'])}")
+
+	missing = [name for name in budgets["required_attributes"] if name not in stats["attributes"]]
+
+	if missing:
+		violations.append("missing " + ", ".join(missing))
+
+	return violations
+
+@traced
+def asset_report():
+	"""
+	Checks every .glb under assets/ against the budgets of load_asset_budgets
+	and writes the numbers to ASSET_REPORT_PATH. With -asset-report they are
+	also printed as a table. Raises Build_Error if a budget is broken, which
+	stops release builds.
+	"""
+	import fnmatch
+	import json
+	import struct
+
+	budgets = load_asset_budgets()
+	assets = []
+	total_gpu_bytes = 0
+
+	for root, dirs, files in os.walk(ASSETS_DIR):
+		for file in sorted(files):
+			if not file.lower().endswith(".glb"):
+				continue
+
+			src = os.path.join(root, file)
+			rel = os.path.relpath(src, ASSETS_DIR).replace(os.sep, "/")
+			asset_budgets = dict(budgets)
+
+			for pattern, overrides in budgets["overrides"].items():
+				if fnmatch.fnmatchcase(rel, pattern):
+					asset_budgets.update(overrides)
+
+			try:
+				stats = glb_asset_stats(src)
+			except (ValueError, KeyError, IndexError, TypeError, struct.error) as e:
+				stats = {"problems": [f"can't be read: {e}"], "gpu_bytes": 0}
+				violations = list(stats["problems"])
+			else:
+				violations = asset_budget_violations(stats, asset_budgets)
+
+			total_gpu_bytes += stats["gpu_bytes"]
+			assets.append(dict(stats, path=rel, violations=violations))
+
+	violations = [(asset["path"], v) for asset in assets for v in asset["violations"]]
+
+	if total_gpu_bytes > budgets["max_total_gpu_bytes"]:
+		violations.append(("all assets", f"{format_bytes(total_gpu_bytes)} GPU memory > {format_bytes(budgets['max_total_gpu_bytes'])}"))
+
+	make_dirs(os.path.dirname(ASSET_REPORT_PATH))
+	report = {"budgets": budgets, "assets": assets, "total_gpu_bytes": total_gpu_bytes, "violations": [{"asset": a, "violation": v} for a, v in violations]}
+	write_if_changed(ASSET_REPORT_PATH, json.dumps(report, indent=1).encode())
+	common.TRACE.note(assets=len(assets), violations=len(violations))
+
+	if common.args.asset_report:
+		print(f"  {'asset':<24} {'vertices':>8} {'triangles':>9} {'index':>5} {'texture':>13} {'GPU memory':>10}  attributes")
+
+		for asset in assets:
+			if "attributes" not in asset:
+				print(f"  {asset['path']:<24} (unreadable)")
+				continue
+
+			index = "u%i" % asset["index_bits"] if asset["index_bits"] else "-"
+			if asset["vertices"] > 65536:
+				index += "!"
+
+			texture = asset["texture"]
+			texture = "%ix%i x%i" % (texture["width"], texture["height"], texture["channels"]) if texture else "-"
+			ignored = " (+%i primitives ignored)" % asset["ignored_primitives"] if asset["ignored_primitives"] else ""
+			print(f"  {asset['path']:<24} {asset['vertices']:>8} {asset['triangles']:>9} {index:>5} {texture:>13} {format_bytes(asset['gpu_bytes']):>10}  {' '.join(asset['attributes'])}{ignored}")
+
+		print(f"  {len(assets)} asset(s), {format_bytes(total_gpu_bytes)} GPU memory. Written to {ASSET_REPORT_PATH}")
+
+	if violations:
+		print("Asset budget violations:")
+
+		for asset, violation in violations:
+			print(f"  {asset}: {violation}")
+
+		raise Build_Error(f"{len(violations)} asset budget violation(s). Fix the assets or raise the budgets in {ASSET_BUDGETS_FILE}.")
+
+# Asset pack layout. Must match Asset_Pack_Header in engine_core/asset/types.odin.
+ASSET_PACK_NAME = "assets.pack"
+ASSET_PACK_MAGIC = b"TPAK"
+ASSET_PACK_VERSION = 1
+ASSET_PACK_HEADER_FORMAT = "<4sIIIQQ"  # magic, version, entry count, alignment, TOC offset, path strings offset
+ASSET_PACK_ENTRY_FORMAT = "<QQQQII"    # path hash, offset, size, content hash, path offset, path length
+
+def fnv1a_64(data):
+	"""64-bit FNV-1a, same as hash.fnv64a in Odin's core:hash"""
+	h = 0xcbf29ce484222325
+
+	for b in data:
+		h = ((h ^ b) * 0x100000001b3) & 0xFFFFFFFFFFFFFFFF
+
+	return h
+
+def asset_pack_sources(src_dirs):
+	"""
+	Maps the path the game asks for (e.g. 'assets/Tinker.glb') to the file
+	providing it, later dirs winning. GLBs the game never opens because of
+	their cooked files (see glbs_replaced_by_cooked_files) are left out.
+	"""
+	sources = {}
+
+	for src_dir in src_dirs:
+		for root, dirs, files in os.walk(src_dir):
+			for file in files:
+				src = os.path.join(root, file)
+				sources["assets/" + os.path.relpath(src, src_dir).replace(os.sep, "/")] = src
+
+	for path in glbs_replaced_by_cooked_files(sources):
+		del sources[path]
+
+	return sources
+
+def glbs_replaced_by_cooked_files(sources):
+	"""
+	The .glb paths in sources (asset path -> file, like asset_pack_sources)
+	that create_entity_by_mesh_path never opens: there is a cooked .mesh and
+	an RGBA8 cooked .tex, which every GPU can sample. GLBs with a block
+	compressed .tex are kept, the game falls back to their texture on GPUs
+	without the format.
+	"""
+	import struct
+
+	replaced = set()
+
+	for path in sources:
+		if not path.endswith(".glb"):
+			continue
+
+		stem = path.removesuffix(".glb")
+		texture = sources.get(stem + ".tex")
+
+		if stem + ".mesh" not in sources or texture is None:
+			continue
+
+		target = read_cooked_reference(texture)
+
+		if target is not None:
+			texture = sources.get(target)
+
+			if texture is None:
+				continue
+
+		with open(texture, 'rb') as f:
+			header = f.read(struct.calcsize("<4s5I"))
+
+		if len(header) == struct.calcsize("<4s5I"):
+			magic, version, width, height, pixel_format, mip_count = struct.unpack("<4s5I", header)
+
+			if magic == COOKED_TEXTURE_MAGIC and version == COOKED_TEXTURE_VERSION and pixel_format == COOKED_TEXTURE_FORMAT_RGBA8:
+				replaced.add(path)
+
+	return replaced
+
+@traced
+def write_asset_pack(src_dirs, pack_path, alignment):
+	"""
+	Packs all assets into a single file the game can read (or map) once:
+
+	  header | TOC entries sorted by path hash | path strings | payloads
+
+	Payloads are aligned to `alignment` and stored once per unique content.
+	The output only depends on the asset paths and contents, so unchanged
+	assets produce identical bytes, and the file is left untouched then.
+	"""
+	import struct
+
+	if alignment <= 0 or alignment & (alignment - 1):
+		raise Build_Error(f"Pack alignment must be a power of two, got {alignment}")
+
+	sources = asset_pack_sources(src_dirs)
+	paths = sorted(sources)
+	hashes = {}
+
+	for path in paths:
+		h = fnv1a_64(path.encode())
+
+		if h in hashes:
+			raise Build_Error(f"Asset path hash collision between {hashes[h]} and {path}. Rename one of them.")
+
+		hashes[h] = path
+
+	header_size = struct.calcsize(ASSET_PACK_HEADER_FORMAT)
+	entry_size = struct.calcsize(ASSET_PACK_ENTRY_FORMAT)
+	toc_offset = header_size
+	strings_offset = toc_offset + entry_size * len(paths)
+
+	path_strings = bytearray()
+	path_locations = {}
+
+	for path in paths:
+		encoded = path.encode()
+		path_locations[path] = (len(path_strings), len(encoded))
+		path_strings += encoded
+
+	# Lay out payloads in path order, identical contents share one payload
+	offset = strings_offset + len(path_strings)
+	payloads = []
+	locations = {}  # digest -> offset
+	entries = []
+
+	for path in paths:
+		src = sources[path]
+		digest = file_digest(src)
+		size = os.path.getsize(src)
+
+		if digest not in locations:
+			offset += -offset % alignment
+			locations[digest] = offset
+			payloads.append((offset, src))
+			offset += size
+
+		path_offset, path_length = path_locations[path]
+		content_hash = int.from_bytes(bytes.fromhex(digest)[:8], "little")
+		entries.append((fnv1a_64(path.encode()), locations[digest], size, content_hash, path_offset, path_length))
+
+	entries.sort()
+
+	temp_path = pack_path + ".tmp"
+	make_dirs(os.path.dirname(pack_path))
+
+	with open(temp_path, 'wb') as f:
+		f.write(struct.pack(ASSET_PACK_HEADER_FORMAT, ASSET_PACK_MAGIC, ASSET_PACK_VERSION, len(entries), alignment, toc_offset, strings_offset))
+
+		for entry in entries:
+			f.write(struct.pack(ASSET_PACK_ENTRY_FORMAT, *entry))
+
+		f.write(path_strings)
+
+		for payload_offset, src in payloads:
+			f.write(b"\0" * (payload_offset - f.tell()))
+
+			with open(src, 'rb') as s:
+				shutil.copyfileobj(s, f, 1 << 20)
+
+	if os.path.exists(pack_path) and file_digest(pack_path) == file_digest(temp_path):
+		os.remove(temp_path)
+		print(f"{pack_path} is up to date ({len(entries)} assets)")
+	else:
+		os.replace(temp_path, pack_path)
+		print(f"Packed {len(entries)} assets ({len(payloads)} unique) into {pack_path}: {format_bytes(os.path.getsize(pack_path))}")
+
+def read_asset_pack(pack_path):
+	"""
+	Reads the table of contents of an asset pack. Returns (header dict, list
+	of entry dicts in TOC order). Entry dicts hold path, path_hash, offset,
+	size and content_hash.
+	"""
+	import struct
+
+	with open(pack_path, 'rb') as f:
+		data = f.read()
+
+	magic, version, count, alignment, toc_offset, strings_offset = struct.unpack_from(ASSET_PACK_HEADER_FORMAT, data, 0)
+
+	if magic != ASSET_PACK_MAGIC or version != ASSET_PACK_VERSION:
+		raise ValueError(f"{pack_path} is not a version {ASSET_PACK_VERSION} asset pack")
+
+	header = {"count": count, "alignment": alignment, "toc_offset": toc_offset, "strings_offset": strings_offset, "size": len(data)}
+	entries = []
+	entry_size = struct.calcsize(ASSET_PACK_ENTRY_FORMAT)
+
+	for i in range(count):
+		path_hash, offset, size, content_hash, path_offset, path_length = struct.unpack_from(ASSET_PACK_ENTRY_FORMAT, data, toc_offset + i * entry_size)
+		path = data[strings_offset + path_offset:strings_offset + path_offset + path_length].decode()
+		entries.append({"path": path, "path_hash": path_hash, "offset": offset, "size": size, "content_hash": content_hash})
+
+	return header, entries
+
+@traced
+def verify_asset_pack(pack_path, src_dirs):
+	"""
+	Checks a pack against the asset directories it was made from: TOC sorted
+	by path hash, path hashes matching their paths, payloads aligned, inside
+	the file and byte-identical to their source files, and no asset missing.
+	Raises Build_Error with a list of problems if anything is off.
+	"""
+	header, entries = read_asset_pack(pack_path)
+	sources = asset_pack_sources(src_dirs)
+	problems = []
+
+	hashes = [e["path_hash"] for e in entries]
+	if hashes != sorted(hashes):
+		problems.append("TOC is not sorted by path hash")
+
+	with open(pack_path, 'rb') as f:
+		for e in entries:
+			path = e["path"]
+
+			if fnv1a_64(path.encode()) != e["path_hash"]:
+				problems.append(f"{path}: path hash mismatch")
+			if e["offset"] % header["alignment"]:
+				problems.append(f"{path}: payload not aligned to {header['alignment']}")
+			if e["offset"] + e["size"] > header["size"]:
+				problems.append(f"{path}: payload outside of the pack")
+				continue
+			if path not in sources:
+				problems.append(f"{path}: not in the asset directories")
+				continue
+
+			f.seek(e["offset"])
+			with open(sources[path], 'rb') as s:
+				if f.read(e["size"]) != s.read():
+					problems.append(f"{path}: payload differs from {sources[path]}")
+
+	for path in sorted(set(sources) - {e["path"] for e in entries}):
+		problems.append(f"{path}: missing from the pack")
+
+	if problems:
+		raise Build_Error(f"Asset pack {pack_path} failed verification:\n" + "\n".join("  " + p for p in problems))
+
+	print(f"Verified {pack_path}: {len(entries)} assets OK")
+
+ASSET_MANIFEST_DIR = "build/asset_manifests"
+
+@traced
+def sync_assets(src_dirs, dest_dir, skip_replaced_glbs=False):
+	"""
+	Makes dest_dir an exact copy of src_dirs, copying only what changed.
+	src_dirs is a directory or a list of directories that get merged, later
+	ones winning (used to overlay cooked assets on top of assets/). With
+	skip_replaced_glbs, GLBs the game never opens because of their cooked
+	files are left out (see glbs_replaced_by_cooked_files).
+
+	A manifest per destination records (size, mtime, content hash) of every
+	source file and the stat of its copy. Files whose source and copy still
+	match the manifest are skipped without being read; files that only got
+	touched are detected by hash. Files no longer in src_dirs are deleted.
+	Copies are reflinks where the filesystem allows it, never hardlinks: the
+	build output must not share its files with assets/.
+	"""
+	import json
+
+	manifest_path = os.path.join(ASSET_MANIFEST_DIR, os.path.normpath(dest_dir).replace(os.sep, "_").replace(":", "_") + ".json")
+	manifest = {}
+
+	if os.path.exists(manifest_path):
+		try:
+			with open(manifest_path, 'r', encoding='utf-8') as f:
+				manifest = json.load(f)
+		except ValueError:
+			manifest = {}
+
+	new_manifest = {}
+	stats = {"copy": 0, "reflink": 0}
+	bytes_copied = 0
+	bytes_skipped = 0
+	num_skipped = 0
+	num_removed = 0
+
+	if isinstance(src_dirs, str):
+		src_dirs = [src_dirs]
+
+	sources = {}
+
+	for src_dir in src_dirs:
+		for root, dirs, files in os.walk(src_dir):
+			for file in files:
+				src = os.path.join(root, file)
+				sources[os.path.relpath(src, src_dir).replace(os.sep, "/")] = src
+
+	if skip_replaced_glbs:
+		for path in glbs_replaced_by_cooked_files({"assets/" + rel: src for rel, src in sources.items()}):
+			del sources[path.removeprefix("assets/")]
+
+	for rel, src in sorted(sources.items()):
+		dest = os.path.join(dest_dir, rel)
+		src_st = os.stat(src)
+		entry = manifest.get(rel)
+
+		try:
+			dest_st = os.stat(dest)
+			dest_state = [dest_st.st_size, dest_st.st_mtime_ns]
+		except FileNotFoundError:
+			dest_st = None
+			dest_state = None
+
+		up_to_date = False
+
+		if dest_st is not None and os.path.samestat(src_st, dest_st):
+			# Hardlinked to the source by an older build. Replace it with a
+			# copy, a write to the build would change assets/ otherwise.
+			up_to_date = False
+		elif entry is not None and dest_state is not None and entry["dest"] == dest_state:
+			if entry["size"] == src_st.st_size and entry["mtime_ns"] == src_st.st_mtime_ns:
+				up_to_date = True
+			elif entry["size"] == src_st.st_size and entry["digest"] == file_digest(src):
+				# Touched but not changed
+				up_to_date = True
+
+		if up_to_date:
+			entry = dict(entry, mtime_ns=src_st.st_mtime_ns)
+			num_skipped += 1
+			bytes_skipped += src_st.st_size
+		else:
+			make_dirs(os.path.dirname(dest))
+			method = link_or_copy(src, dest)
+			stats[method] += 1
+			bytes_copied += src_st.st_size
+			dest_st = os.stat(dest)
+			entry = {
+				"size": src_st.st_size,
+				"mtime_ns": src_st.st_mtime_ns,
+				"digest": file_digest(src),
+				"dest": [dest_st.st_size, dest_st.st_mtime_ns],
+			}
+
+		new_manifest[rel] = entry
+
+	# Delete whatever is in the destination but no longer in the source
+	if os.path.exists(dest_dir):
+		for root, dirs, files in os.walk(dest_dir, topdown=False):
+			for file in files:
+				path = os.path.join(root, file)
+				if os.path.relpath(path, dest_dir).replace(os.sep, "/") not in new_manifest:
+					os.remove(path)
+					num_removed += 1
+
+			if root != dest_dir and not os.listdir(root):
+				os.rmdir(root)
+
+	make_dirs(ASSET_MANIFEST_DIR)
+	with open(manifest_path, 'w', encoding='utf-8') as f:
+		json.dump(new_manifest, f, indent=1, sort_keys=True)
+
+	common.TRACE.note(bytes_copied=bytes_copied, bytes_skipped=bytes_skipped, files_skipped=num_skipped, files_removed=num_removed, **stats)
+	copied = ", ".join("%i %s" % (n, "copied" if m == "copy" else m + "ed") for m, n in stats.items() if n)
+	print("Synced %s to %s: %s (%s), %i unchanged (%s skipped), %i removed" % (
+		" + ".join(src_dirs), dest_dir, copied or "0 copied", format_bytes(bytes_copied), num_skipped, format_bytes(bytes_skipped), num_removed))
+
+	return bytes_copied, bytes_skipped
+
+def link_or_copy(src, dest):
+	"""
+	Puts a copy of src at dest, preferring a reflink (copy-on-write clone),
+	which only works within one filesystem. Never hardlinks, src and dest
+	must stay separate files. Returns the method used: "reflink" or "copy".
+	"""
+	if os.path.lexists(dest):
+		os.remove(dest)
+
+	if IS_LINUX:
+		import fcntl
+		FICLONE = 0x40049409
+
+		try:
+			with open(src, 'rb') as s, open(dest, 'wb') as d:
+				fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+			shutil.copystat(src, dest)
+			return "reflink"
+		except OSError:
+			os.remove(dest)
+
+	shutil.copy2(src, dest)
+	return "copy"
@@ -0,0 +1,289 @@
+"""
+-bench: times the build phases on a generated project and compares them
+with a saved baseline.
+"""
+
+import os
+import shutil
+import time
+import sys
+import glob
+
+from . import common, shaders, assets
+from .common import Build_Error, IS_WINDOWS, make_dirs, make_executable
+from .common import locked_print as print
+
+BENCH_RESULTS_PATH = "build/bench/results.json"
+
+# Regressions smaller than this are noise, whatever the relative change
+BENCH_NOISE_FLOOR_MS = 1.0
+
+def run_benchmarks():
+	"""
+	Times the build phases on generated inputs, -bench-runs times each, and
+	writes median/p95/min per case to BENCH_RESULTS_PATH. Compares against
+	the -bench-baseline file if there is one and raises Build_Error naming
+	the regressed cases when any median got slower than -bench-threshold allows.
+
+	Everything runs in a temporary directory with its own source/, assets/
+	and build/ trees. The real sokol-shdc is used if it is installed, a
+	stand-in that just copies its input otherwise.
+	"""
+	import json
+	import tempfile
+	import io
+	import contextlib
+	import platform
+
+
+	shdc = None
+	try:
+		shdc = os.path.abspath(shaders.get_shader_compiler())
+	except Build_Error:
+		pass
+
+	repo_dir = os.getcwd()
+	bench_dir = tempfile.mkdtemp(prefix="toy_bench_")
+	results = {}
+
+	print("Running benchmarks in %s, %i run(s) per case..." % (bench_dir, common.args.bench_runs))
+
+	try:
+		os.chdir(bench_dir)
+
+		for name, setup, run in benchmark_cases(shdc):
+			times = []
+
+			for _ in range(common.args.bench_runs):
+				# Each run starts like a new build.py process would
+				shaders.SHADER_GRAPH = shaders.Shader_Graph()
+				common._file_digest.cache_clear()
+
+				with contextlib.redirect_stdout(io.StringIO()):
+					state = setup()
+					start = time.perf_counter()
+					run(state)
+					times.append((time.perf_counter() - start) * 1000)
+
+			times.sort()
+			results[name] = {
+				"median_ms": round(times[len(times) // 2] if len(times) % 2 else (times[len(times) // 2 - 1] + times[len(times) // 2]) / 2, 3),
+				"p95_ms": round(times[max(0, -(-len(times) * 95 // 100) - 1)], 3),
+				"min_ms": round(times[0], 3),
+				"runs": len(times),
+			}
+			print("  %-36s median %9.2f ms   p95 %9.2f ms" % (name, results[name]["median_ms"], results[name]["p95_ms"]))
+	finally:
+		os.chdir(repo_dir)
+		shutil.rmtree(bench_dir, ignore_errors=True)
+
+	report = {
+		"python": platform.python_version(),
+		"platform": platform.platform(),
+		"cases": results,
+	}
+
+	make_dirs(os.path.dirname(BENCH_RESULTS_PATH))
+	with open(BENCH_RESULTS_PATH, 'w', encoding='utf-8') as f:
+		json.dump(report, f, indent=1, sort_keys=True)
+	print("Wrote " + BENCH_RESULTS_PATH)
+
+	regressions = []
+
+	if os.path.exists(common.args.bench_baseline):
+		with open(common.args.bench_baseline, 'r', encoding='utf-8') as f:
+			baseline = json.load(f)["cases"]
+
+		print("Compared to %s (threshold +%i%%):" % (common.args.bench_baseline, common.args.bench_threshold * 100))
+
+		for name, r in results.items():
+			if name not in baseline:
+				print("  %-36s new" % name)
+				continue
+
+			before = baseline[name]["median_ms"]
+			after = r["median_ms"]
+			change = (after - before) / before if before > 0 else 0.0
+			regressed = after - before > BENCH_NOISE_FLOOR_MS and change > common.args.bench_threshold
+
+			print("  %-36s %9.2f ms -> %9.2f ms  %+7.1f%%%s" % (name, before, after, change * 100, "  REGRESSION" if regressed else ""))
+
+			if regressed:
+				regressions.append(name)
+	else:
+		print("No baseline at %s, use -bench-save-baseline to store one" % common.args.bench_baseline)
+
+	if common.args.bench_save_baseline:
+		with open(common.args.bench_baseline, 'w', encoding='utf-8') as f:
+			json.dump(report, f, indent=1, sort_keys=True)
+		print("Saved baseline to " + common.args.bench_baseline)
+
+	if regressions:
+		raise Build_Error("%i benchmark(s) regressed past the threshold: %s" % (len(regressions), ", ".join(regressions)))
+
+def benchmark_cases(shdc):
+	"""Returns (name, setup, run) triples. setup runs untimed before every run and its result is passed to run."""
+	cases = []
+
+	# Shader preprocessing on import graphs of increasing depth and width
+	for depth, width in ((4, 4), (16, 4), (64, 4), (8, 16), (8, 64)):
+		program = write_bench_shader_tree("bench_shaders/d%i_w%i" % (depth, width), depth, width)
+		cases.append(("preprocess_shader/depth%i_width%i" % (depth, width), lambda: None, lambda _, p=program: shaders.preprocess_shader(p)))
+
+	# build_shaders end to end, from scratch and with everything cached
+	if shdc is not None or not IS_WINDOWS:
+		shdc_path = shaders.get_shader_compiler_path()
+		make_dirs(os.path.dirname(shdc_path))
+
+		if shdc is not None:
+			shutil.copy2(shdc, shdc_path)
+		else:
+			write_shdc_stand_in(shdc_path)
+
+		for i in range(8):
+			write_bench_shader_tree("source/shader_%i" % i, 4, 4)
+
+		def cold_shaders():
+			if os.path.exists(shaders.SHADER_CACHE_DIR):
+				shutil.rmtree(shaders.SHADER_CACHE_DIR)
+
+		cases.append(("build_shaders/cold", cold_shaders, lambda _: shaders.build_shaders()))
+		cases.append(("build_shaders/cached", lambda: None, lambda _: shaders.build_shaders()))
+
+	# Asset sync of generated trees, into an empty destination and when nothing changed
+	for num_files in (100, 1000):
+		src_dir = "bench_assets/%i" % num_files
+		dest_dir = "build/bench_sync/%i" % num_files
+
+		for i in range(num_files):
+			path = os.path.join(src_dir, "dir_%i" % (i % 10), "file_%i.bin" % i)
+			make_dirs(os.path.dirname(path))
+
+			with open(path, 'wb') as f:
+				f.write(os.urandom(4096))
+
+		def clean_dest(dest_dir=dest_dir):
+			if os.path.exists(dest_dir):
+				shutil.rmtree(dest_dir)
+
+			for manifest in glob.glob(os.path.join(assets.ASSET_MANIFEST_DIR, "*")):
+				os.remove(manifest)
+
+		cases.append(("sync_assets/%i_files_cold" % num_files, clean_dest, lambda _, s=src_dir, d=dest_dir: assets.sync_assets(s, d)))
+		cases.append(("sync_assets/%i_files_unchanged" % num_files, lambda: None, lambda _, s=src_dir, d=dest_dir: assets.sync_assets(s, d)))
+
+	# GLB parsing and mesh cooking on generated grids
+	try:
+		import numpy
+		optimize = True
+	except ImportError:
+		optimize = False
+
+	for size in (32, 128):
+		path = "bench_meshes/grid_%i.glb" % size
+		write_bench_glb(path, size)
+		cases.append(("glb/parse_grid%i" % size, lambda: None, lambda _, p=path: assets.read_glb(p)))
+		cases.append(("glb/cook_grid%i" % size, lambda: None, lambda _, p=path: assets.cook_mesh(p, optimize=optimize)))
+
+	return cases
+
+def write_shdc_stand_in(path):
+	"""A sokol-shdc replacement for benchmarks that writes its input to its output"""
+	with open(path, 'w') as f:
+		f.write("#!%s\n" % sys.executable)
+		f.write("import sys, shutil\n")
+		f.write("a = sys.argv\n")
+		f.write("shutil.copyfile(a[a.index('-i') + 1], a[a.index('-o') + 1])\n")
+
+	make_executable(path)
+
+def write_bench_shader_tree(directory, depth, width):
+	"""
+	Writes a program importing a chain of `depth` files, where every file in
+	the chain also imports `width` files of its own. Returns the program path.
+	"""
+	make_dirs(directory)
+
+	def functions(name):
+		return "".join("vec3 %s_f%i(vec3 v) {\n    return normalize(v * %i.0 + vec3(0.5));\n}\n\n" % (name, i, i + 1) for i in range(8))
+
+	for level in range(depth):
+		lines = ["#pragma once\n"]
+
+		for w in range(width):
+			lines.append('#import "leaf_%i_%i.glsl"\n' % (level, w))
+
+			with open(os.path.join(directory, "leaf_%i_%i.glsl" % (level, w)), 'w') as f:
+				f.write("#pragma once\n" + functions("leaf_%i_%i" % (level, w)))
+
+		if level + 1 < depth:
+			lines.append('#import "level_%i.glsl"\n' % (level + 1))
+
+		with open(os.path.join(directory, "level_%i.glsl" % level), 'w') as f:
+			f.write("".join(lines) + functions("level_%i" % level))
+
+	program = os.path.join(directory, "bench.glsl")
+
+	with open(program, 'w') as f:
+		f.write('@vs vs\n#import "level_0.glsl"\nin vec4 pos;\nvoid main() {\n    gl_Position = pos;\n}\n@end\n\n@fs fs\nout vec4 frag_color;\nvoid main() {\n    frag_color = vec4(1.0);\n}\n@end\n\n@program bench vs fs\n')
+
+	return program
+
+def write_bench_glb(path, size):
+	"""Writes a .glb with a size x size vertex grid: positions, normals, UVs and indices"""
+	import json
+	import struct
+	from array import array
+
+	positions = array("f")
+	normals = array("f")
+	uvs = array("f")
+	indices = array("H" if size * size <= 0x10000 else "I")
+
+	for y in range(size):
+		for x in range(size):
+			positions.extend((x, 0.0, y))
+			normals.extend((0.0, 1.0, 0.0))
+			uvs.extend((x / (size - 1), y / (size - 1)))
+
+	for y in range(size - 1):
+		for x in range(size - 1):
+			i = y * size + x
+			indices.extend((i, i + size, i + 1, i + 1, i + size, i + size + 1))
+
+	views = []
+	bin_chunk = bytearray()
+
+	for data in (positions, normals, uvs, indices):
+		if sys.byteorder == "big":
+			data.byteswap()
+
+		bin_chunk += b"\0" * (-len(bin_chunk) % 4)
+		views.append({"buffer": 0, "byteOffset": len(bin_chunk), "byteLength": len(data) * data.itemsize})
+		bin_chunk += data.tobytes()
+
+	bin_chunk += b"\0" * (-len(bin_chunk) % 4)
+	vertex_count = size * size
+
+	gltf = {
+		"asset": {"version": "2.0"},
+		"buffers": [{"byteLength": len(bin_chunk)}],
+		"bufferViews": views,
+		"accessors": [
+			{"bufferView": 0, "componentType": 5126, "count": vertex_count, "type": "VEC3"},
+			{"bufferView": 1, "componentType": 5126, "count": vertex_count, "type": "VEC3"},
+			{"bufferView": 2, "componentType": 5126, "count": vertex_count, "type": "VEC2"},
+			{"bufferView": 3, "componentType": 5123 if indices.typecode == "H" else 5125, "count": len(indices), "type": "SCALAR"},
+		],
+		"meshes": [{"primitives": [{"attributes": {"POSITION": 0, "NORMAL": 1, "TEXCOORD_0": 2}, "indices": 3}]}],
+	}
+
+	json_chunk = json.dumps(gltf).encode()
+	json_chunk += b" " * (-len(json_chunk) % 4)
+
+	make_dirs(os.path.dirname(path))
+
+	with open(path, 'wb') as f:
+		f.write(struct.pack("<III", assets.GLB_MAGIC, 2, 12 + 8 + len(json_chunk) + 8 + len(bin_chunk)))
+		f.write(struct.pack("<II", len(json_chunk), assets.GLB_CHUNK_JSON) + json_chunk)
+		f.write(struct.pack("<II", len(bin_chunk), assets.GLB_CHUNK_BIN) + bytes(bin_chunk))
@@ -0,0 +1,147 @@
+"""
+main() and build(): what a build.py command line asks for, in order.
+"""
+
+import os
+import subprocess
+
+from . import common, tasks, shaders, hot_reload, watch, assets, release, web, sokol
+from .common import (
+	Build_Error, parse_options, check_build_mode, IS_WINDOWS, IS_OSX, IS_LINUX, build_entry_point,
+	make_executable)
+from .common import locked_print as print
+
+def main(argv=None):
+	"""Command line entry point. Returns the exit code."""
+	options = parse_options(argv)
+
+	try:
+		check_build_mode(options)
+		build(options=options)
+	except Build_Error as e:
+		print(e)
+		return 1
+
+	return 0
+
+@build_entry_point
+def build():
+	"""Does everything the options ask for, like a build.py invocation with the same arguments"""
+	if common.args.bench:
+		from . import bench
+		bench.run_benchmarks()
+		return
+
+	do_update = common.args.update_sokol
+
+	# Looks like a fresh setup, no sokol anywhere! Trigger automatic update.
+	if not os.path.exists(sokol.SOKOL_PATH) and not os.path.exists(sokol.SOKOL_SHDC_PATH):
+		do_update = True
+
+	if do_update:
+		sokol.update_sokol()
+
+	do_compile = do_update or common.args.compile_sokol
+
+	if do_compile:
+		sokol.compile_sokol()
+
+	# If we're only building shaders, we're done
+	if common.args.shaders:
+		shaders.build_shaders()
+		return
+
+	exe_path = ""
+	
+	if common.args.release:
+		exe_path = release.build_release()
+	elif common.args.web:
+		exe_path = web.build_web()
+	elif common.args.hot_reload:
+		exe_path = hot_reload.build_hot_reload()
+	elif common.args.capture:
+		# Build release for capture
+		exe_path = release.build_release()
+		if IS_WINDOWS:
+			release.run_with_renderdoc_capture(exe_path)
+		else:
+			print("RenderDoc capture is only supported on Windows.")
+			return
+	elif common.args.asset_report and not common.args.cook_assets:
+		# Nothing to build, only the report
+		assets.asset_report()
+	else:
+		tasks.new_build_graph().run()
+	
+	if exe_path != "" and common.args.run:
+		if common.args.web:
+			web.serve_web(exe_path)
+			return
+		else:
+			# For regular executables and app bundles
+			print("Starting " + exe_path)
+			
+			# Handle macOS app bundles specially
+			if IS_OSX and exe_path.endswith('.app'):
+				try:
+					print(f"Launching macOS app bundle: {exe_path}")
+					process = subprocess.Popen(
+						["open", exe_path], 
+						stdout=subprocess.DEVNULL,
+						stderr=subprocess.DEVNULL,
+						stdin=subprocess.DEVNULL,
+						start_new_session=True
+					)
+					print(f"App bundle launched with PID: {process.pid}")
+					return
+				except Exception as e:
+					raise Build_Error(f"Error launching app bundle: {e}")
+			
+			# For regular executables
+			exe_abs_path = os.path.abspath(exe_path)
+			exe_dir = os.path.dirname(exe_abs_path)
+			
+			# Verify the executable exists and is executable
+			if not os.path.exists(exe_abs_path):
+				raise Build_Error(f"Error: Executable not found: {exe_abs_path}")
+			
+			if IS_LINUX or IS_OSX:
+				if not os.access(exe_abs_path, os.X_OK):
+					print(f"Error: Executable is not executable: {exe_abs_path}")
+					print("Trying to fix permissions...")
+					make_executable(exe_abs_path)
+			
+			try:
+				# Run the executable from its own directory so it can find relative files like dylibs
+				print(f"Launching: {exe_abs_path}")
+				print(f"Working directory: {exe_dir}")
+				
+				# On Unix systems, properly detach the process from the parent
+				# This prevents VS Code from killing it when the task completes
+				if IS_LINUX or IS_OSX:
+					process = subprocess.Popen(
+						[exe_abs_path], 
+						cwd=exe_dir,
+						stdout=subprocess.DEVNULL,
+						stderr=subprocess.DEVNULL,
+						stdin=subprocess.DEVNULL,
+						start_new_session=True  # Creates a new process group
+					)
+				else:
+					# Windows
+					process = subprocess.Popen([exe_abs_path], cwd=exe_dir)
+					
+				print(f"Game started with PID: {process.pid}")
+				
+			except FileNotFoundError as e:
+				raise Build_Error(f"Error: Could not find executable: {e}")
+			except PermissionError as e:
+				raise Build_Error(f"Error: Permission denied when trying to run executable: {e}\nMake sure the file has execute permissions.")
+			except Exception as e:
+				raise Build_Error(f"Error starting executable: {e}")
+
+	if common.args.watch:
+		if common.args.web:
+			watch.watch_web()
+		else:
+			watch.watch_hot_reload()
@@ -0,0 +1,367 @@
+"""
+Build options, Build_Error, the -trace recorder and the file and
+platform helpers every build_tools module uses. Build functions read the
+options of the build in progress from common.args.
+"""
+
+import argparse
+import os
+import shutil
+import functools
+import time
+import sys
+import stat
+import threading
+import builtins
+import re
+import hashlib
+
+args_parser = argparse.ArgumentParser(
+	prog = "build.py",
+	description = "ToyEngine Build Script",
+	epilog = "Made by Austin Crane")
+
+args_parser.add_argument("-hot-reload",        action="store_true",   help="Build hot reload game DLL. Also builds executable if game not already running. If the game is running, it will hot reload the game DLL.")
+args_parser.add_argument("-watch",             action="store_true",   help="Hot reload build that stays running and watches 'source' and 'assets' for changes. Recompiles changed shader programs, rebuilds the game DLL when .odin files change and syncs changed assets into the hot reload build. Implies -hot-reload, unless used with -web: then the web build is redone on changes and pages served by -run reload.")
+args_parser.add_argument("-release",           action="store_true",   help="Build release game executable. Note: Deletes everything in the 'build/release' directory except its 'assets' directory (or 'assets.pack' with -pack-assets), which is synced with 'assets' instead: changed files are copied and files no longer in 'assets' are removed, so the result is the same as a clean release.")
+args_parser.add_argument("-update-sokol",      action="store_true",   help="Download latest Sokol bindings and latest Sokol shader compiler. Happens automatically when the 'sokol-shdc' and 'source/lib/sokol' directories are missing. Downloads are cached in 'build/download_cache' and revalidated with the server, an interrupted download resumes on the next run. Only files that differ from the downloaded archives are written, and files a previous update extracted that are gone from the archives are removed. Other files in 'sokol-shdc' and 'source/lib/sokol', like compiled libraries, are kept. Also causes -compile-sokol to happen.")
+args_parser.add_argument("-compile-sokol",     action="store_true",   help="Compile Sokol C libraries for the current platform. Also compile web (WASM) libraries if emscripten is found (optional). Use -emsdk-path to point out emscripten SDK if not in PATH.")
+args_parser.add_argument("-run",               action="store_true",   help="Run the executable after compiling it. For web builds, serves the build (precompressed files, live reload) and opens it in the browser.")
+args_parser.add_argument("-debug",             action="store_true",   help="Create debuggable binaries. Makes it possible to debug hot reload and release build in a debugger. For the web build it means that better error messages are printed to console. Debug mode comes with a performance penalty.")
+args_parser.add_argument("-shader-langs",                             help="Extra sokol-shdc target languages to compile alongside the current platform's, comma separated (e.g. glsl430,glsl300es). The extra outputs only go into the shader cache, so a following build for that target skips shdc.")
+args_parser.add_argument("-minify-shaders",    action="store_true",   help="Strip comments and functions that main can't reach from the shader sources before compiling them, and whitespace from the GLSL embedded in the generated files. Prints the bytes saved. Always on for web builds.")
+args_parser.add_argument("-j",                type=int, default=os.cpu_count() or 1, help="Maximum number of parallel jobs, such as concurrent shader compiles and build tasks. Default is the number of CPU cores.")
+args_parser.add_argument("-no-shader-compile", action="store_true",   help="Don't compile shaders.")
+args_parser.add_argument("-shaders",           action="store_true",   help="Compile shaders only. Useful for quick shader iteration.")
+args_parser.add_argument("-web",               action="store_true",   help="Build web release. Make sure emscripten (emcc) is in your PATH or use -emsdk-path flag to specify where it lives.")
+args_parser.add_argument("-port",              type=int, default=8000, help="Port to use when serving web builds with -run. A free port is used if it is taken. Default is 8000.")
+args_parser.add_argument("-capture",           action="store_true",   help="Build and run with RenderDoc capture (Windows only). Automatically captures a frame and opens in RenderDoc.")
+args_parser.add_argument("-sokol-mirror",                             help="Directory or file:// (or http) URL with sokol-odin-main.zip and sokol-tools-bin-master.zip to use instead of GitHub for -update-sokol. Useful offline and in CI.")
+args_parser.add_argument("-emsdk-path",                               help="Path to where you have emscripten installed. Should be the root directory of your emscripten installation. Not necessary if emscripten is in your PATH. Can be used with both -web and -compile-sokol (the latter needs it when building the Sokol web (WASM) libraries).")
+args_parser.add_argument("-cook-assets",       action="store_true",   help="Cook every assets/*.glb into a packed, load-ready .mesh file (cached by input hash in build/cook_cache). The cooked files are shipped next to the .glb files and the game loads them instead of parsing the glTF. Release builds and web bundles leave out GLBs that have a .mesh and an uncompressed .tex. Can be used on its own or together with a build mode.")
+args_parser.add_argument("-texture-compression", default="none", choices=["none", "auto", "bc1", "bc3", "bc7", "etc2"], help="Block compress the textures cooked by -cook-assets. 'auto' is ETC2 for web builds and BC1 otherwise. BC1 becomes BC3 and ETC2 RGB becomes ETC2 RGBA8 for textures with alpha. The game falls back to the .glb texture on GPUs without the format. Default is 'none' (RGBA8).")
+args_parser.add_argument("-texture-quality",   type=int, default=1, choices=[0, 1, 2], help="Speed/quality trade-off of -texture-compression: 0 is fastest, 2 refines endpoints and tries more block modes. Default is 1.")
+args_parser.add_argument("-asset-report",      action="store_true",   help="Print the vertex, index and triangle counts, attributes, texture size and estimated GPU memory of every assets/*.glb, checked against the budgets in asset_budgets.json, and write them to build/asset_report.json. Fails if a budget is broken. Release builds always check the budgets. Can be used on its own or together with a build mode.")
+args_parser.add_argument("-pack-assets",       action="store_true",   help="Release builds only: ship the assets as a single 'assets.pack' file next to the executable instead of a loose 'assets' directory. The game reads it once at startup and serves every asset as a slice of it.")
+args_parser.add_argument("-pack-alignment",    type=int, default=16,  help="Alignment of asset payloads in the pack made by -pack-assets. Default is 16, use 4096 for page aligned payloads.")
+args_parser.add_argument("-web-deploy",        action="store_true",   help="Web builds only: give the .js, .wasm and .data files content-hashed names, update index.html to match and write maximum level .gz and, if the brotli module is installed, .br siblings of every file. Prints the file sizes.")
+args_parser.add_argument("-bench",             action="store_true",   help="Benchmark the build phases (shader preprocessing, shader builds, asset sync, GLB parsing and cooking) on generated inputs in a temporary directory. Writes median/p95 timings to build/bench/results.json and fails if a phase got slower than the baseline by more than -bench-threshold. Runs offline; missing tools are replaced by stand-ins.")
+args_parser.add_argument("-bench-runs",        type=int, default=7,   help="Repetitions per benchmark case. Default is 7.")
+args_parser.add_argument("-bench-baseline",    default="bench_baseline.json", help="Baseline file -bench compares against. Default is 'bench_baseline.json'.")
+args_parser.add_argument("-bench-save-baseline", action="store_true", help="Store the results of -bench as the new baseline.")
+args_parser.add_argument("-bench-threshold",   type=float, default=0.25, help="How much slower (as a fraction of the baseline median) a benchmark case may get before -bench fails. Default is 0.25.")
+args_parser.add_argument("-trace",                                    help="Write a Chrome/Perfetto trace of the build to this .json file: a span for every build phase and every command run, with command lines, exit codes, bytes copied, cache hits and odin's -show-timings stages. Also prints a per-phase summary at the end. Open it in ui.perfetto.dev or chrome://tracing.")
+args_parser.add_argument("-gl",                action="store_true",   help="Force OpenGL Sokol backend. Useful on some older computers, for example old MacBooks that don't support Metal.")
+args_parser.add_argument("-app-name",                                 help="Name for the macOS app bundle (default: ToyGame). Only used when building release on macOS.")
+
+class Build_Error(Exception):
+	"""A build failed. The message says what failed, details like compiler output have been printed already."""
+
+def parse_options(argv=None):
+	"""Build options from command line arguments, sys.argv when argv is None"""
+	options = args_parser.parse_args(argv)
+
+	if options.watch and not options.web:
+		options.hot_reload = True
+
+	return options
+
+def default_options(**overrides):
+	"""Build options as if no command line arguments were given, with overrides, e.g. default_options(debug=True)"""
+	options = parse_options([])
+
+	for name, value in overrides.items():
+		if not hasattr(options, name):
+			raise TypeError("Unknown build option: " + name)
+
+		setattr(options, name, value)
+
+	if options.watch and not options.web:
+		options.hot_reload = True
+
+	return options
+
+def check_build_mode(options):
+	num_build_modes = sum(1 for mode in (options.hot_reload, options.release, options.web, options.capture) if mode)
+
+	if num_build_modes > 1:
+		raise Build_Error("Can only use one of: -hot-reload, -release, -web and -capture.")
+	elif num_build_modes == 0 and not options.update_sokol and not options.compile_sokol and not options.shaders and not options.cook_assets and not options.asset_report and not options.bench:
+		raise Build_Error("You must use one of: -hot-reload, -release, -web, -capture, -update-sokol, -compile-sokol, -shaders, -cook-assets, -asset-report or -bench.")
+
+# Options of the build in progress. The defaults until main() or one of the
+# build_entry_point functions sets them.
+args = default_options()
+
+# sys.platform rather than platform.system(), which costs an import on every run
+IS_WINDOWS = sys.platform == "win32"
+IS_OSX = sys.platform == "darwin"
+IS_LINUX = sys.platform.startswith("linux")
+
+assert IS_WINDOWS or IS_OSX or IS_LINUX, "Unsupported platform."
+
+class Trace_Span:
+	def __init__(self, trace, event):
+		self.trace = trace
+		self.event = event
+
+	def __enter__(self):
+		if self.event is not None:
+			self.event["ts"] = self.trace.now_us()
+			self.trace.stack().append(self.event)
+		return self.event
+
+	def __exit__(self, *exc):
+		if self.event is not None:
+			self.event["dur"] = self.trace.now_us() - self.event["ts"]
+			self.trace.stack().pop()
+
+			with self.trace.lock:
+				self.trace.events.append(self.event)
+
+		return False
+
+class Trace:
+	"""
+	Records spans as Chrome trace events ("X" complete events), which both
+	chrome://tracing and ui.perfetto.dev open. Does nothing unless -trace
+	is given. Spans nest per thread, so concurrent shader compiles show up
+	as parallel tracks.
+	"""
+	def __init__(self, path):
+		self.path = path
+		self.events = []
+		self.lock = threading.Lock()
+		self.local = threading.local()
+		self.start = time.perf_counter()
+		self.thread_ids = {}
+
+	def now_us(self):
+		return (time.perf_counter() - self.start) * 1e6
+
+	def stack(self):
+		if not hasattr(self.local, "stack"):
+			self.local.stack = []
+		return self.local.stack
+
+	def tid(self):
+		with self.lock:
+			return self.thread_ids.setdefault(threading.get_ident(), len(self.thread_ids) + 1)
+
+	def span(self, name, cat="phase", **span_args):
+		if self.path is None:
+			return Trace_Span(self, None)
+
+		return Trace_Span(self, {"name": name, "cat": cat, "ph": "X", "pid": 1, "tid": self.tid(), "args": span_args})
+
+	def note(self, **span_args):
+		"""Adds arguments to the innermost open span of this thread"""
+		if self.path is not None and self.stack():
+			self.stack()[-1]["args"].update(span_args)
+
+	def add_odin_timings(self, parent, output):
+		"""
+		Parses the stage table `odin build -show-timings` prints and adds the
+		stages as spans nested under parent, laid out back to back from its
+		start. Indented rows are sub-stages of the row above them.
+		"""
+		if parent is None:
+			return
+
+		units = {"s": 1e6, "ms": 1e3, "us": 1.0, "µs": 1.0}
+		cursor = {0: parent["ts"]}
+		stages = []
+
+		for line in output.splitlines():
+			m = re.match(r"^(\s*)(\S.*?)\s+-\s+([\d.]+)\s*(s|ms|us|µs)\s+-\s+[\d.]+%", line)
+
+			if not m or m.group(2).strip().lower() == "total time":
+				continue
+
+			depth = 0 if not m.group(1) else 1
+			dur = float(m.group(3)) * units[m.group(4)]
+			ts = cursor[depth] if depth in cursor else cursor[0]
+
+			event = {"name": m.group(2).strip(), "cat": "odin", "ph": "X", "pid": 1, "tid": parent["tid"], "ts": ts, "dur": dur, "args": {}}
+			stages.append(event)
+
+			if depth == 0:
+				cursor = {0: ts + dur, 1: ts}
+			else:
+				cursor[1] = ts + dur
+
+		parent["args"]["odin_stages"] = len(stages)
+
+		with self.lock:
+			self.events.extend(stages)
+
+	def finish(self):
+		"""Writes the trace file and prints a line per phase, slowest first"""
+		if self.path is None:
+			return
+
+		import json
+
+		total = self.now_us()
+
+		with self.lock:
+			events = sorted(self.events, key=lambda e: e["ts"])
+
+		if os.path.dirname(self.path):
+			os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+		with open(self.path, 'w', encoding='utf-8') as f:
+			json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+		totals = {}
+
+		for e in events:
+			if e["cat"] in ("phase", "subprocess"):
+				key = (e["cat"], e["name"])
+				count, dur = totals.get(key, (0, 0.0))
+				totals[key] = (count + 1, dur + e["dur"])
+
+		print("Build trace written to %s (%.2f s total):" % (self.path, total / 1e6))
+
+		for (cat, name), (count, dur) in sorted(totals.items(), key=lambda t: -t[1][1]):
+			print("  %-10s %-28s %8.2f s %5.1f%%  %i call(s)" % (cat, name, dur / 1e6, 100 * dur / total if total else 0, count))
+
+TRACE = Trace(None)
+
+def traced(f):
+	"""Puts every call of the decorated build phase in a trace span"""
+	@functools.wraps(f)
+	def wrapper(*a, **kw):
+		with TRACE.span(f.__name__):
+			return f(*a, **kw)
+
+	return wrapper
+
+# Paths are relative to the project root, the parent of build_tools
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def build_entry_point(f):
+	"""
+	Makes a build function callable on its own: it takes an options=
+	argument, which is active for the duration of the call along with
+	the -trace file it asks for, and runs from the project root. Without
+	options the current ones are used, which is how the build functions
+	call each other.
+	"""
+	@functools.wraps(f)
+	def wrapper(*a, options=None, **kw):
+		global args, TRACE
+
+		if options is None:
+			return f(*a, **kw)
+
+		prev_args, prev_trace, owd = args, TRACE, os.getcwd()
+		args, TRACE = options, Trace(os.path.abspath(options.trace) if options.trace else None)
+		os.chdir(PROJECT_DIR)
+
+		try:
+			return f(*a, **kw)
+		finally:
+			try:
+				TRACE.finish()
+			finally:
+				args, TRACE = prev_args, prev_trace
+				os.chdir(owd)
+
+	return wrapper
+
+@functools.lru_cache(maxsize=None)
+def _file_digest(path, size, mtime_ns):
+	hasher = hashlib.sha256()
+
+	with open(path, 'rb') as f:
+		for chunk in iter(lambda: f.read(1 << 20), b""):
+			hasher.update(chunk)
+
+	return hasher.hexdigest()
+
+def file_digest(path):
+	"""SHA-256 of a file's contents, memoized on (path, size, mtime)"""
+	st = os.stat(path)
+	return _file_digest(os.path.normpath(path), st.st_size, st.st_mtime_ns)
+
+def write_if_changed(path, data):
+	"""Writes bytes to path unless it already holds exactly those bytes. Returns True if written."""
+	if os.path.exists(path) and os.path.getsize(path) == len(data):
+		with open(path, 'rb') as f:
+			if f.read() == data:
+				return False
+
+	with open(path, 'wb') as f:
+		f.write(data)
+
+	return True
+
+path_join = os.path.join
+
+def clean_dir_except(path, keep):
+	"""Deletes everything inside path except the paths in keep (and the directories leading to them)"""
+	keep = [os.path.normpath(k) for k in keep]
+
+	for entry in os.listdir(path):
+		p = os.path.normpath(os.path.join(path, entry))
+
+		if p in keep:
+			continue
+
+		if os.path.isdir(p) and not os.path.islink(p):
+			if any(k.startswith(p + os.sep) for k in keep):
+				clean_dir_except(p, keep)
+			else:
+				shutil.rmtree(p)
+		else:
+			os.remove(p)
+
+def format_bytes(n):
+	for unit in ("B", "KB", "MB", "GB"):
+		if n < 1024 or unit == "GB":
+			return ("%i %s" % (n, unit)) if unit == "B" else ("%.1f %s" % (n, unit))
+		n /= 1024
+
+def dll_extension():
+	if IS_WINDOWS:
+		return ".dll"
+
+	if IS_OSX:
+		return ".dylib"
+
+	return ".so"
+
+def executable_extension():
+	if IS_WINDOWS:
+		return ".exe"
+
+	return ".bin"
+
+def make_dirs(path):
+	n = os.path.normpath(path)
+	s = n.split(os.sep)
+	p = ""
+
+	for d in s:
+		p = os.path.join(p, d)
+
+		if not os.path.exists(p):
+			os.mkdir(p)
+
+def make_executable(file_path):
+	"""Make a file executable on Unix-like systems"""
+	if IS_LINUX or IS_OSX:
+		if os.path.exists(file_path):
+			current_permissions = os.stat(file_path).st_mode
+			os.chmod(file_path, current_permissions | stat.S_IEXEC)
+			print(f"Made {file_path} executable")
+
+PRINT_LOCK = threading.Lock()
+
+def locked_print(*values, **kwargs):
+	"""Build tasks print from several threads, keep their lines whole"""
+	with PRINT_LOCK:
+		builtins.print(*values, **kwargs, flush=True)
+
+print = locked_print
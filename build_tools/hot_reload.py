@@ -0,0 +1,361 @@
+"""
+Hot reload builds: the game DLL, the executable that loads it and the
+fingerprints that let unchanged ones be skipped. A running game is asked
+to reload over its control port.
+"""
+
+import os
+import shutil
+import functools
+import re
+import hashlib
+
+from . import common, tasks, assets, sokol
+from .common import (
+	Build_Error, IS_WINDOWS, IS_OSX, IS_LINUX, traced, build_entry_point, file_digest, dll_extension,
+	executable_extension, make_dirs, make_executable)
+from .common import locked_print as print
+
+HOT_RELOAD_DIR = "build/hot_reload"
+
+# Written to HOT_RELOAD_DIR by the running hot reload game: its PID and the
+# loopback TCP port it takes reload requests on
+HOT_RELOAD_LOCK_FILE = "hot_reload.lock"
+HOT_RELOAD_CONNECT_TIMEOUT = 0.5
+
+@traced
+def running_game_port():
+	"""
+	The control port of the running hot reload game, None if it isn't running.
+	A lock file left behind by a crashed game is noticed by the refused
+	connection and removed.
+	"""
+	import socket
+
+	lock_path = os.path.join(HOT_RELOAD_DIR, HOT_RELOAD_LOCK_FILE)
+
+	try:
+		with open(lock_path, 'r') as f:
+			pid, port = f.read().split()[:2]
+			port = int(port)
+	except (OSError, ValueError):
+		return None
+
+	try:
+		with socket.create_connection(("127.0.0.1", port), timeout=HOT_RELOAD_CONNECT_TIMEOUT):
+			pass
+	except OSError:
+		print(f"Removing stale {lock_path} of game process {pid}")
+
+		try:
+			os.remove(lock_path)
+		except OSError:
+			pass
+
+		return None
+
+	common.TRACE.note(pid=int(pid), port=port)
+	return port
+
+def request_game_reload(dll_path):
+	"""Tells the running hot reload game, if there is one, to load the new DLL. Only call it once the DLL is complete."""
+	import socket
+
+	port = running_game_port()
+
+	if port is None:
+		return False
+
+	try:
+		with socket.create_connection(("127.0.0.1", port), timeout=HOT_RELOAD_CONNECT_TIMEOUT) as s:
+			s.sendall(("reload %s\n" % os.path.abspath(dll_path)).encode())
+	except OSError as e:
+		print(f"Could not send the reload request to the game: {e}")
+		return False
+
+	print("Asked the running game to reload " + dll_path)
+	return True
+
+@build_entry_point
+@traced
+def build_hot_reload():
+	"""
+	Builds the game DLL and, unless the game is running and will hot reload
+	the DLL, the executable that loads it. Returns the executable's path, or
+	"" when the running game hot reloads.
+	"""
+	graph = tasks.new_build_graph()
+	out_dir = HOT_RELOAD_DIR
+
+	if not os.path.exists(out_dir):
+		make_dirs(out_dir)
+
+	exe = out_dir + "/game_hot_reload" + executable_extension()
+
+	game_running = running_game_port() is not None
+
+	if IS_WINDOWS:
+		if not game_running:
+			out_dir_files = os.listdir(out_dir)
+
+			for f in out_dir_files:
+				if f.endswith(".dll"):
+					try:
+						os.remove(os.path.join(out_dir, f))
+					except PermissionError:
+						# File is in use, skip it
+						pass
+
+			pdb_dir = out_dir + "/game_pdbs"
+
+			if os.path.exists(pdb_dir):
+				shutil.rmtree(pdb_dir)
+
+		dll_name = "sokol_dll_windows_x64_d3d11_debug.dll" if common.args.debug else "sokol_dll_windows_x64_d3d11_release.dll"
+		dll_dest = out_dir + "/" + dll_name
+
+		if not os.path.exists(dll_dest):
+			print("Copying %s" % dll_name)
+			shutil.copyfile(sokol.SOKOL_PATH + "/" + dll_name, dll_dest)
+
+	dll_rebuilt = []
+	graph.add("dll", lambda: dll_rebuilt.append(build_hot_reload_dll()), inputs=["source"], outputs=[out_dir + "/game" + dll_extension()])
+
+	# Sync assets folder to the build directory
+	assets_dest = out_dir + "/assets"
+	if os.path.exists(assets.ASSETS_DIR):
+		# Only sync if source exists and destination doesn't exist or is outdated
+		if not os.path.exists(assets_dest) or not game_running:
+			graph.add("assets", lambda: assets.sync_assets(assets.asset_source_dirs(), assets_dest), inputs=assets.asset_source_dirs(), outputs=[assets_dest])
+
+	if game_running:
+		graph.run()
+
+		# A rebuilt DLL was already sent to the game by build_hot_reload_dll
+		if not dll_rebuilt[0]:
+			print("Game DLL unchanged, nothing to hot reload.")
+
+		# Hot reloading means the running executable will see the new dll.
+		# So we can just return empty string here. This makes sure that the main
+		# function does not try to run the executable, even if `run` is specified.
+		return ""
+
+	graph.add("exe", lambda: build_hot_reload_exe(exe), inputs=["source/lib/main_hot_reload", sokol.SOKOL_PATH], outputs=[exe])
+
+	if IS_OSX:
+		graph.add("dylibs", copy_hot_reload_dylibs, inputs=[sokol.SOKOL_PATH + "/dylib"], outputs=[out_dir + "/dylib"])
+
+	graph.run()
+	return exe
+
+@traced
+def build_hot_reload_exe(exe):
+	"""Builds the executable that loads the game DLL and reloads it when it changes"""
+	exe_extra_args = ""
+
+	if IS_WINDOWS:
+		exe_extra_args += " -pdb-name:%s/main_hot_reload.pdb" % os.path.dirname(exe)
+
+	if common.args.debug:
+		exe_extra_args += " -debug"
+
+	if common.args.gl:
+		exe_extra_args += " -define:SOKOL_USE_GL=true"
+
+	exe_command = "odin build source/lib/main_hot_reload -strict-style -define:SOKOL_DLL=true -vet -out:%s %s" % (exe, exe_extra_args)
+	exe_fingerprint = odin_build_fingerprint(odin_package_files("source/lib/main_hot_reload"), exe_command)
+
+	if is_build_up_to_date(exe, exe_fingerprint):
+		print(exe + " is up to date, skipping build")
+	else:
+		print("Building " + exe + "...")
+		tasks.execute(exe_command)
+		save_build_fingerprint(exe, exe_fingerprint)
+
+	# Make executable on Unix-like systems
+	make_executable(exe)
+
+def copy_hot_reload_dylibs():
+	dylib_folder = "source/lib/sokol/dylib"
+
+	if not os.path.exists(dylib_folder):
+		raise Build_Error("Dynamic libraries for OSX don't seem to be built. Please re-run 'build.py -compile-sokol'.")
+
+	dylib_out_dir = HOT_RELOAD_DIR + "/dylib"
+	if not os.path.exists(dylib_out_dir):
+		os.mkdir(dylib_out_dir)
+
+	dylibs = os.listdir(dylib_folder)
+
+	for d in dylibs:
+		src = "%s/%s" % (dylib_folder, d)
+		dest = "%s/%s" % (dylib_out_dir, d)
+		do_copy = False
+
+		if not os.path.exists(dest):
+			do_copy = True
+		elif os.path.getsize(dest) != os.path.getsize(src):
+			do_copy = True
+
+		if do_copy:
+			print("Copying %s to %s" % (src, dest))
+			shutil.copyfile(src, dest)
+
+@traced
+def build_hot_reload_dll():
+	"""
+	Builds the game DLL that the hot reload executable loads. Used by
+	build_hot_reload and -watch.
+
+	Skips the compile, and with it the reload of the running game, when the
+	sources, compiler and flags are the same as for the last successful
+	build. Returns True if the DLL was rebuilt.
+	"""
+	out_dir = HOT_RELOAD_DIR
+	dll_final_name = out_dir + "/game" + dll_extension()
+	dll = dll_final_name
+
+	if IS_LINUX or IS_OSX:
+		dll = out_dir + "/game_tmp" + dll_extension()
+
+	dll_extra_args = ""
+
+	if common.args.debug:
+		dll_extra_args += " -debug"
+
+	if common.args.gl:
+		dll_extra_args += " -define:SOKOL_USE_GL=true"
+
+	# The fingerprint leaves out the Windows PDB name, which changes every build
+	dll_fingerprint = odin_build_fingerprint(
+		odin_source_files("source"),
+		"odin build source -define:SOKOL_DLL=true -build-mode:dll %s" % dll_extra_args)
+
+	if is_build_up_to_date(dll_final_name, dll_fingerprint):
+		print(dll_final_name + " is up to date, skipping build")
+		return False
+
+	if IS_WINDOWS:
+		pdb_dir = out_dir + "/game_pdbs"
+		pdb_number = 0
+
+		if not os.path.exists(pdb_dir):
+			make_dirs(pdb_dir)
+		else:
+			pdb_files = os.listdir(pdb_dir)
+
+			for f in pdb_files:
+				if f.endswith(".pdb"):
+					n = int(f.removesuffix(".pdb").removeprefix("game_"))
+
+					if n > pdb_number:
+						pdb_number = n
+
+		# On windows we make sure the PDB name for the DLL is unique on each
+		# build. This makes debugging work properly.
+		dll_extra_args += " -pdb-name:%s/game_%i.pdb" % (pdb_dir, pdb_number + 1)
+
+	print("Building " + dll_final_name + "...")
+	tasks.execute("odin build source -define:SOKOL_DLL=true -build-mode:dll -out:%s %s" % (dll, dll_extra_args))
+
+	if IS_LINUX or IS_OSX:
+		os.rename(dll, dll_final_name)
+
+	save_build_fingerprint(dll_final_name, dll_fingerprint)
+
+	# Only now is the DLL complete. The game doesn't watch the file, so it
+	# can't load a half-written one.
+	request_game_reload(dll_final_name)
+	return True
+
+NATIVE_LIBRARY_EXTENSIONS = (".a", ".lib", ".so", ".dylib", ".dll")
+
+def odin_source_files(directory):
+	"""All .odin files (including generated gen__*.odin) and native libraries below directory"""
+	paths = []
+
+	for root, dirs, files in os.walk(directory):
+		for file in files:
+			if file.endswith(".odin") or file.endswith(NATIVE_LIBRARY_EXTENSIONS):
+				paths.append(os.path.normpath(os.path.join(root, file)))
+
+	return paths
+
+def odin_package_files(package_dir):
+	"""
+	Files of an Odin package and of every package it imports by relative
+	path (collections like core: and base: are covered by the compiler
+	version). Native libraries anywhere under the Sokol bindings are included
+	too, since foreign imports reach into sibling directories.
+	"""
+	import_re = re.compile(r'^\s*import\s+(?:\w+\s+)?"([^":]+)"', re.MULTILINE)
+	package_dirs = set()
+	stack = [os.path.normpath(package_dir)]
+	paths = []
+
+	while stack:
+		d = stack.pop()
+
+		if d in package_dirs or not os.path.isdir(d):
+			continue
+
+		package_dirs.add(d)
+
+		for file in os.listdir(d):
+			path = os.path.join(d, file)
+
+			if not file.endswith(".odin") or not os.path.isfile(path):
+				continue
+
+			paths.append(path)
+
+			with open(path, 'r', encoding='utf-8', errors='replace') as f:
+				for import_path in import_re.findall(f.read()):
+					stack.append(os.path.normpath(os.path.join(d, import_path)))
+
+	if any(d.startswith(os.path.normpath(sokol.SOKOL_PATH)) for d in package_dirs):
+		paths += [p for p in odin_source_files(sokol.SOKOL_PATH) if p.endswith(NATIVE_LIBRARY_EXTENSIONS)]
+
+	return sorted(set(paths))
+
+@functools.lru_cache(maxsize=None)
+def odin_version():
+	res, output = tasks.run_captured("odin version")
+	return output.strip() if res == 0 else ""
+
+def odin_build_fingerprint(files, command):
+	"""
+	Hash over the compiler version, the effective command line and the given
+	input files. Sources are hashed by content so touching a file doesn't
+	cause a rebuild; native libraries only by size and mtime, as they are big
+	and only change when Sokol is recompiled.
+	"""
+	hasher = hashlib.sha256()
+	hasher.update(odin_version().encode() + b"\0")
+	hasher.update(" ".join(command.split()).encode() + b"\0")
+
+	for path in sorted(files):
+		if path.endswith(NATIVE_LIBRARY_EXTENSIONS):
+			st = os.stat(path)
+			state = "%i:%i" % (st.st_size, st.st_mtime_ns)
+		else:
+			state = file_digest(path)
+
+		hasher.update(("%s=%s\0" % (path.replace(os.sep, "/"), state)).encode())
+
+	return hasher.hexdigest()
+
+def is_build_up_to_date(output, fingerprint):
+	fingerprint_path = output + ".fingerprint"
+	up_to_date = False
+
+	if os.path.exists(output) and os.path.exists(fingerprint_path):
+		with open(fingerprint_path, 'r') as f:
+			up_to_date = f.read().strip() == fingerprint
+
+	common.TRACE.note(up_to_date=up_to_date)
+	return up_to_date
+
+def save_build_fingerprint(output, fingerprint):
+	with open(output + ".fingerprint", 'w') as f:
+		f.write(fingerprint + "\n")
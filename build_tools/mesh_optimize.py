@@ -0,0 +1,199 @@
+"""
+Cook time mesh optimization: welding, vertex cache order and the baked
+smooth outline normals. -cook-assets uses it whenever NumPy can be
+imported, and only then loads this module.
+"""
+
+# FIFO cache size the vertex cache optimization targets and ACMR is measured with
+VERTEX_CACHE_SIZE = 16
+
+# Same quantization as calculate_smooth_normals in engine_core/asset/asset.odin
+SMOOTH_NORMAL_EPSILON = 0.0001
+
+def optimize_mesh(positions, normals, uvs, indices):
+	"""
+	Welds identical vertices, reorders the triangles for the post-transform
+	vertex cache and then the vertices in order of first use, and bakes the
+	smoothed normals the outline pass extrudes along. Takes and returns the
+	raw little-endian float buffers; indices is a sequence of ints.
+	Returns (positions, normals, uvs, smooth_normals, indices, report).
+	"""
+	import numpy as np
+
+	positions = np.frombuffer(positions, dtype="<f4").reshape(-1, 3)
+	vertex_count = len(positions)
+	normals = np.frombuffer(normals, dtype="<f4").reshape(-1, 3) if normals else None
+	uvs = np.frombuffer(uvs, dtype="<f4").reshape(-1, 2) if uvs else None
+	indices = np.asarray(indices, dtype=np.int64)
+
+	# Drop degenerate triangles (and a trailing partial one) left by the exporter
+	triangles = indices[:len(indices) // 3 * 3].reshape(-1, 3)
+	triangles = triangles[(triangles[:, 0] != triangles[:, 1]) & (triangles[:, 1] != triangles[:, 2]) & (triangles[:, 0] != triangles[:, 2])]
+
+	acmr_before = vertex_cache_miss_ratio(indices)
+
+	# Weld: vertices whose attributes are identical bit for bit become one
+	vertices = np.hstack([a for a in (positions, normals, uvs) if a is not None]).astype("<f4")
+	rows = np.ascontiguousarray(vertices).view(np.dtype((np.void, vertices.shape[1] * 4))).ravel()
+	_, first, remap = np.unique(rows, return_index=True, return_inverse=True)
+	vertices = vertices[first]
+	triangles = remap.reshape(-1)[triangles]
+
+	triangles = optimize_vertex_cache(triangles, len(vertices))
+
+	# Vertex fetch: number the vertices in the order the triangles first use them,
+	# which also drops vertices no triangle uses
+	flat = triangles.ravel()
+	used, first_use = np.unique(flat, return_index=True)
+	order = used[np.argsort(first_use)]
+	new_index = np.full(len(vertices), -1, dtype=np.int64)
+	new_index[order] = np.arange(len(order))
+	vertices = vertices[order]
+	flat = new_index[flat]
+
+	positions = vertices[:, 0:3]
+	columns = 3
+	optimized_normals = b""
+	optimized_uvs = b""
+	smooth_normals = b""
+
+	if normals is not None:
+		normals = vertices[:, columns:columns + 3]
+		columns += 3
+		optimized_normals = np.ascontiguousarray(normals).tobytes()
+		smooth_normals = compute_smooth_normals(positions, normals).tobytes()
+
+	if uvs is not None:
+		optimized_uvs = np.ascontiguousarray(vertices[:, columns:columns + 2]).tobytes()
+
+	report = {
+		"vertices_before": vertex_count,
+		"acmr_before": acmr_before,
+		"acmr_after": vertex_cache_miss_ratio(flat),
+	}
+
+	return np.ascontiguousarray(positions).tobytes(), optimized_normals, optimized_uvs, smooth_normals, flat.tolist(), report
+
+def compute_smooth_normals(positions, normals):
+	"""Normals averaged over all vertices sharing a (quantized) position, normalized. Used to extrude outlines without gaps."""
+	import numpy as np
+
+	keys = np.trunc(positions / np.float32(SMOOTH_NORMAL_EPSILON)).astype(np.int64)
+	_, group = np.unique(keys, axis=0, return_inverse=True)
+	group = group.reshape(-1)
+
+	sums = np.zeros((group.max() + 1, 3), dtype=np.float64)
+	np.add.at(sums, group, normals)
+	lengths = np.linalg.norm(sums, axis=1, keepdims=True)
+	sums = np.divide(sums, lengths, out=np.zeros_like(sums), where=lengths > 0)
+
+	return sums[group].astype("<f4")
+
+def optimize_vertex_cache(triangles, vertex_count, cache_size=VERTEX_CACHE_SIZE):
+	"""
+	Reorders triangles for the post-transform vertex cache with Tipsify
+	(Sander, Nehab, Barczak: "Fast Triangle Reordering for Vertex Locality
+	and Reduced Overdraw"). Takes and returns an (n, 3) array.
+	"""
+	import numpy as np
+
+	if len(triangles) == 0:
+		return triangles
+
+	# Triangles around each vertex, as offsets into one flat array
+	flat = triangles.ravel()
+	order = np.argsort(flat, kind="stable")
+	adjacency = (order // 3).tolist()
+	starts = np.concatenate([[0], np.cumsum(np.bincount(flat, minlength=vertex_count))]).tolist()
+
+	tris = triangles.tolist()
+	live = np.bincount(flat, minlength=vertex_count).tolist()
+	cache_time = [-cache_size - 1] * vertex_count
+	emitted = [False] * len(tris)
+	dead_end = []
+	output = []
+	time = 0
+	cursor = 0
+	fanning = 0
+
+	while fanning >= 0:
+		candidates = []
+
+		for t in adjacency[starts[fanning]:starts[fanning + 1]]:
+			if emitted[t]:
+				continue
+
+			emitted[t] = True
+			output.append(t)
+
+			for v in tris[t]:
+				dead_end.append(v)
+				candidates.append(v)
+				live[v] -= 1
+
+				if time - cache_time[v] > cache_size:
+					cache_time[v] = time
+					time += 1
+
+		# Next fanning vertex: the one still in cache that was used longest ago,
+		# unless fanning around it would push its own triangles out of the cache
+		fanning = -1
+		best = -1
+
+		for v in candidates:
+			if live[v] <= 0:
+				continue
+
+			priority = 0
+			age = time - cache_time[v]
+
+			if age + 2 * live[v] <= cache_size:
+				priority = age
+
+			if priority > best:
+				best = priority
+				fanning = v
+
+		if fanning < 0:
+			while dead_end:
+				v = dead_end.pop()
+
+				if live[v] > 0:
+					fanning = v
+					break
+
+		if fanning < 0:
+			while cursor < vertex_count and live[cursor] <= 0:
+				cursor += 1
+
+			if cursor < vertex_count:
+				fanning = cursor
+
+	return triangles[np.asarray(output, dtype=np.int64)]
+
+def vertex_cache_miss_ratio(indices, cache_size=VERTEX_CACHE_SIZE):
+	"""ACMR: vertex shader runs per triangle with a FIFO post-transform cache, 0.5 is ideal and 3 is no reuse at all"""
+	from collections import deque
+
+	indices = list(indices)
+	triangle_count = len(indices) // 3
+
+	if triangle_count == 0:
+		return 0.0
+
+	cache = deque()
+	cached = set()
+	misses = 0
+
+	for v in indices[:triangle_count * 3]:
+		if v in cached:
+			continue
+
+		misses += 1
+		cache.append(v)
+		cached.add(v)
+
+		if len(cache) > cache_size:
+			cached.discard(cache.popleft())
+
+	return misses / triangle_count
@@ -0,0 +1,230 @@
+"""
+Release builds, and -capture, which runs a build under RenderDoc.
+"""
+
+import os
+import shutil
+import subprocess
+import time
+import glob
+
+from . import common, tasks, assets
+from .common import (
+	IS_WINDOWS, IS_OSX, traced, build_entry_point, clean_dir_except, executable_extension, make_dirs,
+	make_executable)
+from .common import locked_print as print
+
+def run_with_renderdoc_capture(exe_path):
+	"""Build and run the game with RenderDoc capture (Windows only)"""
+	captures_dir = "captures"
+	if not os.path.exists(captures_dir):
+		make_dirs(captures_dir)
+	
+	# Handle macOS app bundle case (extract actual executable path)
+	actual_exe_path = exe_path
+	if IS_OSX and exe_path.endswith('.app'):
+		# For app bundles, the actual executable is inside Contents/MacOS/
+		app_name_base = common.args.app_name if common.args.app_name else "ToyGame"
+		actual_exe_path = os.path.join(exe_path, "Contents", "MacOS", app_name_base)
+		if not os.path.exists(actual_exe_path):
+			print(f"Error: Could not find executable inside app bundle: {actual_exe_path}")
+			return
+	
+	# Launch the game and get its PID
+	print(f"Launching {actual_exe_path}...")
+	game_dir = os.path.dirname(actual_exe_path)
+	
+	# Use CREATE_NEW_CONSOLE to ensure the game gets its own window
+	creation_flags = 0
+	if IS_WINDOWS:
+		# CREATE_NEW_CONSOLE = 0x00000010
+		creation_flags = 0x00000010
+
+	try:
+		game_process = subprocess.Popen([actual_exe_path], cwd=game_dir, creationflags=creation_flags)
+	except Exception as e:
+		print(f"Failed to launch game: {e}")
+		return
+	
+	# Inject RenderDoc as quickly as possible - minimal delay
+	print(f"Game launched with PID {game_process.pid}")
+	time.sleep(0.1)  # Just 100ms to ensure process has started
+	
+	# Inject RenderDoc immediately
+	renderdoc_cmd = r"C:\Program Files\RenderDoc\renderdoccmd.exe"
+	if not os.path.exists(renderdoc_cmd):
+		print("RenderDoc not found at expected location: " + renderdoc_cmd)
+		print("Please install RenderDoc or update the path in the script.")
+		game_process.terminate()
+		return
+	
+	# Use absolute path for capture file
+	capture_file = os.path.abspath(os.path.join(captures_dir, "ToyGame.rdc"))
+	print(f"Injecting RenderDoc into process ID {game_process.pid}...")
+	
+	# Use subprocess without shell=True to avoid issues with spaces in paths
+	inject_cmd = [renderdoc_cmd, "inject", "--PID", str(game_process.pid), "--capture-file", capture_file]
+	result = subprocess.run(inject_cmd, capture_output=True, text=True)
+	
+	# Check the output to determine if injection was successful
+	if result.stdout and "Injecting into PID" in result.stdout:
+		print("RenderDoc injection successful")
+		if "Launched as ID" in result.stdout:
+			# This is actually a success message from RenderDoc
+			print(result.stdout.strip())
+	else:
+		print(f"RenderDoc injection may have failed")
+		if result.stderr:
+			print(f"Error: {result.stderr}")
+		if result.stdout:
+			print(f"Output: {result.stdout}")
+		
+		# Check if the game is still running after injection attempt
+		if game_process.poll() is not None:
+			print("Game exited after injection attempt.")
+			return
+
+	# Wait for game to exit
+	print("Waiting for game to exit...")
+	game_process.wait()
+	
+	# Find the latest .rdc file
+	print("Done. Capture(s) saved to captures folder.")
+	print("Opening latest capture in RenderDoc...")
+	rdc_files = glob.glob(os.path.join(captures_dir, "*.rdc"))
+	
+	if rdc_files:
+		latest_rdc = max(rdc_files, key=os.path.getmtime)
+		qrenderdoc = r"C:\Program Files\RenderDoc\qrenderdoc.exe"
+		if os.path.exists(qrenderdoc):
+			subprocess.Popen([qrenderdoc, latest_rdc])
+		else:
+			print("RenderDoc UI not found at: " + qrenderdoc)
+	else:
+		print("No .rdc files found in captures folder.")
+
+@build_entry_point
+@traced
+def build_release():
+	"""Clean optimized build in build/release. Returns the executable's path (the .app bundle on macOS)."""
+	graph = tasks.new_build_graph(check_asset_budgets=True)
+	out_dir = "build/release"
+
+	if IS_OSX:
+		app_name_base = common.args.app_name if common.args.app_name else "ToyGame"
+		assets_dest = os.path.join(out_dir, f"{app_name_base}.app", "Contents", "MacOS", "assets")
+	else:
+		assets_dest = out_dir + "/assets"
+
+	# Everything except the assets is wiped. The assets are synced (or
+	# packed) incrementally below, which gives the same result as a clean copy.
+	if os.path.exists(out_dir):
+		clean_dir_except(out_dir, [assets_dest, os.path.join(os.path.dirname(assets_dest), assets.ASSET_PACK_NAME)])
+
+	make_dirs(out_dir)
+
+	# On macOS, create a .app bundle
+	if IS_OSX:
+		app_name_base = common.args.app_name if common.args.app_name else "ToyGame"
+		app_name = f"{app_name_base}.app"
+		app_bundle_path = os.path.join(out_dir, app_name)
+		contents_path = os.path.join(app_bundle_path, "Contents")
+		macos_path = os.path.join(contents_path, "MacOS")
+		resources_path = os.path.join(contents_path, "Resources")
+		
+		# Create the .app bundle directory structure
+		make_dirs(macos_path)
+		make_dirs(resources_path)
+		
+		# Build the executable (without .bin extension for app bundle)
+		exe = os.path.join(macos_path, app_name_base)
+	else:
+		exe = out_dir + "/game_release" + executable_extension()
+
+	print("Building " + exe + "...")
+
+	extra_args = ""
+
+	if not common.args.debug:
+		extra_args += " -no-bounds-check -o:speed"
+
+		if IS_WINDOWS:
+			extra_args += " -subsystem:windows"
+	else:
+		extra_args += " -debug"
+
+	if common.args.gl:
+		extra_args += " -define:SOKOL_USE_GL=true"
+
+	def build_exe():
+		tasks.execute("odin build source/lib/main_release -out:%s -strict-style -vet %s" % (exe, extra_args))
+
+		# Make executable on Unix-like systems
+		make_executable(exe)
+
+	graph.add("exe", build_exe, inputs=["source"], outputs=[exe])
+
+	# Copy assets to MacOS folder alongside the executable (not Resources)
+	# This way the executable can find them with relative paths
+	if os.path.exists(assets.ASSETS_DIR):
+		graph.add("assets", lambda: ship_release_assets(assets_dest), inputs=assets.asset_source_dirs(), outputs=[assets_dest])
+
+	graph.run()
+	
+	if IS_OSX:
+		# Create Info.plist for the macOS app bundle
+		info_plist_path = os.path.join(contents_path, "Info.plist")
+		bundle_identifier = f"com.{app_name_base.lower()}.app"
+		info_plist_content = f'''<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE plist PUBLIC "-//Apple//DTD PLIST 1.0//EN" "http://www.apple.com/DTDs/PropertyList-1.0.dtd">
+<plist version="1.0">
+<dict>
+	<key>CFBundleDevelopmentRegion</key>
+	<string>en</string>
+	<key>CFBundleExecutable</key>
+	<string>{app_name_base}</string>
+	<key>CFBundleIdentifier</key>
+	<string>{bundle_identifier}</string>
+	<key>CFBundleInfoDictionaryVersion</key>
+	<string>6.0</string>
+	<key>CFBundleName</key>
+	<string>{app_name_base}</string>
+	<key>CFBundlePackageType</key>
+	<string>APPL</string>
+	<key>CFBundleShortVersionString</key>
+	<string>1.0</string>
+	<key>CFBundleVersion</key>
+	<string>1</string>
+	<key>LSMinimumSystemVersion</key>
+	<string>10.15</string>
+	<key>NSHighResolutionCapable</key>
+	<true/>
+	<key>NSSupportsAutomaticGraphicsSwitching</key>
+	<true/>
+</dict>
+</plist>'''
+		
+		with open(info_plist_path, 'w') as f:
+			f.write(info_plist_content)
+		
+		print(f"Created macOS app bundle: {app_bundle_path}")
+		return app_bundle_path
+	else:
+		return exe
+
+def ship_release_assets(assets_dest):
+	"""Syncs the assets next to the release executable, or packs them into one file with -pack-assets"""
+	pack_path = os.path.join(os.path.dirname(assets_dest), assets.ASSET_PACK_NAME)
+
+	if not common.args.pack_assets:
+		if os.path.exists(pack_path):
+			os.remove(pack_path)
+
+		assets.sync_assets(assets.asset_source_dirs(), assets_dest, skip_replaced_glbs=True)
+		return
+
+	if os.path.exists(assets_dest):
+		shutil.rmtree(assets_dest)
+
+	assets.write_asset_pack(assets.asset_source_dirs(), pack_path, common.args.pack_alignment)
+	assets.verify_asset_pack(pack_path, assets.asset_source_dirs())
@@ -0,0 +1,1299 @@
+"""
+Shader builds: #import preprocessing with the persisted import graph,
+sokol-shdc jobs and their cache, feature variants and minification for
+web builds.
+"""
+
+import os
+import re
+import hashlib
+
+from . import common, tasks
+from .common import (
+	Build_Error, IS_WINDOWS, IS_OSX, IS_LINUX, traced, build_entry_point, file_digest,
+	write_if_changed, format_bytes, make_dirs)
+from .common import locked_print as print
+
+def preprocess_shader(shader_path, processed_files=None, include_stack=None, include_guards=None):
+	"""
+	Preprocesses a GLSL shader file by resolving #import statements
+	
+	Features:
+	- Circular dependency detection
+	- Include guards (#pragma once or #ifndef style)
+	- Relative path resolution
+	- Clear error messages with include stack trace
+
+	Files are parsed through SHADER_GRAPH, so a file imported by several
+	programs is only read and scanned once per run.
+	"""
+	if processed_files is None:
+		processed_files = set()  # Paths that have already been imported
+	if include_stack is None:
+		include_stack = []
+	if include_guards is None:
+		include_guards = set()
+	
+	# Normalize the path
+	shader_path = os.path.normpath(shader_path)
+	
+	# Check for circular imports
+	if shader_path in include_stack:
+		error_msg = f"Circular import detected:\n"
+		for i, path in enumerate(include_stack):
+			error_msg += f"  {'  ' * i}-> {path}\n"
+		error_msg += f"  {'  ' * len(include_stack)}-> {shader_path} (circular reference)"
+		raise Exception(error_msg)
+	
+	# Add to include stack
+	include_stack.append(shader_path)
+	
+	try:
+		# Fetch the parsed shader file
+		source = SHADER_GRAPH.source(shader_path)
+		
+		# Check if this file uses include guards
+		lines = source.lines
+		output_lines = []
+		
+		# Track if we should process this file (for include guards)
+		should_process = True
+		guard_name = None
+		uses_pragma_once = False
+		
+		# Check for #pragma once at the beginning of the file
+		for line in lines:
+			stripped = line.strip()
+			if not stripped or stripped.startswith('//'):
+				continue
+			if stripped == '#pragma once':
+				uses_pragma_once = True
+				guard_name = shader_path  # Use file path as unique identifier
+				if guard_name in include_guards:
+					should_process = False
+				else:
+					include_guards.add(guard_name)
+			break
+		
+		if not should_process:
+			include_stack.pop()
+			return f"// File already included: {os.path.basename(shader_path)}\n"
+		
+		# Process the file line by line
+		i = 0
+		while i < len(lines):
+			line = lines[i]
+			stripped = line.strip()
+			
+			# Handle #import statements (already resolved when the file was parsed)
+			if i in source.imports:
+				import_path, resolved_path = source.imports[i]
+				
+				# Check if file has already been processed
+				if resolved_path in processed_files:
+					output_lines.append(f"// Already imported: {import_path}\n")
+				else:
+					# Add import comment
+					output_lines.append(f"\n// BEGIN IMPORT: {import_path} (from {os.path.basename(shader_path)})\n")
+					
+					# Recursively process the imported file
+					try:
+						imported_content = preprocess_shader(resolved_path, processed_files, include_stack.copy(), include_guards)
+						output_lines.append(imported_content)
+						processed_files.add(resolved_path)
+						
+					except Exception as e:
+						# Re-raise with context
+						raise Exception(f"Error importing '{import_path}' from {shader_path}:\n{str(e)}")
+					
+					output_lines.append(f"// END IMPORT: {import_path}\n\n")
+			
+			# Handle traditional include guards (#ifndef, #define, #endif)
+			elif stripped.startswith('#ifndef') and i + 1 < len(lines):
+				# Check if this is an include guard pattern
+				guard_match = re.match(r'#ifndef\s+(\w+)', stripped)
+				if guard_match:
+					potential_guard = guard_match.group(1)
+					next_line = lines[i + 1].strip()
+					if next_line == f'#define {potential_guard}':
+						# This looks like an include guard
+						if potential_guard in include_guards:
+							# Skip to the matching #endif
+							endif_count = 1
+							j = i + 2
+							while j < len(lines) and endif_count > 0:
+								if lines[j].strip().startswith('#if'):
+									endif_count += 1
+								elif lines[j].strip().startswith('#endif'):
+									endif_count -= 1
+								j += 1
+							include_stack.pop()
+							return f"// File already included (guard: {potential_guard})\n"
+						else:
+							include_guards.add(potential_guard)
+							output_lines.append(line)
+					else:
+						output_lines.append(line)
+				else:
+					output_lines.append(line)
+			
+			else:
+				# Regular line, just append
+				output_lines.append(line)
+			
+			i += 1
+		
+		result = ''.join(output_lines)
+		
+		# Remove from include stack
+		include_stack.pop()
+		
+		return result
+		
+	except Exception as e:
+		# Remove from include stack before re-raising
+		if include_stack and include_stack[-1] == shader_path:
+			include_stack.pop()
+		raise
+
+# A program file can declare feature permutations of one of its programs:
+#
+#   @variants texcube SHADOWS POINT_LIGHT DIR_LIGHT PCF_SAMPLES=15,8,4
+#
+# SHADOWS is on or off, PCF_SAMPLES one of the listed integers. The file is
+# compiled as written with the defaults (features on, first value), and
+# every other permutation becomes a program of its own, named after what it
+# turns off or changes (texcube_no_shadows, texcube_pcf_samples_8, ...).
+# #if/#ifdef on feature names are resolved before shdc sees the code, so
+# what a variant turns off is never compiled, and permutations that resolve
+# to the same code share one program.
+SHADER_VARIANTS_RE = re.compile(r'^\s*@variants\s+(\w+)(.*)$')
+SHADER_FEATURE_RE = re.compile(r'^([A-Z_][A-Z0-9_]*)(?:=(-?\d+(?:,-?\d+)*))?$')
+SHADER_CONDITIONAL_RE = re.compile(r'^\s*#\s*(if|ifdef|ifndef|elif|else|endif)\b(.*)$')
+SHADER_SNIPPET_RE = re.compile(r'^@(vs|fs|cs|block)\s+(\w+)')
+SHADER_PROGRAM_RE = re.compile(r'^\s*@program\s+(\w+)\s+(.*)$')
+
+class Shader_Feature:
+	def __init__(self, name, values):
+		self.name = name
+		self.values = values  # [True, False] for features that are on or off, the integers to pick from otherwise
+
+class Shader_Expansion:
+	"""
+	The shdc inputs ("units") a program file is compiled as, plus the Odin
+	procs that select between its variants. The unit "" is the file itself
+	with the default feature values, there is one more per variant program.
+	"""
+	def __init__(self, units, selectors, sources=None):
+		self.units = units
+		self.selectors = selectors
+		self.sources = sources  # unit -> shdc input, None when loaded from the cache
+
+	@staticmethod
+	def cache_path(preprocessed_digest):
+		return os.path.join(SHADER_CACHE_DIR, preprocessed_digest + ".variants.json")
+
+	@staticmethod
+	def load(preprocessed_digest):
+		"""The expansion of a preprocessed file with this digest from an earlier build, or None"""
+		import json
+
+		path = Shader_Expansion.cache_path(preprocessed_digest)
+
+		if not os.path.exists(path):
+			return None
+
+		with open(path, 'r', encoding='utf-8') as f:
+			data = json.load(f)
+
+		return Shader_Expansion(data["units"], data["selectors"])
+
+	def save(self, preprocessed_digest):
+		import json
+
+		write_if_changed(Shader_Expansion.cache_path(preprocessed_digest), json.dumps({"units": self.units, "selectors": self.selectors}, indent=1).encode())
+
+def parse_shader_variants(text, path):
+	"""Returns text without its @variants lines and {program: [Shader_Feature, ...]}"""
+	variants = {}
+	names = set()
+	lines = []
+
+	for line in text.splitlines(keepends=True):
+		m = SHADER_VARIANTS_RE.match(line)
+
+		if m is None:
+			lines.append(line)
+			continue
+
+		program = m.group(1)
+		features = []
+
+		for decl in m.group(2).split("//")[0].split():
+			feature_match = SHADER_FEATURE_RE.match(decl)
+
+			if feature_match is None:
+				raise Build_Error(f"{path}: invalid @variants feature '{decl}', expected NAME or NAME=<int>,<int>,...")
+
+			name = feature_match.group(1)
+
+			if name in names:
+				raise Build_Error(f"{path}: shader feature {name} is declared twice")
+
+			names.add(name)
+			values = [int(v) for v in feature_match.group(2).split(",")] if feature_match.group(2) else [True, False]
+			features.append(Shader_Feature(name, values))
+
+		if not features:
+			raise Build_Error(f"{path}: @variants {program} declares no features")
+
+		if program in variants:
+			raise Build_Error(f"{path}: more than one @variants line for program '{program}'")
+
+		variants[program] = features
+
+	return ''.join(lines), variants
+
+# Tokens of #if expressions: integer literals, identifiers and C operators
+SHADER_CONDITION_TOKEN_RE = re.compile(r'\s*(?:(0[xX][0-9a-fA-F]+|\d+)[uUlL]*|([A-Za-z_]\w*)|(&&|\|\||==|!=|<=|>=|<<|>>|[-+*/%<>!~&|^()?:]))')
+
+# Binary operators of #if by C precedence, loosest first
+SHADER_CONDITION_BINARY_OPS = [("||",), ("&&",), ("|",), ("^",), ("&",), ("==", "!="), ("<", ">", "<=", ">="), ("<<", ">>"), ("+", "-"), ("*", "/", "%")]
+
+class Shader_Condition_Parser:
+	"""
+	Recursive descent evaluator for the integer expressions of #if, with the
+	C preprocessor's operators and precedence. Identifiers are shader
+	feature values. Raises ValueError for anything it can't evaluate:
+	syntax it doesn't know, other macros and division by zero.
+	"""
+	def __init__(self, expr, values):
+		self.values = values
+		self.tokens = []
+		pos = 0
+		expr = expr.rstrip()
+
+		while pos < len(expr):
+			m = SHADER_CONDITION_TOKEN_RE.match(expr, pos)
+
+			if m is None:
+				raise ValueError(expr[pos:])
+
+			if m.group(1) is not None:
+				literal = m.group(1)
+				base = 16 if literal[:2] in ("0x", "0X") else 8 if literal.startswith("0") else 10
+				self.tokens.append(("int", int(literal, base)))
+			elif m.group(2) is not None:
+				self.tokens.append(("name", m.group(2)))
+			else:
+				self.tokens.append(("op", m.group(3)))
+
+			pos = m.end()
+
+		self.pos = 0
+
+	def parse(self):
+		value = self.conditional()
+
+		if self.pos != len(self.tokens):
+			raise ValueError(self.tokens[self.pos][1])
+
+		return value
+
+	def peek_op(self):
+		if self.pos < len(self.tokens) and self.tokens[self.pos][0] == "op":
+			return self.tokens[self.pos][1]
+
+		return None
+
+	def take(self):
+		if self.pos == len(self.tokens):
+			raise ValueError("unexpected end")
+
+		self.pos += 1
+		return self.tokens[self.pos - 1]
+
+	def expect(self, op):
+		if self.take() != ("op", op):
+			raise ValueError("expected " + op)
+
+	def conditional(self):
+		condition = self.binary(0)
+
+		if self.peek_op() != "?":
+			return condition
+
+		self.take()
+		a = self.conditional()
+		self.expect(":")
+		b = self.conditional()
+		return a if condition else b
+
+	def binary(self, level):
+		if level == len(SHADER_CONDITION_BINARY_OPS):
+			return self.unary()
+
+		value = self.binary(level + 1)
+
+		while self.peek_op() in SHADER_CONDITION_BINARY_OPS[level]:
+			op = self.take()[1]
+			value = apply_shader_condition_op(op, value, self.binary(level + 1))
+
+		return value
+
+	def unary(self):
+		op = self.peek_op()
+
+		if op in ("!", "-", "+", "~"):
+			self.take()
+			value = self.unary()
+			return {"!": lambda v: int(not v), "-": lambda v: -v, "+": lambda v: v, "~": lambda v: ~v}[op](value)
+
+		return self.primary()
+
+	def primary(self):
+		kind, token = self.take()
+
+		if kind == "int":
+			return token
+
+		if kind == "op":
+			if token != "(":
+				raise ValueError(token)
+
+			value = self.conditional()
+			self.expect(")")
+			return value
+
+		if token == "defined":
+			parens = self.peek_op() == "("
+
+			if parens:
+				self.take()
+
+			kind, name = self.take()
+
+			if kind != "name" or name not in self.values:
+				raise ValueError(name)
+
+			if parens:
+				self.expect(")")
+
+			return int(self.values[name] is not False)
+
+		if token not in self.values:
+			raise ValueError(token)
+
+		# A feature that is off isn't defined, which #if reads as 0
+		return int(self.values[token])
+
+def apply_shader_condition_op(op, a, b):
+	if op in ("/", "%"):
+		if b == 0:
+			raise ValueError("division by zero")
+
+		# C division truncates toward zero
+		q = abs(a) // abs(b) * (1 if (a < 0) == (b < 0) else -1)
+		return q if op == "/" else a - q * b
+
+	return {
+		"||": lambda: int(bool(a or b)), "&&": lambda: int(bool(a and b)),
+		"|": lambda: a | b, "^": lambda: a ^ b, "&": lambda: a & b,
+		"==": lambda: int(a == b), "!=": lambda: int(a != b),
+		"<": lambda: int(a < b), ">": lambda: int(a > b), "<=": lambda: int(a <= b), ">=": lambda: int(a >= b),
+		"<<": lambda: a << b, ">>": lambda: a >> b,
+		"+": lambda: a + b, "-": lambda: a - b, "*": lambda: a * b,
+	}[op]()
+
+def eval_shader_condition(directive, expr, values):
+	"""
+	Value of an #if/#ifdef/#ifndef condition, or None if it depends on more
+	than shader features or can't be evaluated here. Those are passed
+	through, so shdc's preprocessor decides them.
+	"""
+	if directive != "if":
+		if expr not in values:
+			return None
+
+		return (values[expr] is not False) == (directive == "ifdef")
+
+	try:
+		return bool(Shader_Condition_Parser(expr, values).parse())
+	except ValueError:
+		return None
+
+def resolve_shader_features(text, values):
+	"""
+	Resolves the #if/#ifdef/#ifndef/#elif/#else/#endif on shader features
+	for one set of feature values. Conditionals on other macros (e.g.
+	SOKOL_GLSL) are passed through to shdc.
+	"""
+	output_lines = []
+	stack = []  # [resolved, active, taken] per open conditional
+
+	for line in text.splitlines(keepends=True):
+		m = SHADER_CONDITIONAL_RE.match(line)
+		emitting = all(frame[1] for frame in stack)
+
+		if m is None:
+			if emitting:
+				output_lines.append(line)
+			continue
+
+		directive, expr = m.group(1), m.group(2).split("//")[0].strip()
+
+		if directive in ("if", "ifdef", "ifndef"):
+			result = eval_shader_condition(directive, expr, values)
+
+			if result is None:
+				stack.append([False, True, True])
+				if emitting:
+					output_lines.append(line)
+			else:
+				stack.append([True, result, result])
+		elif not stack:
+			raise Build_Error(f"#{directive} without #if in shader source")
+		elif not stack[-1][0]:
+			if emitting:
+				output_lines.append(line)
+			if directive == "endif":
+				stack.pop()
+		elif directive == "elif":
+			frame = stack[-1]
+
+			if frame[2]:
+				frame[1] = False
+			else:
+				result = eval_shader_condition("if", expr, values)
+
+				if result is None:
+					raise Build_Error(f"#elif {expr} can't be resolved for shader features alone, use a nested #if")
+
+				frame[1] = frame[2] = result
+		elif directive == "else":
+			stack[-1][1] = not stack[-1][2]
+			stack[-1][2] = True
+		else:
+			stack.pop()
+
+	if stack:
+		raise Build_Error("Unterminated #if in shader source")
+
+	return ''.join(output_lines)
+
+def split_shader_snippets(text):
+	"""Splits shdc source into (kind, name, lines) segments: @vs/@fs/@cs/@block ... @end snippets, kind None between them"""
+	segments = []
+	snippet = None
+
+	for line in text.splitlines(keepends=True):
+		if snippet is not None:
+			snippet[2].append(line)
+			if line.strip() == "@end":
+				snippet = None
+			continue
+
+		m = SHADER_SNIPPET_RE.match(line.strip())
+
+		if m is not None:
+			snippet = (m.group(1), m.group(2), [line])
+			segments.append(snippet)
+		else:
+			if not segments or segments[-1][0] is not None:
+				segments.append((None, None, []))
+			segments[-1][2].append(line)
+
+	return segments
+
+def add_feature_defines(lines, values):
+	"""#defines the features a snippet still refers to after resolving, right after its @ tags"""
+	body = ''.join(lines[1:])
+	defines = ["#define %s %d\n" % (name, value) for name, value in values.items() if value is not False and re.search(r'\b%s\b' % name, body)]
+	i = 1
+
+	while i < len(lines) and lines[i].lstrip().startswith("@") and lines[i].strip() != "@end":
+		i += 1
+
+	return lines[:i] + defines + lines[i:]
+
+def expand_shader_variants(text, path):
+	"""Splits a preprocessed program file into the units of its Shader_Expansion"""
+	text, variants = parse_shader_variants(text, path)
+
+	if not variants:
+		return Shader_Expansion([""], "", {"": text})
+
+	import itertools
+
+	defaults = {f.name: f.values[0] for features in variants.values() for f in features}
+
+	def resolve(values):
+		return [(kind, name, add_feature_defines(lines, values) if kind not in (None, "block") else lines)
+			for kind, name, lines in split_shader_snippets(resolve_shader_features(text, values))]
+
+	base = resolve(defaults)
+	sources = {"": ''.join(''.join(lines) for _, _, lines in base)}
+	programs = {}
+	snippet_names = {}  # (snippet, resolved code) -> name of the snippet compiled with that code
+
+	for kind, name, lines in base:
+		if kind is None:
+			for line in lines:
+				m = SHADER_PROGRAM_RE.match(line)
+				if m is not None:
+					programs[m.group(1)] = m.group(2).split("//")[0].split()
+		elif kind != "block":
+			snippet_names[(name, ''.join(lines[1:]))] = name
+
+	selectors = []
+
+	for program, features in variants.items():
+		if program not in programs:
+			raise Build_Error(f"{path}: @variants names unknown program '{program}'")
+
+		snippets = programs[program]
+		seen = {}
+		permutations = []
+
+		for combo in itertools.product(*[f.values for f in features]):
+			values = dict(defaults)
+			values.update((f.name, v) for f, v in zip(features, combo))
+			segments = resolve(values)
+			code = {name: ''.join(lines[1:]) for kind, name, lines in segments if kind not in (None, "block")}
+			key = tuple(code.get(s) for s in snippets)
+			target = seen.get(key)
+
+			if target is None:
+				target = program + ''.join(
+					("_no_" + f.name.lower()) if v is False else ("_%s_%d" % (f.name.lower(), v))
+					for f, v in zip(features, combo) if v != f.values[0])
+				seen[key] = target
+
+				if target != program:
+					sources[target] = shader_variant_source(segments, snippets, target, target[len(program):], snippet_names)
+
+			permutations.append((combo, target))
+
+		selectors.append(shader_variant_selector(program, features, permutations))
+
+	return Shader_Expansion(list(sources), ''.join(selectors), sources)
+
+def shader_variant_source(segments, snippets, program, suffix, snippet_names):
+	"""shdc input with just one variant program. Snippets whose code differs from every earlier variant get suffix added to their name."""
+	lines = []
+	renamed = {}
+
+	for kind, name, segment_lines in segments:
+		if kind is None:
+			lines += [line for line in segment_lines if SHADER_PROGRAM_RE.match(line) is None]
+		elif kind == "block":
+			lines += segment_lines
+		elif name in snippets:
+			new_name = snippet_names.setdefault((name, ''.join(segment_lines[1:])), name + suffix)
+			renamed[name] = new_name
+			lines.append(re.sub(r'^(\s*@\w+\s+)\w+', lambda m: m.group(1) + new_name, segment_lines[0], count=1))
+			lines += segment_lines[1:]
+
+	if lines and not lines[-1].endswith("\n"):
+		lines.append("\n")
+
+	lines.append("@program %s %s\n" % (program, " ".join(renamed.get(s, s) for s in snippets)))
+	return ''.join(lines)
+
+def shader_variant_selector(program, features, permutations):
+	"""Odin proc that returns the shader desc of the variant for a set of feature values"""
+	def value(v):
+		return ("true" if v else "false") if isinstance(v, bool) else str(v)
+
+	params = ", ".join("%s := %s" % (f.name.lower(), value(f.values[0])) for f in features)
+	lines = [
+		"// Shader desc of the '%s' variant for these features (see @variants).\n" % program,
+		"// Values that aren't listed there get the default variant.\n",
+		"%s_variant_shader_desc :: proc (backend: sg.Backend, %s) -> sg.Shader_Desc {\n" % (program, params),
+	]
+
+	for combo, target in permutations:
+		if target == program:
+			continue
+
+		condition = " && ".join(
+			(f.name.lower() if v else "!" + f.name.lower()) if isinstance(v, bool) else "%s == %d" % (f.name.lower(), v)
+			for f, v in zip(features, combo))
+		lines.append("    if %s { return %s_shader_desc(backend) }\n" % (condition, target))
+
+	lines.append("    return %s_shader_desc(backend)\n" % program)
+	lines.append("}\n")
+	return ''.join(lines)
+
+def parse_generated_odin(text):
+	"""Top-level declarations of sokol-shdc's Odin output: (name, declaration, declaration with its comments)"""
+	items = []
+	pending = []
+	lines = text.splitlines(keepends=True)
+	i = 0
+
+	while i < len(lines):
+		line = lines[i]
+
+		if line.startswith("/*"):
+			j = i
+			while j < len(lines) - 1 and not lines[j].rstrip().endswith("*/"):
+				j += 1
+			pending += lines[i:j + 1]
+			i = j + 1
+			continue
+
+		if line.startswith("@(") or line.startswith("//"):
+			pending.append(line)
+			i += 1
+			continue
+
+		m = re.match(r'(\w+)\s*:[:=]', line)
+
+		if m is None:
+			# package and import lines
+			pending = []
+			i += 1
+			continue
+
+		j = i
+		if line.rstrip().endswith("{"):
+			while j < len(lines) - 1 and lines[j].rstrip() != "}":
+				j += 1
+
+		declaration = ''.join(lines[i:j + 1])
+		attributes = ''.join(l for l in pending if l.startswith("@("))
+		items.append((m.group(1), attributes + declaration, ''.join(pending) + declaration))
+		pending = []
+		i = j + 1
+
+	return items
+
+def merge_generated_shader(base, variants, selectors):
+	"""
+	Adds the sokol-shdc output of a file's variant units to the output of
+	its base unit. Declarations they share (uniform block structs, bind
+	slots, snippets a variant didn't change) must be identical and are
+	only kept once. selectors goes at the end.
+	"""
+	declared = {name: declaration for name, declaration, _ in parse_generated_odin(base)}
+	parts = [base if base.endswith("\n") else base + "\n"]
+
+	for unit, text in variants:
+		for name, declaration, full in parse_generated_odin(text):
+			if name not in declared:
+				declared[name] = declaration
+				parts.append(full)
+			elif declared[name] != declaration:
+				raise Build_Error(f"Shader variant {unit} generates a different {name} than the other variants. Uniform blocks must be the same in every variant.")
+
+	parts.append(selectors)
+	return ''.join(parts)
+
+def strip_shader_comments(code):
+	"""Removes // and /* */ comments and blank lines, and trims whitespace on every line. shdc's @ tag lines are kept as they are."""
+	code = re.sub(r'^[ \t]*@[^\n]*|/\*.*?\*/|//[^\n]*',
+		lambda m: m.group(0) if m.group(0).lstrip().startswith("@") else ("\n" * m.group(0).count("\n") or " "), code, flags=re.M | re.S)
+	lines = (re.sub(r'[ \t]+', ' ', line).strip() for line in code.split("\n"))
+	return ''.join(line + "\n" for line in lines if line)
+
+def shader_functions(code):
+	"""Top-level function definitions in GLSL code as (name, start, end) spans, prototypes not included"""
+	functions = []
+	depth = 0
+	statement_start = 0
+	body_start = None
+	i = 0
+
+	while i < len(code):
+		c = code[i]
+
+		if c in "#@" and depth == 0 and (i == 0 or code[i - 1] == "\n"):
+			# Preprocessor and shdc tag lines end a statement
+			i = code.find("\n", i)
+			if i == -1:
+				break
+			statement_start = i + 1
+		elif c == "{":
+			if depth == 0:
+				m = re.search(r'(\w+)\s*\([^;{}]*\)\s*$', code[statement_start:i])
+				body_start = (m.group(1), statement_start) if m is not None else None
+			depth += 1
+		elif c == "}":
+			depth -= 1
+			if depth == 0:
+				if body_start is not None:
+					functions.append((body_start[0], body_start[1], i + 1))
+				body_start = None
+				statement_start = i + 1
+		elif c == ";" and depth == 0:
+			statement_start = i + 1
+
+		i += 1
+
+	return functions
+
+def strip_dead_shader_functions(code):
+	"""Removes the functions that can't be reached from main or from code outside of functions"""
+	functions = shader_functions(code)
+
+	if not any(name == "main" for name, _, _ in functions):
+		return code
+
+	names = {name for name, _, _ in functions}
+	calls = {}
+	outside = code
+
+	for name, start, end in functions:
+		calls.setdefault(name, set()).update(n for n in re.findall(r'\b(\w+)\s*\(', code[start:end]) if n in names and n != name)
+		outside = outside.replace(code[start:end], "")
+
+	reachable = set()
+	pending = ["main"] + [n for n in re.findall(r'\b(\w+)\s*\(', outside) if n in names]
+
+	while pending:
+		name = pending.pop()
+		if name not in reachable:
+			reachable.add(name)
+			pending += calls.get(name, ())
+
+	output = []
+	position = 0
+
+	for name, start, end in functions:
+		if name not in reachable:
+			output.append(code[position:start])
+			position = end
+
+	output.append(code[position:])
+	return strip_shader_comments(''.join(output))
+
+def minify_shader_source(text):
+	"""
+	shdc input without comments (so also without the import banners),
+	blank lines and, in @vs/@fs/@cs snippets, functions main can't reach.
+	Snippets that use @include_block keep their functions, as the block's
+	code could call them.
+	"""
+	output = []
+
+	for kind, name, lines in split_shader_snippets(text):
+		segment = strip_shader_comments(''.join(lines))
+
+		if kind not in (None, "block") and "@include_block" not in segment:
+			segment = strip_dead_shader_functions(segment)
+
+		output.append(segment)
+
+	return ''.join(output)
+
+def minify_generated_glsl(text):
+	"""
+	Strips indentation and blank lines from the GLSL sources sokol-shdc
+	embeds as byte arrays in its Odin output. Returns the new text and the
+	array bytes before and after.
+	"""
+	before = after = 0
+
+	def minify_array(m):
+		nonlocal before, after
+		data = bytes(int(b, 16) for b in re.findall(r'0x([0-9a-fA-F]{2})', m.group(3)))
+		source = data.rstrip(b"\0").decode('utf-8')
+		minified = ''.join(line.strip() + "\n" for line in source.split("\n") if line.strip()).encode('utf-8') + b"\0"
+		before += len(data)
+		after += len(minified)
+		rows = ("    " + ",".join("0x%02x" % b for b in minified[i:i + 16]) + ",\n" for i in range(0, len(minified), 16))
+		return "%s[%i]u8 {\n%s}" % (m.group(1), len(minified), ''.join(rows))
+
+	text = re.sub(r'^(\w+_source_glsl\w* := )\[(\d+)\]u8 \{\n(.*?)^\}', minify_array, text, flags=re.M | re.S)
+	return text, before, after
+
+SHADER_CACHE_DIR = "build/shader_cache"
+SHADER_GRAPH_PATH = SHADER_CACHE_DIR + "/graph.json"
+
+class Shader_Source:
+	"""A parsed .glsl file: its lines plus the #import directives found in them"""
+	def __init__(self, path, size, mtime_ns, digest, imports, lines=None):
+		self.path = path
+		self.size = size
+		self.mtime_ns = mtime_ns
+		self.digest = digest
+		self.imports = imports  # line index -> (import path as written, resolved path)
+		self.lines = lines      # None for entries loaded from disk that haven't been re-read yet
+
+	def text(self):
+		return ''.join(self.lines)
+
+class Shader_Graph:
+	"""
+	Import graph of all .glsl files, persisted between runs in SHADER_GRAPH_PATH.
+
+	Every file is parsed at most once per run. For every program the graph
+	remembers which files it depends on and the digest of its preprocessed
+	output, so build_shaders() can tell which programs an edit affects and
+	skip preprocessing the rest.
+	"""
+	def __init__(self):
+		self.files = {}     # path -> Shader_Source
+		self.programs = {}  # program path -> {"deps": {path: file digest}, "digest": preprocessed digest}
+		self.loaded = False
+
+	def load(self):
+		if self.loaded:
+			return
+
+		self.loaded = True
+
+		if not os.path.exists(SHADER_GRAPH_PATH):
+			return
+
+		import json
+
+		try:
+			with open(SHADER_GRAPH_PATH, 'r', encoding='utf-8') as f:
+				data = json.load(f)
+
+			for path, f in data["files"].items():
+				imports = {int(i): tuple(imp) for i, imp in f["imports"].items()}
+				self.files[path] = Shader_Source(path, f["size"], f["mtime_ns"], f["digest"], imports)
+
+			self.programs = data["programs"]
+		except (ValueError, KeyError, TypeError):
+			print("Ignoring unreadable shader graph: " + SHADER_GRAPH_PATH)
+			self.files = {}
+			self.programs = {}
+
+	def save(self):
+		import json
+
+		data = {
+			"files": {
+				path: {
+					"size": f.size,
+					"mtime_ns": f.mtime_ns,
+					"digest": f.digest,
+					"imports": {str(i): list(imp) for i, imp in f.imports.items()},
+				} for path, f in self.files.items()
+			},
+			"programs": self.programs,
+		}
+
+		make_dirs(os.path.dirname(SHADER_GRAPH_PATH))
+		write_if_changed(SHADER_GRAPH_PATH, json.dumps(data, indent=1, sort_keys=True).encode())
+
+	def source(self, path):
+		"""Returns the parsed file, reading it from disk only if it is new or changed on disk"""
+		path = os.path.normpath(path)
+
+		try:
+			st = os.stat(path)
+		except FileNotFoundError:
+			raise FileNotFoundError(f"Shader file not found: {path}")
+
+		cached = self.files.get(path)
+
+		if cached is not None and cached.lines is not None and cached.size == st.st_size and cached.mtime_ns == st.st_mtime_ns:
+			return cached
+
+		with open(path, 'rb') as f:
+			data = f.read()
+
+		lines = data.decode('utf-8').splitlines(keepends=True)
+		imports = {}
+
+		for i, line in enumerate(lines):
+			stripped = line.strip()
+
+			if stripped.startswith('#import'):
+				# Extract the import path using regex to handle both "path" and <path>
+				import_match = re.match(r'#import\s+["<]([^">]+)[">]', stripped)
+				if not import_match:
+					raise SyntaxError(f"Invalid #import syntax in {path} at line {i+1}: {stripped}")
+
+				import_path = import_match.group(1)
+
+				# Resolve the import path relative to the current file's directory
+				resolved_path = os.path.normpath(os.path.join(os.path.dirname(path), import_path))
+				imports[i] = (import_path, resolved_path)
+
+		source = Shader_Source(path, st.st_size, st.st_mtime_ns, hashlib.sha256(data).hexdigest(), imports, lines)
+		self.files[path] = source
+		return source
+
+	def current_digest(self, path):
+		"""Digest of the file as it is on disk now, only re-reading it when its stat changed. None if missing."""
+		path = os.path.normpath(path)
+		cached = self.files.get(path)
+
+		try:
+			st = os.stat(path)
+		except FileNotFoundError:
+			return None
+
+		if cached is not None and cached.size == st.st_size and cached.mtime_ns == st.st_mtime_ns:
+			return cached.digest
+
+		return self.source(path).digest
+
+	def dependencies(self, program):
+		"""All files reachable from program through #import, including the program itself"""
+		deps = []
+		stack = [os.path.normpath(program)]
+
+		while stack:
+			path = stack.pop()
+
+			if path in deps:
+				continue
+
+			deps.append(path)
+
+			for _, resolved_path in self.source(path).imports.values():
+				stack.append(resolved_path)
+
+		return sorted(deps)
+
+	def program_digest(self, program):
+		"""Digest of the program's preprocessed output if none of its dependencies changed since it was recorded"""
+		entry = self.programs.get(os.path.normpath(program))
+
+		if entry is None:
+			return None
+
+		for dep, digest in entry["deps"].items():
+			if self.current_digest(dep) != digest:
+				return None
+
+		return entry["digest"]
+
+	def changed_dependencies(self, program):
+		entry = self.programs.get(os.path.normpath(program))
+
+		if entry is None:
+			return []
+
+		return [dep for dep, digest in entry["deps"].items() if self.current_digest(dep) != digest]
+
+	def record_program(self, program, preprocessed_content):
+		digest = hashlib.sha256(preprocessed_content.encode()).hexdigest()
+		self.programs[os.path.normpath(program)] = {
+			"deps": {dep: self.source(dep).digest for dep in self.dependencies(program)},
+			"digest": digest,
+		}
+		return digest
+
+SHADER_GRAPH = Shader_Graph()
+
+@build_entry_point
+@traced
+def build_shaders():
+	"""Compiles the shaders that changed and updates their gen__*.odin files. Returns the updated files."""
+	print("Building shaders...")
+	shdc = get_shader_compiler()
+	shdc_digest = file_digest(shdc)
+	active_lang = get_shader_languages()
+
+	# Extra languages are compiled into the cache only, so a following build
+	# for that target (e.g. -web after a native build) is a cache hit.
+	langs = [active_lang]
+	if common.args.shader_langs:
+		for l in common.args.shader_langs.replace(":", ",").split(","):
+			l = l.strip()
+			if l and l not in langs:
+				langs.append(l)
+
+	# Web builds ship the GLSL sources, and WebGL compiles them at startup
+	minify = common.args.minify_shaders or common.args.web
+
+	SHADER_GRAPH.load()
+	shaders = []
+
+	for root, dirs, files in os.walk("source"):
+		for file in files:
+			if file.endswith(".glsl"):
+				filepath = os.path.join(root, file)
+				
+				# Check if this is a main shader file (has @program directive)
+				# or a utility file (has #pragma once or no @program)
+				content = SHADER_GRAPH.source(filepath).text()
+					
+				# Skip files that are utility/import-only files
+				# These typically have #pragma once or don't have @program directive
+				if '#pragma once' in content:
+					print(f"Skipping utility file: {filepath}")
+					continue
+					
+				# Only compile files that have Sokol shader program definitions
+				if '@program' not in content:
+					print(f"Skipping non-program shader: {filepath}")
+					continue
+				
+				shaders.append(filepath)
+
+	make_dirs(SHADER_CACHE_DIR)
+
+	jobs = []
+	temp_files = []
+	installs = []
+	num_units = 0
+
+	def preprocess(s):
+		try:
+			return preprocess_shader(s)
+		except Exception as e:
+			raise Build_Error(f"Error processing shader {s}:\n{e}")
+
+	for s in shaders:
+		out_dir = os.path.dirname(s)
+		out_filename = os.path.basename(s)
+		
+		# Only preprocess programs that one of their imports changed for. The
+		# others reuse the preprocessed digest recorded in the shader graph.
+		preprocessed_content = None
+		preprocessed_digest = SHADER_GRAPH.program_digest(s)
+
+		if preprocessed_digest is None:
+			changed = SHADER_GRAPH.changed_dependencies(s)
+			if changed:
+				print(f"Preprocessing {s} (changed: {', '.join(changed)})...")
+			else:
+				print(f"Preprocessing {s}...")
+
+			preprocessed_content = preprocess(s)
+			preprocessed_digest = SHADER_GRAPH.record_program(s, preprocessed_content)
+		else:
+			print(f"Shader sources unchanged: {s}")
+
+		out = out_dir + "/gen__" + (out_filename.removesuffix("glsl") + "odin")
+
+		# Files with @variants are compiled as several units, one per variant
+		expansion = Shader_Expansion.load(preprocessed_digest)
+
+		if expansion is None:
+			if preprocessed_content is None:
+				preprocessed_content = preprocess(s)
+
+			expansion = expand_shader_variants(preprocessed_content, s)
+			expansion.save(preprocessed_digest)
+
+		num_units += len(expansion.units)
+		unit_temp_files = {}
+
+		for lang in langs:
+			unit_outs = []
+
+			for unit in expansion.units:
+				# The cache key covers everything that can change the generated
+				# file: the fully resolved source, the variant, the target
+				# language, the shdc binary and the path the result is written to.
+				key_hasher = hashlib.sha256()
+				for part in (preprocessed_digest, lang, shdc_digest, out) + ((unit,) if unit else ()) + (("minify",) if minify else ()):
+					key_hasher.update(part.encode())
+					key_hasher.update(b"\0")
+				cached_out = os.path.join(SHADER_CACHE_DIR, key_hasher.hexdigest() + ".odin")
+				unit_outs.append((unit, cached_out))
+				source_name = s + (":" + unit if unit else "")
+
+				if os.path.exists(cached_out):
+					print(f"Shader cache hit for {source_name} ({lang})")
+					continue
+
+				if unit not in unit_temp_files:
+					if expansion.sources is None:
+						if preprocessed_content is None:
+							preprocessed_content = preprocess(s)
+
+						expansion = expand_shader_variants(preprocessed_content, s)
+
+					source = expansion.sources[unit]
+
+					if minify:
+						minified = minify_shader_source(source)
+						print(f"Minified {source_name}: {format_bytes(len(source))} -> {format_bytes(len(minified))}")
+						source = minified
+
+					# Write the unit's source to a temporary file, shared by all
+					# languages of this program. It goes into the cache
+					# directory, a failed compile leaves it there and not in
+					# the source tree.
+					temp_file = os.path.join(SHADER_CACHE_DIR, os.path.normpath(s).replace(os.sep, "_") + ("." + unit if unit else "") + ".preprocessed")
+					with open(temp_file, 'w', encoding='utf-8') as f:
+						f.write(source)
+					temp_files.append(temp_file)
+					unit_temp_files[unit] = temp_file
+
+				jobs.append(Shader_Job(source_name, lang, unit_temp_files[unit], cached_out))
+
+			if lang == active_lang:
+				installs.append((out, unit_outs, expansion.selectors))
+
+	SHADER_GRAPH.save()
+	common.TRACE.note(programs=len(shaders), variants=num_units - len(shaders), cache_hits=num_units * len(langs) - len(jobs), shdc_jobs=len(jobs))
+	failed = run_shader_jobs(shdc, jobs)
+
+	# Clean up temporary files
+	for temp_file in temp_files:
+		os.remove(temp_file)
+
+	if failed:
+		raise Build_Error("%i of %i shader compile(s) failed:\n" % (len(failed), len(jobs)) +
+			"\n".join("  %s (%s)" % (job.source, job.lang) for job in failed))
+
+	updated = []
+
+	for out, unit_outs, selectors in installs:
+		generated = []
+
+		for unit, cached_out in unit_outs:
+			with open(cached_out, 'rb') as f:
+				generated.append((unit, f.read()))
+
+		if len(generated) == 1:
+			generated = generated[0][1]
+		else:
+			generated = merge_generated_shader(generated[0][1].decode('utf-8'), [(unit, text.decode('utf-8')) for unit, text in generated[1:]], selectors).encode('utf-8')
+
+		if minify:
+			text, before, after = minify_generated_glsl(generated.decode('utf-8'))
+
+			if before:
+				print(f"Minified the GLSL embedded in {out}: {format_bytes(before)} -> {format_bytes(after)}")
+
+			generated = text.encode('utf-8')
+
+		# Leave the generated file (and its mtime) alone when nothing
+		# changed, so the following odin compile sees no spurious change.
+		if write_if_changed(out, generated):
+			print(f"Updated {out}")
+			updated.append(out)
+
+	return updated
+
+class Shader_Job:
+	def __init__(self, source, lang, input_path, cached_out):
+		self.source = source
+		self.lang = lang
+		self.input_path = input_path
+		self.cached_out = cached_out
+
+def run_shader_jobs(shdc, jobs):
+	"""
+	Runs sokol-shdc for all jobs on a thread pool of -j workers.
+
+	Each job's output is captured and printed in submission order once it
+	has finished, so logs of concurrent compiles never interleave. Returns
+	the list of failed jobs instead of exiting on the first failure.
+	"""
+	if not jobs:
+		return []
+
+	from concurrent.futures import ThreadPoolExecutor
+
+	def compile_job(job):
+		# Compile into the cache first, so a failed or interrupted compile
+		# never leaves a partial cache entry behind.
+		temp_out = job.cached_out + ".tmp"
+		cmd = shdc + " -i %s -o %s -l %s -f sokol_odin" % (job.input_path, temp_out, job.lang)
+		res, output = tasks.run_captured(cmd)
+
+		if res == 0:
+			os.replace(temp_out, job.cached_out)
+		elif os.path.exists(temp_out):
+			os.remove(temp_out)
+
+		return cmd, res, output
+
+	num_workers = max(1, min(common.args.j, len(jobs)))
+	print("Compiling %i shader job(s) on %i worker(s)..." % (len(jobs), num_workers))
+	failed = []
+
+	with ThreadPoolExecutor(max_workers=num_workers) as pool:
+		futures = [pool.submit(compile_job, job) for job in jobs]
+
+		for job, future in zip(jobs, futures):
+			cmd, res, output = future.result()
+			print("[shdc %s] %s" % (job.lang, job.source))
+
+			if output:
+				print(output.rstrip())
+
+			if res != 0:
+				print("Failed running:" + cmd)
+				failed.append(job)
+
+	return failed
+
+def get_shader_languages():
+	if common.args.web:
+		return "glsl300es"
+	elif IS_WINDOWS:
+		return "hlsl5"
+	elif IS_LINUX:
+		return "glsl430"
+	elif IS_OSX:
+		return "glsl410" if common.args.gl else "metal_macos"
+
+	return ""
+
+def get_shader_compiler():
+	path = get_shader_compiler_path()
+	if not os.path.exists(path):
+		raise Build_Error("Could not find shader compiler. Try running this script with the -update-sokol parameter.")
+
+	return path
+
+def get_shader_compiler_path():
+	"""Where sokol-shdc lives for this platform, whether or not it exists"""
+	path = ""
+
+	# Only the Linux and macOS paths depend on the architecture
+	arch = os.uname().machine if hasattr(os, "uname") else ""
+
+	if IS_WINDOWS:
+		path = "sokol-shdc\\win32\\sokol-shdc.exe"
+	elif IS_LINUX:
+		if "arm64" in arch or "aarch64" in arch:
+			path = "sokol-shdc/linux_arm64/sokol-shdc"
+		else:
+			path = "sokol-shdc/linux/sokol-shdc"
+	elif IS_OSX:
+		if "arm64" in arch or "aarch64" in arch:
+			path = "sokol-shdc/osx_arm64/sokol-shdc"
+		else:
+			path = "sokol-shdc/osx/sokol-shdc"
+
+	return path
+
+def shader_outputs():
+	"""The gen__*.odin files build_shaders may write, one next to every .glsl file"""
+	return [os.path.join(root, "gen__" + file.removesuffix("glsl") + "odin")
+		for root, dirs, files in os.walk("source") for file in files if file.endswith(".glsl")]
+
+def warn_stale_shader_outputs():
+	"""
+	With -no-shader-compile the checked in gen__*.odin files are used as
+	they are. Warns about the ones that predate an @variants line, since
+	they have no <program>_variant_shader_desc to pick a variant with.
+	"""
+	for root, dirs, files in os.walk("source"):
+		for file in files:
+			if not file.endswith(".glsl"):
+				continue
+
+			source = os.path.join(root, file)
+			out = os.path.join(root, "gen__" + file.removesuffix("glsl") + "odin")
+
+			with open(source, 'r', encoding='utf-8') as f:
+				programs = [m.group(1) for m in map(SHADER_VARIANTS_RE.match, f) if m is not None]
+
+			if not programs:
+				continue
+
+			generated = ""
+			if os.path.exists(out):
+				with open(out, 'r', encoding='utf-8') as f:
+					generated = f.read()
+
+			for program in programs:
+				if f"{program}_variant_shader_desc ::" not in generated:
+					print(f"Warning: {out} has no {program}_variant_shader_desc, it is older than the @variants line in {source}. Build without -no-shader-compile to update it.")
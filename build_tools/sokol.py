@@ -0,0 +1,506 @@
+"""
+-update-sokol fetches the Sokol bindings and sokol-shdc (cached,
+resumable downloads), -compile-sokol builds the Sokol C libraries.
+"""
+
+import os
+import shutil
+import functools
+import stat
+import re
+import hashlib
+
+from . import common, tasks, shaders, web
+from .common import Build_Error, IS_WINDOWS, IS_OSX, IS_LINUX, traced, file_digest, make_executable
+from .common import locked_print as print
+
+SOKOL_PATH = "source/lib/sokol"
+SOKOL_SHDC_PATH = "sokol-shdc"
+
+# Archives update_sokol downloads: the GitHub URL, the file name to look for
+# in -sokol-mirror and the directory inside the archive that is used.
+SOKOL_BINDINGS_ARCHIVE = ("https://github.com/floooh/sokol-odin/archive/refs/heads/main.zip", "sokol-odin-main.zip", "sokol-odin-main/sokol/")
+SOKOL_TOOLS_ARCHIVE = ("https://github.com/floooh/sokol-tools-bin/archive/refs/heads/master.zip", "sokol-tools-bin-master.zip", "sokol-tools-bin-master/bin/")
+
+DOWNLOAD_CACHE_DIR = "build/download_cache"
+DOWNLOAD_CHUNK_SIZE = 1 << 16
+
+@traced
+def update_sokol():
+	"""
+	Updates the Sokol Odin bindings in SOKOL_PATH and the sokol-shdc binary
+	for this platform in SOKOL_SHDC_PATH. Downloads are cached, and only
+	files that differ from the archive are written, so an update that
+	changes nothing leaves every file (and its mtime) alone.
+	"""
+	url, mirror_name, prefix = SOKOL_BINDINGS_ARCHIVE
+	archive = fetch_sokol_archive(url, mirror_name)
+	print("Updating Sokol Odin bindings in %s..." % SOKOL_PATH)
+	extract_archive(archive, prefix, SOKOL_PATH)
+
+	# Only this platform's sokol-shdc, the archive has one for every OS and architecture
+	shdc = shaders.get_shader_compiler_path().replace("\\", "/")
+	shdc_dir = os.path.dirname(shdc)
+	url, mirror_name, prefix = SOKOL_TOOLS_ARCHIVE
+	archive = fetch_sokol_archive(url, mirror_name)
+	print("Updating sokol-shdc in %s..." % shdc_dir)
+	extract_archive(archive, prefix + os.path.relpath(shdc_dir, SOKOL_SHDC_PATH).replace(os.sep, "/") + "/", shdc_dir)
+
+	make_executable(shdc)
+
+def fetch_sokol_archive(url, mirror_name):
+	"""Local path of a Sokol archive: from -sokol-mirror if given, otherwise downloaded from GitHub through the download cache"""
+	mirror = common.args.sokol_mirror
+
+	if mirror:
+		if mirror.startswith("file:"):
+			import urllib.parse
+			import urllib.request
+			mirror = urllib.request.url2pathname(urllib.parse.urlparse(mirror).path)
+		elif "://" in mirror:
+			return download_cached(mirror.rstrip("/") + "/" + mirror_name)
+
+		path = os.path.join(mirror, mirror_name)
+
+		if not os.path.isfile(path):
+			raise Build_Error(f"Could not find {mirror_name} in Sokol mirror {common.args.sokol_mirror}")
+
+		return path
+
+	return download_cached(url)
+
+def download_cached(url):
+	"""
+	Downloads url into DOWNLOAD_CACHE_DIR and returns the path of the cached
+	file. A cached file is revalidated with its ETag / Last-Modified, so an
+	unchanged file isn't downloaded again, and used as is when the server
+	can't be reached. Downloads stream into a .part file. An interrupted
+	download resumes with a Range request when the server supports it.
+	"""
+	import json
+	import urllib.request
+	import urllib.error
+
+	os.makedirs(DOWNLOAD_CACHE_DIR, exist_ok=True)
+	name = hashlib.sha256(url.encode()).hexdigest()[:16] + "_" + os.path.basename(url.split("?")[0])
+	path = os.path.join(DOWNLOAD_CACHE_DIR, name)
+	part_path = path + ".part"
+	meta_path = path + ".json"
+	meta = {}
+
+	if os.path.exists(meta_path):
+		with open(meta_path, 'r', encoding='utf-8') as f:
+			meta = json.load(f)
+
+	def save_meta():
+		with open(meta_path, 'w', encoding='utf-8') as f:
+			json.dump(meta, f, indent=1)
+
+	headers = {}
+	resume_from = 0
+
+	if os.path.exists(part_path) and meta.get("partial_validator"):
+		# Only resume if the file on the server is still the one we got the first part of
+		resume_from = os.path.getsize(part_path)
+		headers["Range"] = "bytes=%i-" % resume_from
+		headers["If-Range"] = meta["partial_validator"]
+	elif os.path.exists(path):
+		if meta.get("etag"):
+			headers["If-None-Match"] = meta["etag"]
+		if meta.get("last_modified"):
+			headers["If-Modified-Since"] = meta["last_modified"]
+
+	try:
+		response = urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=60)
+	except urllib.error.HTTPError as e:
+		if e.code == 304:
+			print(f"{url} unchanged, using cached download")
+			return path
+
+		if e.code == 416 and os.path.exists(part_path):
+			# The partial file doesn't fit the server's file anymore
+			os.remove(part_path)
+			return download_cached(url)
+
+		if os.path.exists(path):
+			print(f"Downloading {url} failed ({e}), using cached download")
+			return path
+
+		raise Build_Error(f"Could not download {url}: {e}")
+	except OSError as e:
+		if os.path.exists(path):
+			print(f"Could not reach {url} ({e}), using cached download")
+			return path
+
+		raise Build_Error(f"Could not download {url}: {e}")
+
+	with response:
+		etag = response.headers.get("ETag")
+		last_modified = response.headers.get("Last-Modified")
+
+		if response.status == 206:
+			print(f"Resuming download of {url} at {resume_from} bytes...")
+			mode = 'ab'
+		else:
+			print(f"Downloading {url}...")
+			mode = 'wb'
+			resume_from = 0
+
+		# If-Range needs a strong validator, weak ETags can't resume
+		meta["partial_validator"] = etag if etag and not etag.startswith("W/") else last_modified
+		save_meta()
+
+		length = response.headers.get("Content-Length")
+		expected_size = resume_from + int(length) if length is not None else None
+		error = None
+
+		try:
+			with open(part_path, mode) as f:
+				while True:
+					chunk = response.read(DOWNLOAD_CHUNK_SIZE)
+
+					if not chunk:
+						break
+
+					f.write(chunk)
+		except OSError as e:
+			error = e
+
+		# A dropped connection can also look like a normal end of the response
+		if error is None and expected_size is not None and os.path.getsize(part_path) != expected_size:
+			error = "got %i of %i bytes" % (os.path.getsize(part_path), expected_size)
+
+		if error is not None:
+			raise Build_Error(f"Download of {url} was interrupted ({error}). Run again to resume it.")
+
+	os.replace(part_path, path)
+	meta = {
+		"url": url,
+		"etag": etag,
+		"last_modified": last_modified,
+		"size": os.path.getsize(path),
+		"sha256": file_digest(path),
+	}
+	save_meta()
+	print("Downloaded %s (%.1f MB)" % (url, meta["size"] / (1024 * 1024)))
+
+	return path
+
+def extract_archive(zip_path, prefix, dest):
+	"""
+	Extracts the zip members below prefix into dest. Files that already have
+	the member's size and CRC are left alone. Files a previous extraction
+	into dest wrote that are no longer in the archive are removed, anything
+	else in dest (like compiled libraries) is kept.
+	"""
+	import json
+	import zipfile
+	import zlib
+
+	manifest_path = os.path.join(DOWNLOAD_CACHE_DIR, "extracted_" + os.path.normpath(dest).replace(os.sep, "_") + ".json")
+	previous = []
+
+	if os.path.exists(manifest_path):
+		with open(manifest_path, 'r', encoding='utf-8') as f:
+			previous = json.load(f)
+
+	dest_root = os.path.abspath(dest)
+	extracted = []
+	written = 0
+	unchanged = 0
+
+	with zipfile.ZipFile(zip_path) as zip_file:
+		for info in zip_file.infolist():
+			if info.is_dir() or not info.filename.startswith(prefix) or info.filename == prefix:
+				continue
+
+			rel = info.filename[len(prefix):]
+			out = os.path.abspath(os.path.join(dest_root, rel))
+
+			if not out.startswith(dest_root + os.sep):
+				raise Build_Error(f"{zip_path} has a member outside of its directory: {info.filename}")
+
+			extracted.append(rel)
+
+			if os.path.isfile(out) and os.path.getsize(out) == info.file_size:
+				with open(out, 'rb') as f:
+					if zlib.crc32(f.read()) == info.CRC:
+						unchanged += 1
+						continue
+
+			os.makedirs(os.path.dirname(out), exist_ok=True)
+
+			with zip_file.open(info) as src, open(out + ".tmp", 'wb') as dst:
+				shutil.copyfileobj(src, dst)
+
+			os.replace(out + ".tmp", out)
+
+			# Keep the executable bit of files zipped on Unix
+			if (info.external_attr >> 16) & 0o111 and not IS_WINDOWS:
+				os.chmod(out, os.stat(out).st_mode | stat.S_IEXEC)
+
+			written += 1
+
+	removed = 0
+
+	for rel in sorted(set(previous) - set(extracted)):
+		path = os.path.join(dest_root, rel)
+
+		if os.path.isfile(path):
+			os.remove(path)
+			removed += 1
+
+	os.makedirs(DOWNLOAD_CACHE_DIR, exist_ok=True)
+
+	with open(manifest_path, 'w', encoding='utf-8') as f:
+		json.dump(sorted(extracted), f, indent=1)
+
+	print("%s: %i written, %i unchanged, %i removed" % (dest, written, unchanged, removed))
+
+# Sokol C libraries built by compile_sokol on Linux and for WASM. Each
+# variant (module x target x debug/release x static/shared) is compiled as
+# its own job and skipped when its fingerprint is unchanged.
+SOKOL_CLIB_MODULES = ["log", "gfx", "app", "glue", "time", "audio", "debugtext", "shape", "gl"]
+SOKOL_CLIB_CACHE_DIR = "build/sokol_clibs"
+
+SOKOL_CLIB_CONFIG_FLAGS = {
+	"debug": "-g -DIMPL",
+	"release": "-O2 -DNDEBUG -DIMPL",
+}
+
+class Sokol_Lib_Variant:
+	def __init__(self, module, output, compiler, commands):
+		self.module = module
+		self.output = output
+		self.compiler = compiler
+		self.commands = commands
+
+def sokol_linux_lib_variants():
+	"""The libraries build_clibs_linux.sh makes: static and shared, GL backend, x64"""
+	variants = []
+
+	for config, flags in SOKOL_CLIB_CONFIG_FLAGS.items():
+		for module in SOKOL_CLIB_MODULES:
+			name = "%s/sokol_%s_linux_x64_gl_%s" % (module, module, config)
+			src = "c/sokol_%s.c" % module
+
+			variants.append(Sokol_Lib_Variant(module, name + ".a", "cc", [
+				"cc -pthread -c %s -DSOKOL_GLCORE %s -o {obj}" % (flags, src),
+				"ar rcs {out} {obj}",
+			]))
+
+			variants.append(Sokol_Lib_Variant(module, name + ".so", "cc", [
+				"cc -pthread -shared %s -fPIC -DSOKOL_GLCORE -o {out} %s" % (flags, src),
+			]))
+
+	return variants
+
+def sokol_wasm_lib_variants():
+	"""The libraries build_clibs_wasm.sh makes: static, GLES3 backend"""
+	variants = []
+
+	for config, flags in SOKOL_CLIB_CONFIG_FLAGS.items():
+		for module in SOKOL_CLIB_MODULES:
+			name = "%s/sokol_%s_wasm_gl_%s" % (module, module, config)
+
+			variants.append(Sokol_Lib_Variant(module, name + ".a", "emcc", [
+				"emcc -c %s -DSOKOL_GLES3 c/sokol_%s.c -o {obj}" % (flags, module),
+				"emar rcs {out} {obj}",
+			]))
+
+	return variants
+
+def sokol_clib_sources(module):
+	"""The module's .c file and the headers it includes from the same directory, recursively"""
+	include_re = re.compile(r'^\s*#\s*include\s+"([^"]+)"', re.MULTILINE)
+	stack = ["c/sokol_%s.c" % module]
+	paths = set()
+
+	while stack:
+		path = stack.pop()
+
+		if path in paths or not os.path.isfile(path):
+			continue
+
+		paths.add(path)
+
+		with open(path, 'r', encoding='utf-8', errors='replace') as f:
+			for include in include_re.findall(f.read()):
+				stack.append(os.path.normpath(os.path.join(os.path.dirname(path), include)).replace(os.sep, "/"))
+
+	return sorted(paths)
+
+@functools.lru_cache(maxsize=None)
+def c_compiler_identity(compiler):
+	"""Path and version output of a compiler, part of every library fingerprint it builds"""
+	cmd = compiler + " --version"
+
+	if compiler == "emcc":
+		cmd = web.emscripten_command(cmd)
+
+	res, output = tasks.run_captured(cmd)
+	return "%s\0%s" % (shutil.which(compiler) or compiler, output.strip() if res == 0 else "")
+
+def sokol_clib_fingerprint(variant):
+	hasher = hashlib.sha256()
+	hasher.update(c_compiler_identity(variant.compiler).encode() + b"\0")
+
+	for cmd in variant.commands:
+		hasher.update(cmd.encode() + b"\0")
+
+	for path in sokol_clib_sources(variant.module):
+		hasher.update(("%s=%s\0" % (path, file_digest(path))).encode())
+
+	return hasher.hexdigest()
+
+def build_sokol_clibs(variants, cache_dir):
+	"""
+	Builds library variants on a pool of -j workers, skipping every variant
+	whose output exists and whose fingerprint (sources, compiler, flags)
+	matches the last build of it, as recorded in cache_dir. Runs from
+	SOKOL_PATH like the build_clibs scripts, so cache_dir must be absolute.
+	Raises Build_Error if any variant failed to build.
+	"""
+	from concurrent.futures import ThreadPoolExecutor
+
+	jobs = []
+
+	for variant in variants:
+		fingerprint = sokol_clib_fingerprint(variant)
+		fingerprint_path = os.path.join(cache_dir, variant.output + ".fingerprint")
+		up_to_date = False
+
+		if os.path.exists(variant.output) and os.path.exists(fingerprint_path):
+			with open(fingerprint_path, 'r') as f:
+				up_to_date = f.read().strip() == fingerprint
+
+		if not up_to_date:
+			jobs.append((variant, fingerprint, fingerprint_path))
+
+	common.TRACE.note(variants=len(variants), up_to_date=len(variants) - len(jobs))
+
+	if not jobs:
+		print("Sokol libraries up to date: %i variant(s) unchanged" % len(variants))
+		return
+
+	def build_variant(variant, fingerprint, fingerprint_path):
+		# Build next to the final file and move it into place, so a failed
+		# build never leaves a library behind that looks up to date.
+		temp_out = variant.output + ".tmp"
+
+		# Every variant gets its own object file, so concurrent compiles of
+		# the same module don't overwrite each other's sokol_<module>.o
+		obj = os.path.join(cache_dir, "obj", variant.output.replace("/", "_") + ".o")
+		os.makedirs(os.path.dirname(fingerprint_path), exist_ok=True)
+		os.makedirs(os.path.dirname(obj), exist_ok=True)
+
+		if os.path.exists(temp_out):
+			os.remove(temp_out)
+
+		outputs = []
+
+		for cmd in variant.commands:
+			cmd = cmd.format(out=temp_out, obj=obj)
+
+			if variant.compiler == "emcc":
+				cmd = web.emscripten_command(cmd)
+
+			res, output = tasks.run_captured(cmd)
+			outputs.append(output)
+
+			if res != 0:
+				if os.path.exists(temp_out):
+					os.remove(temp_out)
+
+				return cmd, res, "".join(outputs)
+
+		os.replace(temp_out, variant.output)
+
+		with open(fingerprint_path, 'w') as f:
+			f.write(fingerprint + "\n")
+
+		return cmd, 0, "".join(outputs)
+
+	num_workers = max(1, min(common.args.j, len(jobs)))
+	print("Compiling %i of %i Sokol library variant(s) on %i worker(s)..." % (len(jobs), len(variants), num_workers))
+	failed = []
+
+	with ThreadPoolExecutor(max_workers=num_workers) as pool:
+		futures = [pool.submit(build_variant, *job) for job in jobs]
+
+		for (variant, _, _), future in zip(jobs, futures):
+			cmd, res, output = future.result()
+			print(variant.output)
+
+			if output:
+				print(output.rstrip())
+
+			if res != 0:
+				print("Failed running:" + cmd)
+				failed.append(variant)
+
+	shutil.rmtree(os.path.join(cache_dir, "obj"), ignore_errors=True)
+
+	if failed:
+		raise Build_Error("Failed to build %i Sokol library variant(s)" % len(failed))
+
+@traced
+def compile_sokol():
+	owd = os.getcwd()
+	cache_dir = os.path.abspath(SOKOL_CLIB_CACHE_DIR)
+	os.chdir(SOKOL_PATH)
+
+	emsdk_env = web.get_emscripten_env_command()
+	
+	print("Building Sokol C libraries...")
+
+	if IS_WINDOWS:
+		# Try to find Visual Studio and set up the environment automatically
+		vs_path = r"C:\Program Files\Microsoft Visual Studio\2022\Community"
+		vcvars_path = os.path.join(vs_path, "VC", "Auxiliary", "Build", "vcvars64.bat")
+		
+		if os.path.exists(vcvars_path):
+			# Run the build script with vcvars64 environment
+			print("Setting up Visual Studio x64 environment...")
+			cmd = f'cmd /c "call "{vcvars_path}" && build_clibs_windows.cmd"'
+			tasks.execute(cmd)
+		elif shutil.which("cl.exe") is not None:
+			# cl.exe is already in PATH, just run the build script
+			tasks.execute("build_clibs_windows.cmd")
+		else:
+			print("Error: Could not find Visual Studio 2022 or cl.exe in PATH.")
+			print("Please install Visual Studio 2022 Community or run from a Visual Studio command prompt.")
+			os.chdir(owd)
+			return
+
+		if emsdk_env:
+			tasks.execute(emsdk_env + " && build_clibs_wasm.bat")
+		else:
+			if shutil.which("emcc.bat"):
+				tasks.execute("build_clibs_wasm.bat")
+			else:
+				print("emcc not in PATH, skipping building of WASM libs. Tip: You can also use -emsdk-path to specify where emscripten lives.")
+
+		os.chdir(owd)
+		return
+
+	variants = []
+
+	if IS_LINUX:
+		variants += sokol_linux_lib_variants()
+	elif IS_OSX:
+		tasks.execute("bash build_clibs_macos.sh")
+		tasks.execute("bash build_clibs_macos_dylib.sh")
+
+	if emsdk_env:
+		os.environ["EMSDK_QUIET"] = "1"
+
+	if emsdk_env or shutil.which("emcc") is not None:
+		variants += sokol_wasm_lib_variants()
+	else:
+		print("emcc not in PATH, skipping building of WASM libs. Tip: You can also use -emsdk-path to specify where emscripten lives.")
+
+	try:
+		build_sokol_clibs(variants, cache_dir)
+	finally:
+		os.chdir(owd)
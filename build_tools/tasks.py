@@ -0,0 +1,252 @@
+"""
+The build task graph (-j) and the tool processes its tasks run, which a
+failed or cancelled build terminates.
+"""
+
+import os
+import subprocess
+import threading
+
+from . import common, shaders, assets
+from .common import Build_Error, IS_WINDOWS
+from .common import locked_print as print
+
+class Build_Task:
+	def __init__(self, name, run, inputs, outputs, deps):
+		self.name = name
+		self.run = run
+		self.inputs = inputs
+		self.outputs = outputs
+		self.deps = deps
+		self.cancelled = False
+
+class Build_Graph:
+	"""
+	The steps of a build as tasks with declared inputs and outputs (files or
+	directories). A task depends on every task added before it that has an
+	output overlapping one of its inputs, plus any explicit deps. run()
+	executes the tasks on -j worker threads, each as soon as its
+	dependencies are done, so a build takes about as long as its longest
+	chain of dependent tasks.
+
+	When a task fails, no new tasks are started and the commands other
+	tasks are running are terminated, then run() raises Build_Error.
+	"""
+	def __init__(self):
+		self.tasks = []
+
+	def add(self, name, run, inputs=(), outputs=(), deps=()):
+		inputs = [os.path.normpath(p) for p in inputs]
+		outputs = [os.path.normpath(p) for p in outputs]
+		deps = list(deps)
+
+		for task in self.tasks:
+			if task not in deps and any(paths_overlap(i, o) for i in inputs for o in task.outputs):
+				deps.append(task)
+
+		task = Build_Task(name, run, inputs, outputs, deps)
+		self.tasks.append(task)
+		return task
+
+	def run(self):
+		from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+		tasks, self.tasks = self.tasks, []
+
+		if not tasks:
+			return
+
+		pending = list(tasks)
+		running = {}
+		done = set()
+		failed = []
+		num_workers = max(1, min(common.args.j, len(tasks)))
+
+		if len(tasks) > 1:
+			print("Running %i build tasks on %i worker(s): %s" % (len(tasks), num_workers, ", ".join(
+				t.name + (" (after %s)" % ", ".join(d.name for d in t.deps) if t.deps else "") for t in tasks)))
+
+		BUILD_CANCELLED.clear()
+
+		with ThreadPoolExecutor(max_workers=num_workers) as pool:
+			try:
+				while running or (pending and not failed):
+					if not failed:
+						for task in [t for t in pending if all(d in done for d in t.deps)]:
+							pending.remove(task)
+							running[pool.submit(self.run_task, task)] = task
+
+					finished, _ = wait(running, return_when=FIRST_COMPLETED)
+
+					for future in finished:
+						task = running.pop(future)
+
+						try:
+							future.result()
+							done.add(task)
+						except BaseException as e:
+							if not failed:
+								# First failure: stop everything else
+								cancel_build()
+							failed.append((task, e))
+			except KeyboardInterrupt:
+				cancel_build()
+				raise
+
+		if failed:
+			# Tasks finishing together come back in any order, report the one
+			# that failed by itself and not because the build was cancelled
+			first, error = next(((t, e) for t, e in failed if not t.cancelled), failed[0])
+
+			if not isinstance(error, Build_Error):
+				# A bug rather than a failed build step, keep its traceback
+				raise error
+
+			message = "Build task '%s' failed: %s" % (first.name, error)
+			cancelled = [t.name for t in tasks if t is not first and any(t is f for f, _ in failed)]
+
+			if cancelled:
+				message += "\nCancelled: " + ", ".join(cancelled)
+			if pending:
+				message += "\nNot started: " + ", ".join(t.name for t in pending)
+
+			raise Build_Error(message)
+
+	def run_task(self, task):
+		# Queued behind the task that failed
+		if BUILD_CANCELLED.is_set():
+			task.cancelled = True
+			raise Build_Error("Cancelled")
+
+		CURRENT_TASK.name = task.name
+
+		try:
+			with common.TRACE.span(task.name, cat="task"):
+				task.run()
+		except BaseException:
+			if BUILD_CANCELLED.is_set():
+				task.cancelled = True
+			else:
+				# Cancel right away, before this worker picks up a queued task
+				cancel_build()
+			raise
+		finally:
+			CURRENT_TASK.name = None
+
+def new_build_graph(check_asset_budgets=False):
+	"""
+	A build graph with the tasks every build starts with: shaders, with
+	-cook-assets cooked assets, and with -asset-report or check_asset_budgets
+	(release builds) the asset budget check
+	"""
+	graph = Build_Graph()
+
+	if not common.args.no_shader_compile:
+		graph.add("shaders", shaders.build_shaders, inputs=["source"], outputs=shaders.shader_outputs())
+	else:
+		shaders.warn_stale_shader_outputs()
+
+	if common.args.cook_assets:
+		graph.add("cook", assets.cook_assets, inputs=[assets.ASSETS_DIR], outputs=[assets.COOKED_ASSETS_DIR])
+
+	if common.args.asset_report or check_asset_budgets:
+		graph.add("asset_report", assets.asset_report, inputs=[assets.ASSETS_DIR], outputs=[assets.ASSET_REPORT_PATH])
+
+	return graph
+
+def paths_overlap(a, b):
+	return a == b or a.startswith(b + os.sep) or b.startswith(a + os.sep)
+
+# Commands started by the build, terminated when a build task fails
+BUILD_CANCELLED = threading.Event()
+RUNNING_PROCESSES = set()
+RUNNING_PROCESSES_LOCK = threading.Lock()
+
+# Name of the build task running on this thread, used to prefix command output
+CURRENT_TASK = threading.local()
+
+def cancel_build():
+	BUILD_CANCELLED.set()
+
+	with RUNNING_PROCESSES_LOCK:
+		processes = list(RUNNING_PROCESSES)
+
+	for process in processes:
+		terminate_process_tree(process)
+
+def terminate_process_tree(process):
+	"""Commands run through a shell, so the whole process group (Windows: tree) has to go"""
+	if process.poll() is not None:
+		return
+
+	try:
+		if IS_WINDOWS:
+			subprocess.run(["taskkill", "/T", "/F", "/PID", str(process.pid)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+		else:
+			import signal
+			os.killpg(process.pid, signal.SIGTERM)
+	except OSError:
+		pass
+
+def run_process(cmd, echo):
+	"""
+	Runs a shell command with its stdout and stderr piped back, so it can be
+	terminated when the build is cancelled. With echo, output lines are
+	printed as they arrive, prefixed with the build task's name when run by
+	one. Returns (exit code, output).
+	"""
+	if BUILD_CANCELLED.is_set():
+		raise Build_Error("Cancelled")
+
+	kwargs = {} if IS_WINDOWS else {"start_new_session": True}
+	process = subprocess.Popen(cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, errors="replace", **kwargs)
+
+	with RUNNING_PROCESSES_LOCK:
+		RUNNING_PROCESSES.add(process)
+
+	task = getattr(CURRENT_TASK, "name", None)
+	prefix = "[%s] " % task if task else ""
+	output = []
+
+	try:
+		for line in process.stdout:
+			output.append(line)
+
+			if echo:
+				print(prefix + line, end="")
+
+		process.wait()
+	except BaseException:
+		terminate_process_tree(process)
+		raise
+	finally:
+		with RUNNING_PROCESSES_LOCK:
+			RUNNING_PROCESSES.discard(process)
+
+	return process.returncode, "".join(output)
+
+def execute(cmd):
+	# Traced odin builds report their compile stages, which get nested under the command's span
+	odin_timings = common.TRACE.path is not None and cmd.startswith("odin build")
+
+	with common.TRACE.span(cmd.split()[0], cat="subprocess", cmd=cmd) as span:
+		res, output = run_process(cmd + " -show-timings" if odin_timings else cmd, echo=True)
+		common.TRACE.note(exit_code=res)
+
+	if odin_timings:
+		common.TRACE.add_odin_timings(span, output)
+
+	if res != 0:
+		if BUILD_CANCELLED.is_set():
+			# Terminated because another build task failed, that one reports the error
+			raise Build_Error("Cancelled")
+
+		raise Build_Error("Failed running:" + cmd)
+
+def run_captured(cmd):
+	"""Like execute, but captures stdout and stderr and returns (exit code, output) instead of exiting"""
+	with common.TRACE.span(cmd.split()[0], cat="subprocess", cmd=cmd):
+		res, output = run_process(cmd, echo=False)
+		common.TRACE.note(exit_code=res)
+
+	return res, output
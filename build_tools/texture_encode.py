@@ -0,0 +1,406 @@
+"""
+Block compression encoders for -texture-compression (BC1/BC3/BC7 and
+ETC2) and the PSNR they are reported with. Loaded by cook_texture, needs
+NumPy.
+"""
+
+from . import assets
+
+# Block compressed formats cook_texture can write, and their cooked pixel format
+TEXTURE_BLOCK_FORMATS = {
+	"bc1": assets.COOKED_TEXTURE_FORMAT_BC1,
+	"bc3": assets.COOKED_TEXTURE_FORMAT_BC3,
+	"bc7": assets.COOKED_TEXTURE_FORMAT_BC7,
+	"etc2_rgb8": assets.COOKED_TEXTURE_FORMAT_ETC2_RGB8,
+	"etc2_rgba8": assets.COOKED_TEXTURE_FORMAT_ETC2_RGBA8,
+}
+
+# Blocks encoded at once, bounds the size of the encoders' temporary arrays
+TEXTURE_ENCODE_CHUNK = 2048
+
+def texture_block_format(compression, has_alpha, web):
+	"""
+	Block format a -texture-compression setting gives a texture, None for
+	uncompressed. "auto" is ETC2 for web builds and BC1 otherwise, and BC1
+	and ETC2 become BC3 and ETC2 RGBA8 for textures with alpha.
+	"""
+	if compression == "none":
+		return None
+
+	if compression == "auto":
+		compression = "etc2" if web else "bc1"
+
+	if compression == "bc1" and has_alpha:
+		return "bc3"
+
+	if compression == "etc2":
+		return "etc2_rgba8" if has_alpha else "etc2_rgb8"
+
+	return compression
+
+def texture_blocks(pixels):
+	"""(height, width, 4) uint8 image as (blocks, 16, 4) float32 4x4 blocks, row by row. Partial blocks repeat the edge."""
+	import numpy as np
+
+	height, width = pixels.shape[:2]
+	padded = np.pad(pixels, ((0, -height % 4), (0, -width % 4), (0, 0)), mode="edge")
+	rows, columns = padded.shape[0] // 4, padded.shape[1] // 4
+	return padded.reshape(rows, 4, columns, 4, 4).transpose(0, 2, 1, 3, 4).reshape(rows * columns, 16, 4).astype(np.float32)
+
+def untile_texture_blocks(blocks, width, height):
+	"""Inverse of texture_blocks"""
+	rows, columns = -(-height // 4), -(-width // 4)
+	return blocks.reshape(rows, columns, 4, 4, 4).transpose(0, 2, 1, 3, 4).reshape(rows * 4, columns * 4, 4)[:height, :width]
+
+def encode_texture_blocks(pixels, block_format, quality):
+	"""
+	Encodes an (height, width, 4) uint8 image into block_format. Returns
+	the blocks' bytes and the image as the GPU will decode it.
+	"""
+	import numpy as np
+
+	encoder = {
+		"bc1": encode_bc1,
+		"bc3": encode_bc3,
+		"bc7": encode_bc7,
+		"etc2_rgb8": encode_etc2_rgb8,
+		"etc2_rgba8": encode_etc2_rgba8,
+	}[block_format]
+
+	blocks = texture_blocks(pixels)
+	encoded = []
+	decoded = []
+
+	for start in range(0, len(blocks), TEXTURE_ENCODE_CHUNK):
+		data, colors = encoder(blocks[start:start + TEXTURE_ENCODE_CHUNK], quality)
+		encoded.append(data)
+		decoded.append(colors)
+
+	height, width = pixels.shape[:2]
+	return b"".join(encoded), untile_texture_blocks(np.concatenate(decoded), width, height)
+
+def texture_psnr(source, decoded, channels):
+	"""Peak signal-to-noise ratio in dB of the first channels of decoded against source, None if identical"""
+	import numpy as np
+
+	mse = np.mean((source[..., :channels].astype(np.float64) - decoded[..., :channels]) ** 2)
+	return None if mse == 0 else float(10 * np.log10(255.0 ** 2 / mse))
+
+def principal_endpoints(colors, quality):
+	"""
+	Per-block line segments through (blocks, 16, channels) colors: along the
+	principal axis of each block's colors, or at quality 0 the corners of
+	their bounding box. Returns the two endpoints, (blocks, channels) each.
+	"""
+	import numpy as np
+
+	if quality == 0:
+		return colors.min(axis=1), colors.max(axis=1)
+
+	mean = colors.mean(axis=1)
+	centered = colors - mean[:, None]
+	covariance = np.einsum('bpi,bpj->bij', centered, centered)
+
+	# Power iteration, starting from the bounding box diagonal
+	axis = colors.max(axis=1) - colors.min(axis=1)
+	for _ in range(8):
+		axis = np.einsum('bij,bj->bi', covariance, axis)
+		axis /= np.linalg.norm(axis, axis=1, keepdims=True) + 1e-12
+
+	t = np.einsum('bpi,bi->bp', centered, axis)
+	low = mean + axis * t.min(axis=1, keepdims=True)
+	high = mean + axis * t.max(axis=1, keepdims=True)
+	return np.clip(low, 0, 255), np.clip(high, 0, 255)
+
+def refit_endpoints(colors, weights, e0, e1):
+	"""Least squares endpoints for colors interpolated with weights (blocks, 16) from e0 to e1. Blocks that don't determine them keep e0 and e1."""
+	import numpy as np
+
+	w0 = 1 - weights
+	a00 = (w0 * w0).sum(axis=1)
+	a01 = (w0 * weights).sum(axis=1)
+	a11 = (weights * weights).sum(axis=1)
+	b0 = np.einsum('bp,bpc->bc', w0, colors)
+	b1 = np.einsum('bp,bpc->bc', weights, colors)
+	det = a00 * a11 - a01 * a01
+	ok = np.abs(det) > 1e-6
+	safe = np.where(ok, det, 1)[:, None]
+	new0 = (a11[:, None] * b0 - a01[:, None] * b1) / safe
+	new1 = (a00[:, None] * b1 - a01[:, None] * b0) / safe
+	return np.where(ok[:, None], np.clip(new0, 0, 255), e0), np.where(ok[:, None], np.clip(new1, 0, 255), e1)
+
+def nearest_palette_entries(colors, palette):
+	"""Index of the closest palette entry (blocks, entries, channels) for each of the (blocks, 16, channels) colors"""
+	import numpy as np
+
+	return ((colors[:, :, None, :] - palette[:, None, :, :]) ** 2).sum(axis=-1).argmin(axis=-1)
+
+def pack_block_bits(fields, total_bits):
+	"""Packs (values, width) fields, least significant bit first, into little-endian blocks of total_bits bits"""
+	import numpy as np
+
+	words = np.zeros((len(fields[0][0]), total_bits // 64), dtype=np.uint64)
+	offset = 0
+
+	for values, width in fields:
+		values = values.astype(np.uint64)
+		word, shift = offset // 64, offset % 64
+		words[:, word] |= values << np.uint64(shift)
+
+		if shift + width > 64:
+			words[:, word + 1] |= values >> np.uint64(64 - shift)
+
+		offset += width
+
+	return words.astype('<u8').tobytes()
+
+def encode_bc1_colors(blocks, quality):
+	"""BC1 color endpoints and indices (4 color mode) of blocks' RGB. Returns the fields to pack and the decoded colors."""
+	import numpy as np
+
+	colors = blocks[:, :, :3]
+	e0, e1 = principal_endpoints(colors, quality)
+	scale = np.array([31, 63, 31], dtype=np.float32)
+
+	for iteration in range(3 if quality >= 2 else 1):
+		q0 = np.clip(np.rint(e1 * scale / 255), 0, scale).astype(np.uint32)
+		q1 = np.clip(np.rint(e0 * scale / 255), 0, scale).astype(np.uint32)
+		v0 = (q0[:, 0] << 11) | (q0[:, 1] << 5) | q0[:, 2]
+		v1 = (q1[:, 0] << 11) | (q1[:, 1] << 5) | q1[:, 2]
+
+		# 4 color mode needs c0 > c1
+		swap = v0 < v1
+		q0[swap], q1[swap] = q1[swap], q0[swap].copy()
+		v0, v1 = np.where(swap, v1, v0), np.where(swap, v0, v1)
+
+		p0 = np.stack([(q0[:, 0] << 3) | (q0[:, 0] >> 2), (q0[:, 1] << 2) | (q0[:, 1] >> 4), (q0[:, 2] << 3) | (q0[:, 2] >> 2)], axis=1).astype(np.float32)
+		p1 = np.stack([(q1[:, 0] << 3) | (q1[:, 0] >> 2), (q1[:, 1] << 2) | (q1[:, 1] >> 4), (q1[:, 2] << 3) | (q1[:, 2] >> 2)], axis=1).astype(np.float32)
+		palette = np.stack([p0, p1, (2 * p0 + p1) / 3, (p0 + 2 * p1) / 3], axis=1)
+		indices = nearest_palette_entries(colors, palette)
+
+		# c0 == c1 selects 3 color mode, where index 3 is transparent black
+		indices[v0 == v1] = 0
+
+		if iteration < 2 and quality >= 2:
+			weights = np.array([0, 1, 1 / 3, 2 / 3], dtype=np.float32)[indices]
+			e1, e0 = refit_endpoints(colors, weights, p0, p1)
+
+	decoded = np.take_along_axis(palette, indices[:, :, None], axis=1)
+	bits = (indices.astype(np.uint64) << (2 * np.arange(16, dtype=np.uint64))).sum(axis=1)
+	return [(v0, 16), (v1, 16), (bits, 32)], decoded
+
+def encode_bc4_values(values):
+	"""BC4 (BC3 alpha) block fields of (blocks, 16) values with the 8 value palette, and the decoded values"""
+	import numpy as np
+
+	a0 = np.rint(values.max(axis=1)).astype(np.uint32)
+	a1 = np.rint(values.min(axis=1)).astype(np.uint32)
+	f0, f1 = a0[:, None].astype(np.float32), a1[:, None].astype(np.float32)
+	steps = np.arange(1, 7, dtype=np.float32)
+	palette = np.concatenate([f0, f1, ((7 - steps) * f0 + steps * f1) / 7], axis=1)[:, :, None]
+	indices = nearest_palette_entries(values[:, :, None], palette)
+
+	# a0 == a1 selects the 6 value palette, its first entry is still a0
+	indices[a0 == a1] = 0
+
+	decoded = np.take_along_axis(palette[:, :, 0], indices, axis=1)
+	bits = (indices.astype(np.uint64) << (3 * np.arange(16, dtype=np.uint64))).sum(axis=1)
+	return [(a0, 8), (a1, 8), (bits, 48)], decoded
+
+def encode_bc1(blocks, quality):
+	import numpy as np
+
+	fields, colors = encode_bc1_colors(blocks, quality)
+	return pack_block_bits(fields, 64), np.concatenate([colors, np.full(colors.shape[:2] + (1,), 255, np.float32)], axis=2)
+
+def encode_bc3(blocks, quality):
+	import numpy as np
+
+	alpha_fields, alpha = encode_bc4_values(blocks[:, :, 3])
+	color_fields, colors = encode_bc1_colors(blocks, quality)
+	return pack_block_bits(alpha_fields + color_fields, 128), np.concatenate([colors, alpha[:, :, None]], axis=2)
+
+# Interpolation weights of BC7's 4 bit indices, in 64ths
+BC7_WEIGHTS_4 = (0, 4, 9, 13, 17, 21, 26, 30, 34, 38, 43, 47, 51, 55, 60, 64)
+
+def encode_bc7(blocks, quality):
+	"""BC7 mode 6 only: one RGBA line per block with 7777.1 endpoints and 4 bit indices"""
+	import numpy as np
+
+	weights = np.array(BC7_WEIGHTS_4, dtype=np.int32)
+	e0, e1 = principal_endpoints(blocks, quality)
+
+	def quantize(endpoint):
+		# Pick the shared p-bit that gets the endpoint closest
+		best = None
+
+		for p in (0, 1):
+			q = np.clip(np.rint((endpoint - p) / 2), 0, 127).astype(np.int32)
+			error = (((q * 2 + p) - endpoint) ** 2).sum(axis=1)
+			if best is None:
+				best = (q, np.full(len(q), p, np.int32), error)
+			else:
+				better = error < best[2]
+				best = (np.where(better[:, None], q, best[0]), np.where(better, p, best[1]), np.minimum(error, best[2]))
+
+		return best[0], best[1]
+
+	for iteration in range(3 if quality >= 2 else 1):
+		q0, p0 = quantize(e0)
+		q1, p1 = quantize(e1)
+		c0 = q0 * 2 + p0[:, None]
+		c1 = q1 * 2 + p1[:, None]
+		palette = ((64 - weights[None, :, None]) * c0[:, None, :] + weights[None, :, None] * c1[:, None, :] + 32) >> 6
+		indices = nearest_palette_entries(blocks, palette.astype(np.float32))
+
+		if iteration < 2 and quality >= 2:
+			e0, e1 = refit_endpoints(blocks, weights[indices] / 64.0, c0.astype(np.float32), c1.astype(np.float32))
+
+	decoded = np.take_along_axis(palette, indices[:, :, None], axis=1).astype(np.float32)
+
+	# The first index is stored without its top bit, so it must be below 8
+	swap = indices[:, 0] >= 8
+	q0[swap], q1[swap] = q1[swap], q0[swap].copy()
+	p0, p1 = np.where(swap, p1, p0), np.where(swap, p0, p1)
+	indices[swap] = 15 - indices[swap]
+
+	fields = [(np.full(len(blocks), 1 << 6), 7)]
+	for channel in range(4):
+		fields += [(q0[:, channel], 7), (q1[:, channel], 7)]
+	fields += [(p0, 1), (p1, 1), (indices[:, 0], 3)] + [(indices[:, i], 4) for i in range(1, 16)]
+
+	return pack_block_bits(fields, 128), decoded
+
+# ETC1 intensity modifiers per table, by pixel index
+ETC1_MODIFIERS = ((2, 8, -2, -8), (5, 17, -5, -17), (9, 29, -9, -29), (13, 42, -13, -42),
+	(18, 60, -18, -60), (24, 80, -24, -80), (33, 106, -33, -106), (47, 183, -47, -183))
+
+# EAC (ETC2 alpha) modifiers per table, by pixel index
+EAC_MODIFIERS = (
+	(-3, -6, -9, -15, 2, 5, 8, 14), (-3, -7, -10, -13, 2, 6, 9, 12), (-2, -5, -8, -13, 1, 4, 7, 12), (-2, -4, -6, -13, 1, 3, 5, 12),
+	(-3, -6, -8, -12, 2, 5, 7, 11), (-3, -7, -9, -11, 2, 6, 8, 10), (-4, -7, -8, -11, 3, 6, 7, 10), (-3, -5, -8, -11, 2, 4, 7, 10),
+	(-2, -6, -8, -10, 1, 5, 7, 9), (-2, -5, -8, -10, 1, 4, 7, 9), (-2, -4, -8, -10, 1, 3, 7, 9), (-2, -5, -7, -10, 1, 4, 6, 9),
+	(-3, -4, -7, -10, 2, 3, 6, 9), (-1, -2, -3, -10, 0, 1, 2, 9), (-4, -6, -8, -9, 3, 5, 7, 8), (-3, -5, -7, -9, 2, 4, 6, 8))
+
+def encode_etc2_rgb8(blocks, quality):
+	"""
+	ETC2 RGB blocks using the ETC1 individual and differential modes: two
+	half blocks, side by side or stacked, each a base color plus one of
+	eight intensity modifier tables. Quality 0 only tries side by side
+	halves, quality 2 also tries the individual mode when the differential
+	one would do.
+	"""
+	import numpy as np
+
+	colors = blocks[:, :, :3]
+	count = len(blocks)
+	modifiers = np.array(ETC1_MODIFIERS, dtype=np.float32)
+	x, y = np.arange(16) % 4, np.arange(16) // 4
+	best = None
+
+	for flip in ((0,) if quality == 0 else (0, 1)):
+		# Pixels of each half: columns 0-1 and 2-3, or rows 0-1 and 2-3
+		halves = [np.nonzero((y if flip else x) < 2)[0], np.nonzero((y if flip else x) >= 2)[0]]
+		half_colors = np.stack([colors[:, h] for h in halves], axis=1)  # (blocks, 2, 8, 3)
+		average = half_colors.mean(axis=2)
+
+		q5 = np.clip(np.rint(average * 31 / 255), 0, 31).astype(np.int32)
+		delta = q5[:, 1] - q5[:, 0]
+		differential_ok = ((delta >= -4) & (delta <= 3)).all(axis=1)
+		q4 = np.clip(np.rint(average * 15 / 255), 0, 15).astype(np.int32)
+
+		modes = [(1, (q5 << 3) | (q5 >> 2)), (0, (q4 << 4) | q4)]
+
+		for differential, base in modes:
+			usable = differential_ok if differential else (np.ones(count, bool) if quality >= 2 else ~differential_ok)
+
+			if not usable.any():
+				continue
+
+			# (blocks, 2 halves, 8 tables, 4 modifiers, 3 channels)
+			values = np.clip(base[:, :, None, None, :] + modifiers[None, None, :, :, None], 0, 255)
+			errors = ((half_colors[:, :, None, :, None, :] - values[:, :, :, None, :, :]) ** 2).sum(axis=-1)  # (blocks, 2, 8 tables, 8 pixels, 4)
+			pixel_indices = errors.argmin(axis=-1)
+			table_errors = errors.min(axis=-1).sum(axis=-1)
+			tables = table_errors.argmin(axis=-1)  # (blocks, 2)
+			error = np.where(usable, table_errors.min(axis=-1).sum(axis=-1), np.inf)
+			chosen = np.take_along_axis(pixel_indices, tables[:, :, None, None], axis=2)[:, :, 0]  # (blocks, 2, 8)
+			decoded_halves = np.take_along_axis(
+				np.take_along_axis(values, tables[:, :, None, None, None], axis=2)[:, :, 0][:, :, None],  # (blocks, 2, 1, 4, 3)
+				chosen[:, :, :, None, None], axis=3)[:, :, :, 0]  # (blocks, 2, 8, 3)
+
+			if differential:
+				high = (q5[:, 0, 0] << 27) | ((delta[:, 0] & 7) << 24) | (q5[:, 0, 1] << 19) | ((delta[:, 1] & 7) << 16) | (q5[:, 0, 2] << 11) | ((delta[:, 2] & 7) << 8)
+			else:
+				high = (q4[:, 0, 0] << 28) | (q4[:, 1, 0] << 24) | (q4[:, 0, 1] << 20) | (q4[:, 1, 1] << 16) | (q4[:, 0, 2] << 12) | (q4[:, 1, 2] << 8)
+
+			high = high.astype(np.uint64) | (tables[:, 0].astype(np.uint64) << np.uint64(5)) | (tables[:, 1].astype(np.uint64) << np.uint64(2)) | np.uint64(differential << 1 | flip)
+			low = np.zeros(count, np.uint64)
+			decoded = np.zeros((count, 16, 3), np.float32)
+
+			for half in range(2):
+				for i, pixel in enumerate(halves[half]):
+					bit = np.uint64(x[pixel] * 4 + y[pixel])
+					index = chosen[:, half, i].astype(np.uint64)
+					low |= ((index >> np.uint64(1)) << (bit + np.uint64(16))) | ((index & np.uint64(1)) << bit)
+					decoded[:, pixel] = decoded_halves[:, half, i]
+
+			candidate = ((high << np.uint64(32)) | low, error, decoded)
+
+			if best is None:
+				best = candidate
+			else:
+				better = candidate[1] < best[1]
+				best = (np.where(better, candidate[0], best[0]), np.minimum(candidate[1], best[1]), np.where(better[:, None, None], candidate[2], best[2]))
+
+	words, _, decoded = best
+	return words.astype('>u8').tobytes(), np.concatenate([decoded, np.full((count, 16, 1), 255, np.float32)], axis=2)
+
+def encode_eac_alpha(values, quality):
+	"""EAC alpha blocks (the first half of ETC2 RGBA8 blocks) of (blocks, 16) values as 64 bit words, and the decoded values"""
+	import numpy as np
+
+	modifiers = np.array(EAC_MODIFIERS, dtype=np.float32)
+	count = len(values)
+	low, high = values.min(axis=1), values.max(axis=1)
+	best = None
+
+	for table in range(16):
+		spread = modifiers[table].max() - modifiers[table].min()
+		multiplier = np.clip(np.rint((high - low) / spread), 1, 15)
+		candidates = [(multiplier, np.clip(np.rint((high + low) / 2 - multiplier * (modifiers[table].max() + modifiers[table].min()) / 2), 0, 255))]
+
+		if quality >= 2:
+			candidates += [(np.clip(multiplier + d, 1, 15), candidates[0][1]) for d in (-1, 1)]
+
+		for multiplier, base in candidates:
+			palette = np.clip(base[:, None] + multiplier[:, None] * modifiers[table][None, :], 0, 255)
+			indices = nearest_palette_entries(values[:, :, None], palette[:, :, None])
+			decoded = np.take_along_axis(palette, indices, axis=1)
+			error = ((decoded - values) ** 2).sum(axis=1)
+			candidate = (base, multiplier, np.full(count, table), indices, decoded, error)
+
+			if best is None:
+				best = candidate
+			else:
+				better = error < best[5]
+				best = tuple(np.where(better if c.ndim == 1 else better[:, None], c, b) for c, b in zip(candidate, best))
+
+	base, multiplier, tables, indices, decoded, _ = best
+	words = (base.astype(np.uint64) << np.uint64(56)) | (multiplier.astype(np.uint64) << np.uint64(52)) | (tables.astype(np.uint64) << np.uint64(48))
+
+	# Pixels go column by column, the first one in the highest bits
+	for pixel in range(16):
+		column, row = pixel % 4, pixel // 4
+		words |= indices[:, pixel].astype(np.uint64) << np.uint64(45 - 3 * (column * 4 + row))
+
+	return words, decoded
+
+def encode_etc2_rgba8(blocks, quality):
+	import numpy as np
+
+	alpha_words, alpha = encode_eac_alpha(blocks[:, :, 3], quality)
+	color_data, colors = encode_etc2_rgb8(blocks, quality)
+	color_words = np.frombuffer(color_data, dtype='>u8').astype(np.uint64)
+	colors[:, :, 3] = alpha
+	return np.stack([alpha_words, color_words], axis=1).astype('>u8').tobytes(), colors
@@ -0,0 +1,299 @@
+"""
+-watch: stays resident and redoes the parts of the build that changed
+source and asset files affect, for hot reload and web builds.
+"""
+
+import os
+import time
+
+from . import common, shaders, hot_reload, assets, web
+from .common import Build_Error, IS_LINUX, traced, file_digest
+from .common import locked_print as print
+
+WATCH_DEBOUNCE_SECONDS = 0.15
+
+def watch_hot_reload():
+	"""
+	Stays resident after the first hot reload build and rebuilds on change:
+	shdc for changed shader programs, the game DLL for changed .odin files
+	and a copy of changed assets. The shader graph and file digests stay in
+	memory between rebuilds, so an iteration only pays for the changed parts.
+	"""
+	watch_dirs = ["source", assets.ASSETS_DIR]
+	watcher = create_watcher(watch_dirs)
+
+	# Digests of what the last build saw, so saves that don't change a file's
+	# contents (or editors touching files) don't trigger a rebuild.
+	digests = {}
+
+	for root, dirs, files in os.walk("source"):
+		for file in files:
+			if file.endswith(".odin"):
+				path = os.path.normpath(os.path.join(root, file))
+				digests[path] = file_digest(path)
+
+	print("Watching %s for changes (%s). Press Ctrl+C to stop." % (" and ".join(watch_dirs), watcher.name))
+
+	try:
+		while True:
+			changed = wait_for_changes(watcher)
+			start = time.perf_counter()
+
+			if rebuild_changed(changed, digests):
+				print("Rebuilt in %.2fs" % (time.perf_counter() - start))
+	except KeyboardInterrupt:
+		print("\nStopped watching.")
+	finally:
+		watcher.close()
+
+def create_watcher(watch_dirs):
+	if IS_LINUX:
+		try:
+			return Inotify_Watcher(watch_dirs)
+		except OSError as e:
+			print(f"inotify unavailable ({e}), falling back to polling")
+
+	return Polling_Watcher(watch_dirs)
+
+def wait_for_changes(watcher):
+	"""Blocks until something changed, then returns the set of changed paths"""
+	changed = watcher.wait(None)
+
+	# Debounce: editors often write several files (or one file several
+	# times) per save. Keep collecting until things go quiet.
+	while True:
+		more = watcher.wait(WATCH_DEBOUNCE_SECONDS)
+		if not more:
+			break
+		changed |= more
+
+	return changed
+
+def watch_web():
+	"""
+	Rebuilds the web build whenever a source file or asset changes. Pages
+	served by the web dev server reload after every successful rebuild.
+	"""
+	watch_dirs = ["source", assets.ASSETS_DIR]
+	watcher = create_watcher(watch_dirs)
+	print("Watching %s for changes (%s). Press Ctrl+C to stop." % (" and ".join(watch_dirs), watcher.name))
+
+	def is_input(path):
+		name = os.path.basename(path)
+
+		# gen__ files and .preprocessed files are written by build_shaders itself
+		if name.startswith("gen__"):
+			return False
+
+		return os.path.normpath(path).startswith(os.path.normpath(assets.ASSETS_DIR) + os.sep) or name.endswith((".odin", ".glsl", ".html", ".js"))
+
+	try:
+		while True:
+			changed = [p for p in wait_for_changes(watcher) if is_input(p)]
+
+			if not changed:
+				continue
+
+			start = time.perf_counter()
+
+			try:
+				web.build_web()
+				print("Rebuilt in %.2fs" % (time.perf_counter() - start))
+			except Build_Error as e:
+				print(e)
+				print("Build failed, waiting for changes...")
+	except KeyboardInterrupt:
+		print("\nStopped watching.")
+	finally:
+		watcher.close()
+
+@traced
+def rebuild_changed(changed, digests):
+	"""Does the minimal rebuild for a set of changed paths. Returns True if anything was done."""
+	shaders_changed = False
+	dll_changed = False
+	assets_changed = []
+
+	for path in sorted(changed):
+		path = os.path.normpath(path)
+		name = os.path.basename(path)
+
+		if path.startswith(os.path.normpath(assets.ASSETS_DIR) + os.sep):
+			assets_changed.append(path)
+		elif name.startswith("gen__"):
+			# Written by build_shaders itself, handled below
+			continue
+		elif name.endswith(".glsl"):
+			shaders_changed = True
+		elif name.endswith(".odin"):
+			digest = file_digest(path) if os.path.isfile(path) else None
+
+			if digests.get(path) == digest:
+				continue
+
+			if digest is None:
+				digests.pop(path, None)
+			else:
+				digests[path] = digest
+
+			if path.startswith(os.path.normpath("source/lib/main_hot_reload")):
+				print(f"{path} changed: restart the game to pick up changes to the hot reload executable")
+				continue
+
+			dll_changed = True
+
+	if not (shaders_changed or dll_changed or assets_changed):
+		return False
+
+	try:
+		if shaders_changed and not common.args.no_shader_compile:
+			if shaders.build_shaders():
+				dll_changed = True
+
+		if dll_changed:
+			hot_reload.build_hot_reload_dll()
+	except Build_Error as e:
+		# In watch mode a failed build is reported and we keep watching
+		print(e)
+		print("Build failed, waiting for changes...")
+		return True
+
+	if assets_changed:
+		# Re-cook first, the game prefers the cooked files over the .glb.
+		# cook_assets also removes the cooked files of deleted GLBs, which
+		# may have gone with a deleted directory.
+		if common.args.cook_assets and any(path.lower().endswith(".glb") or os.path.isdir(path) or not os.path.exists(path) for path in assets_changed):
+			assets.cook_assets()
+
+		# The manifest makes this only copy what changed, and keeps it in step
+		# with the files in the build
+		assets.sync_assets(assets.asset_source_dirs(), hot_reload.HOT_RELOAD_DIR + "/assets")
+
+	return True
+
+class Polling_Watcher:
+	"""Portable watcher that compares (mtime, size) snapshots of the watched trees"""
+	name = "polling"
+	interval = 0.25
+
+	def __init__(self, dirs):
+		self.dirs = dirs
+		self.snapshot = self.scan()
+
+	def scan(self):
+		snapshot = {}
+
+		for d in self.dirs:
+			for root, dirs, files in os.walk(d):
+				for file in files:
+					path = os.path.join(root, file)
+					try:
+						st = os.stat(path)
+					except FileNotFoundError:
+						continue
+					snapshot[path] = (st.st_mtime_ns, st.st_size)
+
+		return snapshot
+
+	def wait(self, timeout):
+		"""Blocks until something changed or timeout (None = forever) passed. Returns the changed paths."""
+		deadline = None if timeout is None else time.monotonic() + timeout
+
+		while True:
+			snapshot = self.scan()
+			changed = {p for p in snapshot.keys() | self.snapshot.keys() if snapshot.get(p) != self.snapshot.get(p)}
+			self.snapshot = snapshot
+
+			if changed:
+				return changed
+
+			if deadline is not None and time.monotonic() >= deadline:
+				return set()
+
+			time.sleep(self.interval if deadline is None else min(self.interval, max(0, deadline - time.monotonic())))
+
+	def close(self):
+		pass
+
+class Inotify_Watcher:
+	"""Linux watcher using inotify through ctypes. inotify is not recursive, so every directory gets its own watch."""
+	name = "inotify"
+
+	IN_MODIFY      = 0x00000002
+	IN_CLOSE_WRITE = 0x00000008
+	IN_MOVED_FROM  = 0x00000040
+	IN_MOVED_TO    = 0x00000080
+	IN_CREATE      = 0x00000100
+	IN_DELETE      = 0x00000200
+	IN_ISDIR       = 0x40000000
+	IN_NONBLOCK    = 0x00000800
+	IN_CLOEXEC     = 0x00080000
+
+	def __init__(self, dirs):
+		import ctypes
+		import ctypes.util
+
+		self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+		self.fd = self.libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+
+		if self.fd < 0:
+			raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+		self.watches = {}  # watch descriptor -> directory
+
+		for d in dirs:
+			for root, subdirs, files in os.walk(d):
+				self.add_watch(root)
+
+	def add_watch(self, path):
+		import ctypes
+
+		mask = self.IN_CLOSE_WRITE | self.IN_MOVED_FROM | self.IN_MOVED_TO | self.IN_CREATE | self.IN_DELETE
+		wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+
+		if wd < 0:
+			raise OSError(ctypes.get_errno(), "inotify_add_watch failed for " + path)
+
+		self.watches[wd] = path
+
+	def wait(self, timeout):
+		"""Blocks until events arrived or timeout (None = forever) passed. Returns the changed paths."""
+		import select
+		import struct
+
+		ready, _, _ = select.select([self.fd], [], [], timeout)
+
+		if not ready:
+			return set()
+
+		try:
+			data = os.read(self.fd, 64 * 1024)
+		except BlockingIOError:
+			return set()
+
+		changed = set()
+		offset = 0
+
+		while offset < len(data):
+			wd, mask, cookie, length = struct.unpack_from("iIII", data, offset)
+			offset += 16
+			name = data[offset:offset + length].rstrip(b"\0")
+			offset += length
+
+			directory = self.watches.get(wd)
+			if directory is None:
+				continue
+
+			path = os.path.join(directory, os.fsdecode(name))
+			changed.add(path)
+
+			if mask & self.IN_ISDIR and mask & (self.IN_CREATE | self.IN_MOVED_TO):
+				# New directory: watch it and report whatever was already put in it
+				for root, subdirs, files in os.walk(path):
+					self.add_watch(root)
+					changed.update(os.path.join(root, f) for f in files)
+
+		return changed
+
+	def close(self):
+		os.close(self.fd)
@@ -0,0 +1,627 @@
+"""
+Web builds with emscripten, lazily loaded asset bundles, the
+content-hashed -web-deploy files and the dev server `-web -run` uses.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import glob
+import re
+
+from . import common, tasks, watch, assets
+from .common import (
+	Build_Error, IS_WINDOWS, IS_OSX, IS_LINUX, traced, build_entry_point, file_digest, format_bytes,
+	make_dirs)
+from .common import locked_print as print
+
+ASSET_BUNDLES_MANIFEST = "asset_bundles.json"
+WEB_BUNDLE_STAGING_DIR = "build/web_bundles"
+BOOT_ASSET_BUNDLE = "boot"
+DEFAULT_ASSET_BUNDLE = "default"
+
+def assign_asset_bundles(manifest, sources):
+	"""
+	Maps every asset path (as the game asks for it, e.g. 'assets/Tinker.glb')
+	to a bundle name. Patterns in the manifest are fnmatch patterns relative
+	to assets/. Cooked files go where their .glb goes, and cooked files shared
+	by several GLBs go to the boot bundle if one of them is in it, else to
+	their bundle if they all are in the same one. Assets not matched by any
+	pattern end up in the default bundle.
+	"""
+	import fnmatch
+
+	bundles = {BOOT_ASSET_BUNDLE: manifest.get("boot", [])}
+	bundles.update(manifest.get("on_demand", {}))
+
+	for name in bundles:
+		if not re.fullmatch(r"[A-Za-z0-9_\-]+", name) or name == DEFAULT_ASSET_BUNDLE:
+			raise Build_Error(f"Invalid asset bundle name '{name}' in {ASSET_BUNDLES_MANIFEST}")
+
+	assignment = {}
+
+	for path in sources:
+		rel = path[len("assets/"):]
+		stem, ext = os.path.splitext(rel)
+		candidates = [rel] if ext == ".glb" else [rel, stem + ".glb"]
+		assignment[path] = DEFAULT_ASSET_BUNDLE
+
+		for name, patterns in bundles.items():
+			if any(fnmatch.fnmatchcase(c, p) for c in candidates for p in patterns):
+				assignment[path] = name
+				break
+
+	referrers = {}
+
+	for path, src in sources.items():
+		if os.path.splitext(path)[1] in (".mesh", ".tex"):
+			target = assets.read_cooked_reference(src)
+
+			if target is not None:
+				referrers.setdefault(target, set()).add(assignment[path])
+
+	for target, names in referrers.items():
+		if target in assignment:
+			if BOOT_ASSET_BUNDLE in names:
+				assignment[target] = BOOT_ASSET_BUNDLE
+			elif len(names) == 1:
+				assignment[target] = next(iter(names))
+			else:
+				assignment[target] = DEFAULT_ASSET_BUNDLE
+
+	return assignment
+
+def find_file_packager():
+	if common.args.emsdk_path is not None:
+		return os.path.join(common.args.emsdk_path, "upstream", "emscripten", "tools", "file_packager.py")
+
+	emcc = shutil.which("emcc")
+
+	if emcc is None:
+		return None
+
+	return os.path.join(os.path.dirname(os.path.realpath(emcc)), "tools", "file_packager.py")
+
+@traced
+def build_web_asset_bundles(out_dir):
+	"""
+	Packages the assets into one emscripten data package per bundle of
+	asset_bundles.json: out_dir/<name>.data plus a <name>.data.js loader.
+
+	The boot bundle's loader is returned, together with a small script that
+	tells index.html which bundles to fetch in the background, so they can
+	be passed to emcc as --pre-js. Every other bundle is only downloaded when
+	index.html runs loadAssetBundle(name), either by itself for the default
+	bundle or when the game calls request_asset_bundle. Each bundle includes
+	the file bundles/<name>, which the game checks to see if it has arrived.
+	"""
+	import json
+
+	with open(ASSET_BUNDLES_MANIFEST, 'r', encoding='utf-8') as f:
+		manifest = json.load(f)
+
+	sources = assets.asset_pack_sources(assets.asset_source_dirs())
+	assignment = assign_asset_bundles(manifest, sources)
+	names = sorted(set(assignment.values()) | {BOOT_ASSET_BUNDLE})
+
+	file_packager = find_file_packager()
+
+	if file_packager is None or not os.path.exists(file_packager):
+		raise Build_Error("Could not find emscripten's file_packager.py, it is needed to build the asset bundles from %s." % ASSET_BUNDLES_MANIFEST)
+
+	if os.path.exists(WEB_BUNDLE_STAGING_DIR):
+		shutil.rmtree(WEB_BUNDLE_STAGING_DIR)
+
+	for stale in glob.glob(os.path.join(out_dir, "*.data")) + glob.glob(os.path.join(out_dir, "*.data.js")):
+		os.remove(stale)
+
+	sizes = {}
+
+	for name in names:
+		stage_dir = os.path.join(WEB_BUNDLE_STAGING_DIR, name)
+		make_dirs(os.path.join(stage_dir, "bundles"))
+
+		with open(os.path.join(stage_dir, "bundles", name), 'w') as f:
+			f.write(name)
+
+		files = [path for path, bundle in sorted(assignment.items()) if bundle == name]
+
+		for path in files:
+			dest = os.path.join(stage_dir, path)
+			make_dirs(os.path.dirname(dest))
+			assets.link_or_copy(sources[path], dest)
+
+		data_path = os.path.join(out_dir, name + ".data")
+		js_path = os.path.join(WEB_BUNDLE_STAGING_DIR if name == BOOT_ASSET_BUNDLE else out_dir, name + ".data.js")
+		tasks.execute(emscripten_command("%s %s %s --preload %s@/ --js-output=%s" % (sys.executable, file_packager, data_path, stage_dir, js_path)))
+		sizes[name] = (len(files), os.path.getsize(data_path))
+
+	background = [name for name in names if name == DEFAULT_ASSET_BUNDLE]
+	bundles_js = os.path.join(WEB_BUNDLE_STAGING_DIR, "asset_bundles.js")
+
+	with open(bundles_js, 'w') as f:
+		f.write("Module['backgroundAssetBundles'] = %s;\n" % json.dumps(background))
+
+	print("Asset bundles:")
+	for name in names:
+		count, size = sizes[name]
+		when = "before main" if name == BOOT_ASSET_BUNDLE else ("background" if name in background else "on demand")
+		print(f"  {name:<16} {count:>4} assets {format_bytes(size):>10}  ({when})")
+
+	return [os.path.join(WEB_BUNDLE_STAGING_DIR, BOOT_ASSET_BUNDLE + ".data.js"), bundles_js]
+
+@build_entry_point
+@traced
+def build_web():
+	"""Builds the game with emscripten into build/web. Returns that directory."""
+	graph = tasks.new_build_graph()
+	out_dir = "build/web"
+	make_dirs(out_dir)
+	remove_web_deploy_files(out_dir)
+
+	odin_extra_args = ""
+
+	if common.args.debug:
+		odin_extra_args += " -debug"
+
+	def build_game_object():
+		print("Building js_wasm32 game object...")
+		tasks.execute("odin build source/lib/main_web -target:js_wasm32 -build-mode:obj -vet -strict-style -out:%s/game %s" % (out_dir, odin_extra_args))
+
+	graph.add("wasm", build_game_object, inputs=["source"], outputs=["%s/game.wasm.o" % out_dir])
+
+	odin_path = subprocess.run(["odin", "root"], capture_output=True, text=True).stdout
+
+	shutil.copyfile(os.path.join(odin_path, "core/sys/wasm/js/odin.js"), os.path.join(out_dir, "odin.js"))
+	os.environ["EMSDK_QUIET"] = "1"
+
+	wasm_lib_suffix = "debug.a" if common.args.debug else "release.a"
+
+	emcc_files = [
+		"%s/game.wasm.o" % out_dir,
+		"source/lib/sokol/app/sokol_app_wasm_gl_" + wasm_lib_suffix,
+		"source/lib/sokol/glue/sokol_glue_wasm_gl_" + wasm_lib_suffix,
+		"source/lib/sokol/gfx/sokol_gfx_wasm_gl_" + wasm_lib_suffix,
+		"source/lib/sokol/shape/sokol_shape_wasm_gl_" + wasm_lib_suffix,
+		"source/lib/sokol/log/sokol_log_wasm_gl_" + wasm_lib_suffix,
+		"source/lib/sokol/gl/sokol_gl_wasm_gl_" + wasm_lib_suffix,
+	]
+
+	emcc_files_str = " ".join(emcc_files)
+	pre_js = []
+
+	if os.path.exists(ASSET_BUNDLES_MANIFEST):
+		# Assets are split into bundles (see asset_bundles.json). Only the boot
+		# bundle is loaded before main runs, the others are fetched later.
+		graph.add("bundles", lambda: pre_js.extend(build_web_asset_bundles(out_dir)), inputs=assets.asset_source_dirs(), outputs=[WEB_BUNDLE_STAGING_DIR])
+		preload_files = "-sFORCE_FILESYSTEM=1 -sEXPORTED_RUNTIME_METHODS=FS_createPath,FS_createDataFile,FS_createPreloadedFile,addRunDependency,removeRunDependency"
+	else:
+		# Note --preload-file assets, this bakes in the whole assets directory into
+		# the web build. Cooked assets are overlaid into the same virtual directory.
+		preload_files = "--preload-file assets"
+
+		if common.args.cook_assets:
+			preload_files += " --preload-file %s@assets" % assets.COOKED_ASSETS_DIR
+
+	emcc_flags = "--shell-file source/lib/web/index_template.html " + preload_files + " -sWASM_BIGINT -sWARN_ON_UNDEFINED_SYMBOLS=0 -sMAX_WEBGL_VERSION=2 -sASSERTIONS -sALLOW_MEMORY_GROWTH=1 -sINITIAL_HEAP=16777216 -sSTACK_SIZE=65536"
+
+	build_flags = ""
+
+	# -g is the emcc debug flag, it makes the errors in the browser console better.
+	if common.args.debug:
+		build_flags += " -g "
+
+	def link():
+		# The bundles' loaders are only known once the bundles task ran
+		emcc_command = "emcc %s -o %s/index.html %s %s" % (build_flags, out_dir, emcc_files_str, "".join("--pre-js %s " % js for js in pre_js) + emcc_flags)
+
+		print("Building web application using emscripten to %s..." % out_dir)
+		tasks.execute(emscripten_command(emcc_command))
+
+	# emcc reads the game object and the asset bundles' loaders
+	graph.add("emcc", link, inputs=["%s/game.wasm.o" % out_dir, WEB_BUNDLE_STAGING_DIR, assets.COOKED_ASSETS_DIR])
+	graph.run()
+
+	# Not needed
+	os.remove(os.path.join(out_dir, "game.wasm.o"))
+
+	if common.args.web_deploy:
+		prepare_web_deploy(out_dir)
+
+	if WEB_DEV_SERVER is not None:
+		WEB_DEV_SERVER.notify_reload()
+	
+	# Return the build directory so -run can work with web builds
+	return out_dir
+
+# Web build files that -web-deploy gives content-hashed names. index.html is
+# the page that is opened and keeps its name.
+WEB_HASHED_EXTENSIONS = (".js", ".wasm", ".data")
+WEB_HASH_LENGTH = 12
+
+# Files -web-deploy added to the web build, removed before the next one
+WEB_DEPLOY_MANIFEST = "build/web_deploy_files.json"
+
+def remove_web_deploy_files(out_dir):
+	"""Removes the hashed files and compressed siblings of an earlier -web-deploy build"""
+	import json
+
+	if not os.path.exists(WEB_DEPLOY_MANIFEST):
+		return
+
+	with open(WEB_DEPLOY_MANIFEST, 'r', encoding='utf-8') as f:
+		names = json.load(f)
+
+	for name in names:
+		path = os.path.join(out_dir, name)
+
+		if os.path.isfile(path):
+			os.remove(path)
+
+	os.remove(WEB_DEPLOY_MANIFEST)
+
+@traced
+def prepare_web_deploy(out_dir):
+	"""
+	Post-link stage of -web-deploy. Renames the .js, .wasm and .data files
+	to <name>.<content hash>.<ext>, so a server can let browsers cache them
+	forever, and writes the new names into index.html. The page's
+	locateWebFile looks files up there, which also covers everything
+	emscripten and the bundle loaders fetch. Then every file gets maximum
+	level .gz and .br siblings, compressed on a process pool.
+	"""
+	import json
+
+	renamed = {}
+
+	for name in sorted(os.listdir(out_dir)):
+		path = os.path.join(out_dir, name)
+
+		if not os.path.isfile(path) or not name.endswith(WEB_HASHED_EXTENSIONS):
+			continue
+
+		stem, ext = name.split(".", 1)
+		hashed = "%s.%s.%s" % (stem, file_digest(path)[:WEB_HASH_LENGTH], ext)
+		os.replace(path, os.path.join(out_dir, hashed))
+		renamed[name] = hashed
+
+	index_path = os.path.join(out_dir, "index.html")
+
+	with open(index_path, 'r', encoding='utf-8') as f:
+		html = f.read()
+
+	# Script tags are rewritten, anything fetched from code goes through locateWebFile
+	for name, hashed in renamed.items():
+		html = re.sub(r'(src\s*=\s*["\'])%s(["\'])' % re.escape(name), lambda m: m.group(1) + hashed + m.group(2), html)
+
+	names_script = "<script>var webFileNames = %s;</script>\n" % json.dumps(renamed, sort_keys=True)
+	head_end = html.find("</head>")
+	html = html[:head_end] + names_script + html[head_end:] if head_end != -1 else names_script + html
+
+	with open(index_path, 'w', encoding='utf-8') as f:
+		f.write(html)
+
+	try:
+		import brotli
+		with_brotli = True
+	except ImportError:
+		with_brotli = False
+		print("The brotli module is not installed, only writing .gz files (pip install brotli)")
+
+	from concurrent.futures import ProcessPoolExecutor
+	import multiprocessing
+
+	files = sorted(renamed.values()) + ["index.html"]
+	paths = [os.path.join(out_dir, name) for name in files]
+
+	# Spawned rather than forked, like the cook_assets workers: with -run the
+	# web dev server's threads may hold locks when this starts
+	with ProcessPoolExecutor(max_workers=max(1, min(common.args.j, len(files))), mp_context=multiprocessing.get_context("spawn")) as pool:
+		sizes = list(pool.map(precompress_web_file, paths, [with_brotli] * len(paths)))
+
+	written = list(renamed.values())
+
+	for name in files:
+		written += [name + ".gz"] + ([name + ".br"] if with_brotli else [])
+
+	with open(WEB_DEPLOY_MANIFEST, 'w', encoding='utf-8') as f:
+		json.dump(written, f, indent=1)
+
+	print("Web build files:")
+	print(f"  {'file':<36} {'raw':>10} {'gzip':>10} {'brotli':>10}")
+	total_raw = total_gz = total_br = 0
+
+	for name, (raw, gz, br) in zip(files, sizes):
+		print(f"  {name:<36} {format_bytes(raw):>10} {format_bytes(gz):>10} {format_bytes(br) if with_brotli else '-':>10}")
+		total_raw += raw
+		total_gz += gz
+		total_br += br
+
+	print(f"  {'total':<36} {format_bytes(total_raw):>10} {format_bytes(total_gz):>10} {format_bytes(total_br) if with_brotli else '-':>10}")
+	common.TRACE.note(files=len(files), raw_bytes=total_raw, gzip_bytes=total_gz, brotli_bytes=total_br)
+
+def precompress_web_file(path, with_brotli):
+	"""Writes path.gz, and path.br if with_brotli, at maximum compression. Returns the (raw, gzip, brotli) sizes."""
+	import gzip
+
+	with open(path, 'rb') as f:
+		data = f.read()
+
+	# mtime=0 keeps the .gz of an unchanged file byte-identical
+	gz = gzip.compress(data, compresslevel=9, mtime=0)
+
+	with open(path + ".gz", 'wb') as f:
+		f.write(gz)
+
+	br_size = 0
+
+	if with_brotli:
+		import brotli
+
+		br = brotli.compress(data, quality=11)
+
+		with open(path + ".br", 'wb') as f:
+			f.write(br)
+
+		br_size = len(br)
+
+	return len(data), len(gz), br_size
+
+# Served under every web build, pages get a snippet that listens to it
+WEB_LIVE_RELOAD_PATH = "/__live_reload"
+WEB_LIVE_RELOAD_SNIPPET = b'<script>new EventSource("%s").onmessage = function() { location.reload(); };</script>' % WEB_LIVE_RELOAD_PATH.encode()
+WEB_LIVE_RELOAD_HEARTBEAT_SECONDS = 15
+
+WEB_CONTENT_TYPES = {
+	".html": "text/html; charset=utf-8",
+	".js": "text/javascript",
+	".wasm": "application/wasm",
+	".data": "application/octet-stream",
+	".json": "application/json",
+	".css": "text/css",
+	".png": "image/png",
+	".ico": "image/x-icon",
+}
+
+# Precompressed siblings of a file, in order of preference
+WEB_CONTENT_ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+# The dev server running in this process, if any. build_web tells it when a build is done.
+WEB_DEV_SERVER = None
+
+class Web_Dev_Server:
+	"""
+	Serves a web build from threads of this process. Files are served
+	from their .br or .gz sibling when the browser accepts that encoding,
+	with ETags so unchanged files are answered with 304. HTML pages get a
+	snippet that reloads them when notify_reload() is called.
+	"""
+	def __init__(self, root, port):
+		import http.server
+
+		self.root = os.path.abspath(root)
+		self.reload_generation = 0
+		self.reload_condition = threading.Condition()
+		self.closed = False
+		handler = web_dev_request_handler(self)
+
+		try:
+			self.httpd = http.server.ThreadingHTTPServer(("", port), handler)
+		except OSError:
+			# Port taken: let the OS pick a free one right away instead of probing
+			self.httpd = http.server.ThreadingHTTPServer(("", 0), handler)
+
+		self.httpd.daemon_threads = True
+		self.port = self.httpd.server_address[1]
+		self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+		self.thread.start()
+
+	def notify_reload(self):
+		with self.reload_condition:
+			self.reload_generation += 1
+			self.reload_condition.notify_all()
+
+	def close(self):
+		with self.reload_condition:
+			self.closed = True
+			self.reload_condition.notify_all()
+
+		self.httpd.shutdown()
+		self.httpd.server_close()
+
+def web_dev_request_handler(server):
+	import http.server
+	import mimetypes
+	import urllib.parse
+
+	class Handler(http.server.BaseHTTPRequestHandler):
+		protocol_version = "HTTP/1.1"
+
+		def log_message(self, format, *a):
+			pass
+
+		def do_GET(self):
+			self.serve(send_body=True)
+
+		def do_HEAD(self):
+			self.serve(send_body=False)
+
+		def serve(self, send_body):
+			path = urllib.parse.unquote(urllib.parse.urlsplit(self.path).path)
+
+			if path == WEB_LIVE_RELOAD_PATH:
+				self.serve_live_reload()
+				return
+
+			if path.endswith("/"):
+				path += "index.html"
+
+			file_path = os.path.realpath(os.path.join(server.root, path.lstrip("/")))
+
+			if not file_path.startswith(server.root + os.sep) or not os.path.isfile(file_path):
+				self.send_error(404)
+				return
+
+			ext = os.path.splitext(file_path)[1]
+			content_type = WEB_CONTENT_TYPES.get(ext) or mimetypes.guess_type(file_path)[0] or "application/octet-stream"
+			is_html = ext == ".html"
+			served_path = file_path
+			encoding = None
+
+			# HTML is small and gets the live reload snippet, so it's never precompressed
+			if not is_html:
+				accepted = set()
+
+				for part in self.headers.get("Accept-Encoding", "").split(","):
+					name, _, params = part.strip().partition(";")
+
+					if params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+						accepted.add(name.strip().lower())
+
+				mtime = os.path.getmtime(file_path)
+
+				for name, suffix in WEB_CONTENT_ENCODINGS:
+					# A sibling older than the file is left over from an earlier build
+					if name in accepted and os.path.isfile(file_path + suffix) and os.path.getmtime(file_path + suffix) >= mtime:
+						served_path = file_path + suffix
+						encoding = name
+						break
+
+			st = os.stat(served_path)
+			etag = '"%x-%x%s"' % (st.st_mtime_ns, st.st_size, "-" + (encoding or ("live" if is_html else "id")))
+
+			if etag in [t.strip() for t in self.headers.get("If-None-Match", "").split(",")]:
+				self.send_response(304)
+				self.send_header("ETag", etag)
+				self.send_header("Vary", "Accept-Encoding")
+				self.send_header("Cache-Control", "no-cache")
+				self.end_headers()
+				return
+
+			body = None
+
+			if is_html:
+				with open(served_path, 'rb') as f:
+					body = f.read()
+
+				if b"</body>" in body:
+					body = body.replace(b"</body>", WEB_LIVE_RELOAD_SNIPPET + b"</body>", 1)
+				else:
+					body += WEB_LIVE_RELOAD_SNIPPET
+
+			self.send_response(200)
+			self.send_header("Content-Type", content_type)
+			self.send_header("Content-Length", str(len(body) if body is not None else st.st_size))
+			self.send_header("ETag", etag)
+			self.send_header("Vary", "Accept-Encoding")
+			# Revalidate every time: builds change files under the same names
+			self.send_header("Cache-Control", "no-cache")
+
+			if encoding:
+				self.send_header("Content-Encoding", encoding)
+
+			self.end_headers()
+
+			if not send_body:
+				return
+
+			if body is not None:
+				self.wfile.write(body)
+			else:
+				with open(served_path, 'rb') as f:
+					shutil.copyfileobj(f, self.wfile)
+
+		def serve_live_reload(self):
+			"""Server-Sent Events: one "reload" event per finished build, comments in between to notice closed pages"""
+			self.send_response(200)
+			self.send_header("Content-Type", "text/event-stream")
+			self.send_header("Cache-Control", "no-cache")
+			self.end_headers()
+			self.close_connection = True
+
+			with server.reload_condition:
+				seen = server.reload_generation
+
+			try:
+				while True:
+					with server.reload_condition:
+						server.reload_condition.wait_for(lambda: server.reload_generation != seen or server.closed, timeout=WEB_LIVE_RELOAD_HEARTBEAT_SECONDS)
+						generation = server.reload_generation
+
+					if server.closed:
+						return
+
+					if generation != seen:
+						seen = generation
+						self.wfile.write(b"data: reload\n\n")
+					else:
+						self.wfile.write(b": ping\n\n")
+
+					self.wfile.flush()
+			except OSError:
+				# The page was closed or reloaded
+				pass
+
+	return Handler
+
+def serve_web(out_dir):
+	"""
+	Serves a web build on -port (or a free port if that one is taken) and
+	opens it in the browser. With -watch, rebuilds on changes and reloads
+	the page. Runs until Ctrl+C.
+	"""
+	global WEB_DEV_SERVER
+	import webbrowser
+
+	server = Web_Dev_Server(out_dir, common.args.port)
+	WEB_DEV_SERVER = server
+
+	if server.port != common.args.port:
+		print(f"Port {common.args.port} is in use, using port {server.port}")
+
+	url = f"http://localhost:{server.port}/index.html"
+	print(f"Opening {url} in browser...")
+	webbrowser.open(url)
+	print(f"Server running at {url}")
+
+	try:
+		if common.args.watch:
+			watch.watch_web()
+		else:
+			print("Press Ctrl+C to stop the server")
+
+			while server.thread.is_alive():
+				server.thread.join(1)
+	except KeyboardInterrupt:
+		print("\nStopping server...")
+	finally:
+		WEB_DEV_SERVER = None
+		server.close()
+
+def emscripten_command(cmd):
+	"""Wraps cmd so it runs with the emscripten SDK environment from -emsdk-path, or checks emcc is in PATH"""
+	emsdk_env = get_emscripten_env_command()
+
+	if emsdk_env:
+		if IS_WINDOWS:
+			return emsdk_env + " && " + cmd
+		else:
+			return "bash -c \"" + emsdk_env + " && " + cmd.replace('"', '\\"') + "\""
+
+	if shutil.which("emcc") is None:
+		raise Build_Error("Could not find emcc. Try providing emscripten SDK path using '-emsdk-path PATH' or run the emsdk_env script inside the emscripten folder before running this script.")
+
+	return cmd
+
+def get_emscripten_env_command():
+	if common.args.emsdk_path is None:
+		return None
+
+	if IS_WINDOWS:
+		return os.path.join(common.args.emsdk_path, "emsdk_env.bat")
+	elif IS_LINUX or IS_OSX:
+		return "source " + os.path.join(common.args.emsdk_path, "emsdk_env.sh")
+
+	return None
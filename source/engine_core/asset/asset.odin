@@ -103,7 +103,8 @@ load_mesh_from_glb_data :: proc(glb_data : ^glTF2.Data) -> Mesh {
 			idx_accessor_idx, _ := primitive.indices.?
 			accessor := glb_data.accessors[idx_accessor_idx]
 
-			component_size := size_of(u16)
+			// Indices stay in the width they were exported with, the renderer handles both
+			component_size := accessor.component_type == .Unsigned_Int ? size_of(u32) : size_of(u16)
 
 			buffer_index, _ := accessor.buffer_view.?
 			buffer_view := glb_data.buffer_views[buffer_index]
@@ -118,6 +119,7 @@ load_mesh_from_glb_data :: proc(glb_data : ^glTF2.Data) -> Mesh {
 			loaded_mesh_data.index_buffer_bytes = make([]byte, len(index_data_slice))
 			copy(loaded_mesh_data.index_buffer_bytes, index_data_slice)
 			loaded_mesh_data.index_count = int(accessor.count)
+			loaded_mesh_data.index_size  = component_size
 		} else {
 			fmt.println("Primitive has no indices defined.")
 		}
@@ -211,7 +213,16 @@ load_texture_from_glb_data :: proc(glb_data : ^glTF2.Data) -> Texture {
 }
 
 load_glb_data_from_file :: proc(path : string) -> ^glTF2.Data {
-	glb_data, error := glTF2.load_from_file(path)
+	glb_data : ^glTF2.Data
+	error    : glTF2.Error
+
+	// Parse straight from the asset pack if there is one. parse copies the
+	// buffers it keeps, so the pack data is left alone.
+	if packed, in_pack := find_packed_asset(path); in_pack {
+		glb_data, error = glTF2.parse(packed, { is_glb = true, delete_content = false })
+	} else {
+		glb_data, error = glTF2.load_from_file(path)
+	}
 
 	switch err_val in error {
 		case glTF2.GLTF_Error:
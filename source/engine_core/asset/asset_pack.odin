@@ -0,0 +1,127 @@
+package asset
+
+import "core:fmt"
+import "core:hash"
+import "core:mem"
+import "core:slice"
+import "core:strings"
+
+import utils "../../lib/sokol_utils"
+
+ASSET_PACK_PATH :: "assets.pack"
+
+// The pack made by `build.py -release -pack-assets`. It is read once and
+// every asset in it is a slice of that one allocation, which lives until
+// the game exits.
+Asset_Pack :: struct {
+	data    : []byte,
+	entries : []Asset_Pack_Entry,
+}
+
+asset_pack : Asset_Pack
+
+// Opens the asset pack if there is one. Builds without -pack-assets have no
+// pack, then assets keep being read from the loose files.
+open_asset_pack :: proc(path := ASSET_PACK_PATH) -> bool {
+	data, read_ok := utils.read_entire_file(path)
+	if !read_ok {
+		return false
+	}
+
+	header : Asset_Pack_Header
+	if len(data) < size_of(Asset_Pack_Header) {
+		fmt.printfln("Asset pack %s is truncated", path)
+		delete(data)
+		return false
+	}
+	mem.copy(&header, raw_data(data), size_of(Asset_Pack_Header))
+
+	if string(header.magic[:]) != ASSET_PACK_MAGIC || header.version != ASSET_PACK_VERSION {
+		fmt.printfln("Asset pack %s has an unsupported format (version %d)", path, header.version)
+		delete(data)
+		return false
+	}
+
+	toc_end := int(header.toc_offset) + int(header.entry_count) * size_of(Asset_Pack_Entry)
+	if toc_end > len(data) {
+		fmt.printfln("Asset pack %s has its table of contents outside of the file", path)
+		delete(data)
+		return false
+	}
+
+	// Copy the TOC out so entries don't depend on the alignment of the file data
+	entries := make([]Asset_Pack_Entry, header.entry_count)
+	mem.copy(raw_data(entries), &data[header.toc_offset], len(entries) * size_of(Asset_Pack_Entry))
+
+	asset_pack = Asset_Pack{ data = data, entries = entries }
+	fmt.printfln("Opened asset pack %s: %d assets", path, len(entries))
+
+	return true
+}
+
+// Returns the bytes of an asset in the pack without copying them, or
+// ok = false if there is no pack or the asset isn't in it.
+find_packed_asset :: proc(path : string) -> (data : []byte, ok : bool) {
+	if len(asset_pack.entries) == 0 {
+		return
+	}
+
+	path_hash := hash.fnv64a(transmute([]byte)path)
+
+	index, found := slice.binary_search_by(asset_pack.entries, path_hash, proc(e : Asset_Pack_Entry, h : u64) -> slice.Ordering {
+		return slice.cmp(e.path_hash, h)
+	})
+	if !found {
+		return
+	}
+
+	entry := asset_pack.entries[index]
+	end := int(entry.offset) + int(entry.size)
+	if end > len(asset_pack.data) {
+		return
+	}
+
+	return asset_pack.data[int(entry.offset):end], true
+}
+
+// Reads an asset from the pack if it is in there, otherwise from its file.
+// owned is true when the data was read from a file and must be deleted by
+// the caller; pack data must never be deleted.
+read_asset :: proc(path : string) -> (data : []byte, owned : bool, ok : bool) {
+	if packed, in_pack := find_packed_asset(path); in_pack {
+		return packed, false, true
+	}
+
+	data, ok = utils.read_entire_file(path)
+	return data, ok, ok
+}
+
+// Reads a cooked asset like read_asset, following it if it is a reference to
+// a file shared with other assets (see Cooked_Reference_Header).
+read_cooked_asset :: proc(path : string) -> (data : []byte, owned : bool, ok : bool) {
+	data, owned, ok = read_asset(path)
+	if !ok || len(data) < size_of(Cooked_Reference_Header) || string(data[:4]) != COOKED_REFERENCE_MAGIC {
+		return
+	}
+
+	header : Cooked_Reference_Header
+	mem.copy(&header, raw_data(data), size_of(Cooked_Reference_Header))
+	end := size_of(Cooked_Reference_Header) + int(header.path_length)
+
+	target : string
+	if header.version == COOKED_REFERENCE_VERSION && end <= len(data) {
+		target = strings.clone(string(data[size_of(Cooked_Reference_Header):end]), context.temp_allocator)
+	} else {
+		fmt.printfln("Cooked reference %s has an unsupported format (version %d)", path, header.version)
+	}
+
+	if owned {
+		delete(data)
+	}
+
+	if target == "" {
+		return nil, false, false
+	}
+
+	return read_asset(target)
+}
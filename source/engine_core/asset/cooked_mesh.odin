@@ -0,0 +1,79 @@
+package asset
+
+import "core:fmt"
+import "core:mem"
+import "core:strings"
+
+// Path of a file that `build.py -cook-assets` puts next to a .glb, e.g. ".mesh" or ".tex"
+cooked_asset_path :: proc(glb_path : string, extension : string, allocator := context.temp_allocator) -> string {
+	return strings.concatenate({strings.trim_suffix(glb_path, ".glb"), extension}, allocator)
+}
+
+// Loads a mesh cooked by `build.py -cook-assets`. The file is read once (or
+// used in place from the asset pack) and the returned buffers are slices
+// into that single allocation, already in the layout the renderer uploads.
+// Returns ok = false if there is no cooked file or it can't be used, so the
+// caller can fall back to the .glb.
+load_mesh_from_cooked_file :: proc(path : string) -> (mesh : Mesh, ok : bool) {
+	data, owned, read_ok := read_cooked_asset(path)
+	if !read_ok {
+		return
+	}
+	defer if !ok && owned {
+		delete(data)
+	}
+
+	header : Cooked_Mesh_Header
+	if len(data) < size_of(Cooked_Mesh_Header) {
+		fmt.printfln("Cooked mesh %s is truncated", path)
+		return
+	}
+	mem.copy(&header, raw_data(data), size_of(Cooked_Mesh_Header))
+
+	if string(header.magic[:]) != COOKED_MESH_MAGIC || header.version != COOKED_MESH_VERSION {
+		fmt.printfln("Cooked mesh %s has an unsupported format (version %d), re-run build.py -cook-assets", path, header.version)
+		return
+	}
+
+	if header.index_size != size_of(u16) && header.index_size != size_of(u32) {
+		fmt.printfln("Cooked mesh %s uses %d byte indices, only 16 and 32-bit indices are supported", path, header.index_size)
+		return
+	}
+
+	section :: proc(data : []byte, header : Cooked_Mesh_Header, kind : Cooked_Mesh_Section_Kind) -> ([]byte, bool) {
+		s := header.sections[int(kind)]
+		if s.size == 0 {
+			return nil, true
+		}
+		end := int(s.offset) + int(s.size)
+		if end > len(data) {
+			return nil, false
+		}
+		return data[int(s.offset):end], true
+	}
+
+	positions, positions_ok := section(data, header, .Positions)
+	normals,   normals_ok   := section(data, header, .Normals)
+	uvs,       uvs_ok       := section(data, header, .Uvs)
+	indices,   indices_ok   := section(data, header, .Indices)
+	smooth,    smooth_ok    := section(data, header, .Smooth_Normals)
+
+	if !positions_ok || !normals_ok || !uvs_ok || !indices_ok || !smooth_ok {
+		fmt.printfln("Cooked mesh %s has sections outside of the file", path)
+		return
+	}
+
+	mesh = Mesh{
+		vertex_buffer_bytes = positions,
+		normal_buffer_bytes = normals,
+		uv_buffer_bytes     = uvs,
+		index_buffer_bytes  = indices,
+		vertex_count        = int(header.vertex_count),
+		index_count         = int(header.index_count),
+		index_size          = int(header.index_size),
+
+		smooth_normal_buffer_bytes = smooth,
+	}
+
+	return mesh, true
+}
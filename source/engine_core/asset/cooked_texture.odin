@@ -0,0 +1,78 @@
+package asset
+
+import "core:fmt"
+import "core:mem"
+
+// Loads a texture baked by `build.py -cook-assets`: already decoded, RGBA8
+// or block compressed, and with the full mip chain, so nothing is left to do
+// but upload it. The file is read once (or used in place from the asset pack)
+// and the mips are slices into that single allocation.
+// Returns ok = false if there is no usable baked file, or its pixel format
+// isn't one of supported_formats (what the GPU can sample), so the caller
+// can fall back to decoding the .glb image.
+load_texture_from_cooked_file :: proc(path : string, supported_formats := Texture_Pixel_Formats{.RGBA8}) -> (texture : Texture, ok : bool) {
+	data, owned, read_ok := read_cooked_asset(path)
+	if !read_ok {
+		return
+	}
+	defer if !ok && owned {
+		delete(data)
+	}
+
+	header : Cooked_Texture_Header
+	if len(data) < size_of(Cooked_Texture_Header) {
+		fmt.printfln("Cooked texture %s is truncated", path)
+		return
+	}
+	mem.copy(&header, raw_data(data), size_of(Cooked_Texture_Header))
+
+	if string(header.magic[:]) != COOKED_TEXTURE_MAGIC || header.version != COOKED_TEXTURE_VERSION {
+		fmt.printfln("Cooked texture %s has an unsupported format (version %d), re-run build.py -cook-assets", path, header.version)
+		return
+	}
+
+	pixel_format, format_found := cooked_texture_pixel_format(header.pixel_format)
+	if !format_found || header.mip_count == 0 || header.mip_count > COOKED_TEXTURE_MAX_MIPS {
+		fmt.printfln("Cooked texture %s has an unsupported pixel format or mip count", path)
+		return
+	}
+
+	if pixel_format not_in supported_formats {
+		fmt.printfln("Cooked texture %s is %v, which this GPU can't sample, using the .glb texture instead", path, pixel_format)
+		return
+	}
+
+	mip_chain := make([]Mip_Map, header.mip_count)
+
+	for i in 0..<int(header.mip_count) {
+		mip := header.mips[i]
+		end := int(mip.offset) + int(mip.size)
+		if end > len(data) {
+			fmt.printfln("Cooked texture %s has mips outside of the file", path)
+			delete(mip_chain)
+			return
+		}
+		mip_chain[i] = Mip_Map{ final_pixels = data[int(mip.offset):end] }
+	}
+
+	texture = Texture{
+		dimensions   = Texture_Dimensions{
+			width  = i32(header.width),
+			height = i32(header.height),
+		},
+		mip_chain    = mip_chain,
+		pixel_format = pixel_format,
+	}
+
+	return texture, true
+}
+
+cooked_texture_pixel_format :: proc(value : u32) -> (Texture_Pixel_Format, bool) {
+	formats := COOKED_TEXTURE_FORMATS
+	for cooked_value, format in formats {
+		if cooked_value == value {
+			return format, true
+		}
+	}
+	return .RGBA8, false
+}
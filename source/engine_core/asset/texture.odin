@@ -17,7 +17,7 @@ fill_mip_chain :: proc(pixel_data: [dynamic]byte,
 
 	// Mip level 0 (original texture)
 	mip_chain[0] = Mip_Map{
-		final_pixels = pixel_data,
+		final_pixels = pixel_data[:],
 	}
 
 	current_width  : int = int(dimensions.width)
@@ -30,7 +30,7 @@ fill_mip_chain :: proc(pixel_data: [dynamic]byte,
 		if current_width == 1 && current_height == 1 {
 			// Fill remaining mips (if any) with the last valid one
 			for j in i..<levels {
-				mip_chain[j] = Mip_Map{ final_pixels = current_pixels }
+				mip_chain[j] = Mip_Map{ final_pixels = current_pixels[:] }
 			}
 			break
 		}
@@ -80,7 +80,7 @@ fill_mip_chain :: proc(pixel_data: [dynamic]byte,
 		}
 
 		mip_chain[i] = Mip_Map{
-			final_pixels = new_pixels_dyn,
+			final_pixels = new_pixels_dyn[:],
 		}
 
 		current_pixels = new_pixels_dyn
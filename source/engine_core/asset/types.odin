@@ -7,6 +7,9 @@ Mesh :: struct {
     uv_buffer_bytes    : []byte,
     vertex_count       : int,
     index_count        : int,
+    index_size         : int,    // 2 or 4 bytes per index
+    // Outline normals baked by `build.py -cook-assets`, computed at load time when empty
+    smooth_normal_buffer_bytes : []byte,
 }
 
 Material :: struct {
@@ -15,12 +18,26 @@ Material :: struct {
 }
 
 Texture :: struct {
-    dimensions : Texture_Dimensions,
-    mip_chain  : Mip_Chain,
+    dimensions   : Texture_Dimensions,
+    mip_chain    : Mip_Chain,
+    pixel_format : Texture_Pixel_Format,
 }
 
+// RGBA8, or one of the block compressed formats `build.py -texture-compression`
+// cooks (4x4 pixel blocks, mips smaller than a block take a whole one)
+Texture_Pixel_Format :: enum u8 {
+    RGBA8,
+    BC1,
+    BC3,
+    BC7,
+    ETC2_RGB8,
+    ETC2_RGBA8,
+}
+
+Texture_Pixel_Formats :: bit_set[Texture_Pixel_Format]
+
 Mip_Map :: struct {
-    final_pixels : [dynamic]byte,
+    final_pixels : []byte,
 }
 
 Mip_Chain :: []Mip_Map
@@ -30,4 +47,105 @@ Texture_Dimensions :: struct {
     height : i32,
 }
 
-Texture_Pool :: map[u64]Texture
\ No newline at end of file
+Texture_Pool :: map[u64]Texture
+
+// Layout of the .mesh files written by `build.py -cook-assets`. Must match
+// pack_cooked_mesh in build_tools/assets.py.
+COOKED_MESH_MAGIC        :: "TMSH"
+COOKED_MESH_VERSION      :: 2
+COOKED_MESH_MAX_SECTIONS :: 8
+
+Cooked_Mesh_Section_Kind :: enum u32 {
+    Positions,
+    Normals,
+    Uvs,
+    Indices,
+    Smooth_Normals,
+}
+
+Cooked_Mesh_Section :: struct {
+    offset : u32,
+    size   : u32,
+}
+
+Cooked_Mesh_Header :: struct #packed {
+    magic         : [4]u8,
+    version       : u32,
+    vertex_count  : u32,
+    index_count   : u32,
+    index_size    : u32,
+    section_count : u32,
+    sections      : [COOKED_MESH_MAX_SECTIONS]Cooked_Mesh_Section,
+    _             : [8]u8,
+}
+
+#assert(size_of(Cooked_Mesh_Header) == 96)
+
+// Layout of the .tex files written by `build.py -cook-assets`. Must match
+// cook_texture in build_tools/assets.py.
+COOKED_TEXTURE_MAGIC        :: "TTEX"
+COOKED_TEXTURE_VERSION      :: 1
+COOKED_TEXTURE_MAX_MIPS     :: 16
+
+// pixel_format values of Cooked_Texture_Header, COOKED_TEXTURE_FORMAT_* in build_tools/assets.py
+COOKED_TEXTURE_FORMATS :: [Texture_Pixel_Format]u32 {
+    .RGBA8      = 1,
+    .BC1        = 2,
+    .BC3        = 3,
+    .BC7        = 4,
+    .ETC2_RGB8  = 5,
+    .ETC2_RGBA8 = 6,
+}
+
+Cooked_Texture_Header :: struct #packed {
+    magic        : [4]u8,
+    version      : u32,
+    width        : u32,
+    height       : u32,
+    pixel_format : u32,
+    mip_count    : u32,
+    mips         : [COOKED_TEXTURE_MAX_MIPS]Cooked_Mesh_Section,
+    _            : [8]u8,
+}
+
+#assert(size_of(Cooked_Texture_Header) == 160)
+
+// A cooked file with the same contents as other assets' is stored once by
+// `build.py -cook-assets`, and their .mesh/.tex files are references to it:
+// this header followed by path_length bytes of the path to read instead.
+// Must match store_cooked_outputs in build_tools/assets.py.
+COOKED_REFERENCE_MAGIC   :: "TREF"
+COOKED_REFERENCE_VERSION :: 1
+
+Cooked_Reference_Header :: struct #packed {
+    magic       : [4]u8,
+    version     : u32,
+    path_length : u32,
+}
+
+// Layout of the assets.pack written by `build.py -pack-assets`:
+// header | entries sorted by path_hash | path strings | payloads
+ASSET_PACK_MAGIC   :: "TPAK"
+ASSET_PACK_VERSION :: 1
+
+Asset_Pack_Header :: struct #packed {
+    magic          : [4]u8,
+    version        : u32,
+    entry_count    : u32,
+    alignment      : u32,
+    toc_offset     : u64,
+    strings_offset : u64,
+}
+
+#assert(size_of(Asset_Pack_Header) == 32)
+
+Asset_Pack_Entry :: struct #packed {
+    path_hash    : u64, // hash.fnv64a of the path, e.g. "assets/Tinker.glb"
+    offset       : u64,
+    size         : u64,
+    content_hash : u64,
+    path_offset  : u32,
+    path_length  : u32,
+}
+
+#assert(size_of(Asset_Pack_Entry) == 40)
@@ -7,6 +7,10 @@ import ass    "../asset"
 import gltf   "../../lib/glTF2"
 import trans  "../transform"
 
+// Shadow sample count of the texcube variant entities are drawn with (see
+// @variants in shader.glsl). The web build takes fewer samples.
+TEXCUBE_PCF_SAMPLES :: 8 when ODIN_OS == .JS else 15
+
 create_entity_by_mesh_path :: proc(
 		path : string,
 		render_queue : ^[dynamic]Draw_Call,
@@ -15,11 +19,23 @@ create_entity_by_mesh_path :: proc(
 		spawn : bool = false,
 	) -> ^Entity{
 
-	glb_data      := ass.load_glb_data_from_file(path)
-	glb_mesh_data := ass.load_mesh_from_glb_data(glb_data)
-	glb_texture   := ass.load_texture_from_glb_data(glb_data)
-	
-	defer gltf.unload(glb_data)
+	// Prefer what `build.py -cook-assets` cooked, it needs no parsing or decoding
+	glb_mesh_data, mesh_cooked := ass.load_mesh_from_cooked_file(ass.cooked_asset_path(path, ".mesh"))
+	glb_texture, texture_cooked := ass.load_texture_from_cooked_file(ass.cooked_asset_path(path, ".tex"), supported_texture_pixel_formats())
+
+	// Only parse the glTF for whatever wasn't cooked
+	if !mesh_cooked || !texture_cooked {
+		glb_data := ass.load_glb_data_from_file(path)
+		defer gltf.unload(glb_data)
+
+		if !mesh_cooked {
+			glb_mesh_data = ass.load_mesh_from_glb_data(glb_data)
+		}
+
+		if !texture_cooked {
+			glb_texture = ass.load_texture_from_glb_data(glb_data)
+		}
+	}
 	
 	mesh_renderer := Mesh_Renderer{
 		materials = []ass.Material{
@@ -41,6 +57,26 @@ create_entity_by_mesh_path :: proc(
 	return entity
 }
 
+// Sokol pixel format each texture pixel format is uploaded as
+SG_TEXTURE_PIXEL_FORMATS := [ass.Texture_Pixel_Format]sg.Pixel_Format {
+	.RGBA8      = .RGBA8,
+	.BC1        = .BC1_RGBA,
+	.BC3        = .BC3_RGBA,
+	.BC7        = .BC7_RGBA,
+	.ETC2_RGB8  = .ETC2_RGB8,
+	.ETC2_RGBA8 = .ETC2_RGBA8,
+}
+
+// Texture pixel formats the GPU can sample, block compressed ones depend on the backend and driver
+supported_texture_pixel_formats :: proc() -> (formats : ass.Texture_Pixel_Formats) {
+	for sg_format, format in SG_TEXTURE_PIXEL_FORMATS {
+		if sg.query_pixelformat(sg_format).sample {
+			formats += {format}
+		}
+	}
+	return
+}
+
 add_mesh_to_render_queue :: proc(
 	mesh_renderer      : Mesh_Renderer,
 	render_queue       : ^[dynamic]Draw_Call,
@@ -104,6 +140,11 @@ destroy_entity :: proc(
 	}
 }
 
+@(private="file")
+mesh_index_type :: proc(mesh : ass.Mesh) -> sg.Index_Type {
+	return mesh.index_size == size_of(u32) ? .UINT32 : .UINT16
+}
+
 @(private="file")
 bind_opaque_render_props :: proc( rendering_resources : ^Rendering_Resources, draw_call : ^Draw_Call, ){
 	// Set the renderer field
@@ -140,15 +181,16 @@ bind_opaque_render_props :: proc( rendering_resources : ^Rendering_Resources, dr
 	assert(len(albedo_texture.mip_chain) > 0, "Error: Texture mip_chain is empty")
 	assert(len(albedo_texture.mip_chain[0].final_pixels) > 0, "Error: Texture has no pixel data")
 
-	// Calculate expected size for RGBA8 format
-	expected_size := int(albedo_texture.dimensions.width) * int(albedo_texture.dimensions.height) * 4
+	// Calculate expected size for the texture's format, block compressed ones round up to whole 4x4 blocks
+	pixel_format := SG_TEXTURE_PIXEL_FORMATS[albedo_texture.pixel_format]
+	expected_size := int(sg.query_surface_pitch(pixel_format, albedo_texture.dimensions.width, albedo_texture.dimensions.height, 1))
 	actual_size := len(albedo_texture.mip_chain[0].final_pixels)
 	
-	fmt.printfln("Creating GPU texture: %dx%d, expected %d bytes, actual %d bytes",
-		albedo_texture.dimensions.width, albedo_texture.dimensions.height, 
+	fmt.printfln("Creating GPU texture: %dx%d %v, expected %d bytes, actual %d bytes",
+		albedo_texture.dimensions.width, albedo_texture.dimensions.height, albedo_texture.pixel_format,
 		expected_size, actual_size)
 	
-	assert(actual_size == expected_size, "Error: Texture size mismatch for RGBA8 format")
+	assert(actual_size == expected_size, "Error: Texture size mismatch for its pixel format")
 
 	// ------------------------------------------------------------------
 	// Bind the full mip chain to the GPU image
@@ -156,7 +198,7 @@ bind_opaque_render_props :: proc( rendering_resources : ^Rendering_Resources, dr
 	img_desc : sg.Image_Desc
 	img_desc.width        = albedo_texture.dimensions.width
 	img_desc.height       = albedo_texture.dimensions.height
-	img_desc.pixel_format = .RGBA8
+	img_desc.pixel_format = pixel_format
 	img_desc.num_mipmaps  = c.int(len(albedo_texture.mip_chain))
 
 	for mip_idx in 0..<int(len(albedo_texture.mip_chain)) {
@@ -180,7 +222,7 @@ bind_opaque_render_props :: proc( rendering_resources : ^Rendering_Resources, dr
 
 	// Shader and pipeline object
 	draw_call.opaque.pipeline = sg.make_pipeline({
-		shader = sg.make_shader(shader.texcube_shader_desc(sg.query_backend())),
+		shader = sg.make_shader(shader.texcube_variant_shader_desc(sg.query_backend(), pcf_samples = TEXCUBE_PCF_SAMPLES)),
 		layout = {
 			attrs = {
 				shader.ATTR_texcube_pos       = { format = .FLOAT3 },
@@ -188,7 +230,7 @@ bind_opaque_render_props :: proc( rendering_resources : ^Rendering_Resources, dr
 				shader.ATTR_texcube_texcoord0 = { format = .FLOAT2, buffer_index = 2 },
 			},
 		},
-		index_type = .UINT16,
+		index_type = mesh_index_type(mesh_renderer.mesh),
 		cull_mode = .BACK,
 		face_winding = .CW,
 		depth = {
@@ -207,8 +249,11 @@ bind_outline_render_props :: proc(draw_call : ^Draw_Call,){
 		data = { ptr = raw_data(mesh_renderer.mesh.vertex_buffer_bytes), size = uint(len(mesh_renderer.mesh.vertex_buffer_bytes)) },
 	})
 
-	// Calculate smoothed normals for outline pass
-	smooth_normals := ass.calculate_smooth_normals(mesh_renderer.mesh)
+	// Smoothed normals for outline pass, baked by the cooker or calculated here
+	smooth_normals := mesh_renderer.mesh.smooth_normal_buffer_bytes
+	if len(smooth_normals) == 0 {
+		smooth_normals = ass.calculate_smooth_normals(mesh_renderer.mesh)
+	}
 	
 	assert(len(smooth_normals) > 0, "Error: Smooth normal buffer is empty")
 	draw_call.outline.bindings.vertex_buffers[1] = sg.make_buffer({
@@ -232,7 +277,7 @@ bind_outline_render_props :: proc(draw_call : ^Draw_Call,){
 				shader.ATTR_outline_normal = { format = .FLOAT3, buffer_index = 1 },
 			},
 		},
-		index_type = .UINT16,
+		index_type = mesh_index_type(mesh_renderer.mesh),
 		cull_mode = .FRONT,
 		face_winding = .CW,
 		depth = {
@@ -276,7 +321,7 @@ bind_shadow_render_props :: proc(draw_call : ^Draw_Call,) {
 				pixel_format = .NONE,
 			},
 		},
-		index_type = .UINT16,
+		index_type = mesh_index_type(mesh_renderer.mesh),
 		cull_mode = .BACK,
 		face_winding = .CW,
 		sample_count = 1,
@@ -10,6 +10,7 @@ import slog  "lib/sokol/log"
 import sgl   "lib/sokol/gl"
 
 import ren   "engine_core/renderer"
+import ass   "engine_core/asset"
 import deb   "engine_core/debug"
 import inp   "engine_core/input"
 import trans "engine_core/transform"
@@ -47,6 +48,9 @@ game_init :: proc() {
 
 	game_hot_reloaded(g)
 
+	// Release builds made with -pack-assets ship assets.pack instead of an assets folder
+	ass.open_asset_pack()
+
 	sg.setup({
 		environment = sglue.environment(),
 		logger = { func = slog.func },
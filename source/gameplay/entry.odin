@@ -5,6 +5,7 @@ import "core:math/linalg"
 import sapp  "../lib/sokol/app"
 import ren "../engine_core/renderer"
 import inp "../engine_core/input"
+import utils "../lib/sokol_utils"
 
 import "../common"
 
@@ -19,6 +20,11 @@ Tinker     : ^ren.Entity
 Tinker_Key : ^ren.Entity
 Saw_Arm    : ^ren.Entity
 Saw_Blade  : ^ren.Entity
+Floor      : ^ren.Entity
+
+// Web builds download these assets after the game has started, see
+// asset_bundles.json. They are spawned once the bundle has arrived.
+PROPS_BUNDLE :: "props"
 
 Obstacle :: struct {
     Saw_Blade : [dynamic]^ren.Entity,
@@ -33,6 +39,15 @@ on_load :: proc(memory : ^common.Game_Memory) {
     Saw_Blade  = ren.create_entity_by_mesh_path("assets/saw_blade.glb",  &memory.render_queue, &memory.rendering_resources, {0,0,10})
 
     Tinker_Key.transform.parent = &Tinker.transform
+
+    // Entities point into the render queue. Make room for the props now, so
+    // spawning them later doesn't move the entities above.
+    reserve(&memory.render_queue, len(memory.render_queue) + 1)
+    utils.request_asset_bundle(PROPS_BUNDLE)
+}
+
+spawn_props :: proc(memory : ^common.Game_Memory) {
+    Floor = ren.create_entity_by_mesh_path("assets/floor.glb", &memory.render_queue, &memory.rendering_resources, {0,-6.5,0})
 }
 
 update_flycam :: proc(delta_time: f32, camera : ^ren.Camera) {
@@ -122,6 +137,10 @@ on_update :: proc(delta_time : f32, time : f32, memory : ^common.Game_Memory) {
     // update_flycam(delta_time, &memory.main_camera)
     if inp.GetKey(.ESCAPE) do sapp.quit()
 
+    if Floor == nil && utils.asset_bundle_ready(PROPS_BUNDLE) {
+        spawn_props(memory)
+    }
+
     Saw_Blade.transform.rotation.x += delta_time * 200
     Tinker_Key.transform.rotation.z += delta_time * 600
 
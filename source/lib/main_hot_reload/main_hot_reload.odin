@@ -1,6 +1,12 @@
 /*
-Development game exe. Loads build/hot_reload/game.dll and reloads it whenever it
-changes.
+Development game exe. Loads build/hot_reload/game.dll and reloads it when
+build.py says a new one is ready.
+
+On startup it listens on a loopback TCP port and writes its PID and that port
+to hot_reload.lock. build.py uses the lock file to find the running game and
+sends "reload <dll path>" once the new DLL is completely written. If the port
+can't be opened, it falls back to checking the DLL's modification time every
+frame.
 
 Uses sokol/app to open the window. The init, frame, event and cleanup callbacks
 of the app run procedures inside the current game DLL.
@@ -14,6 +20,10 @@ import "core:os"
 import "core:os/os2"
 import "core:log"
 import "core:mem"
+import "core:net"
+import "core:strings"
+import "core:sync"
+import "core:thread"
 import "base:runtime"
 
 import sapp "../sokol/app"
@@ -29,6 +39,9 @@ when ODIN_OS == .Windows {
 GAME_DLL_DIR :: "./"
 GAME_DLL_PATH :: GAME_DLL_DIR + "game" + DLL_EXT
 
+// Read by build.py, see HOT_RELOAD_LOCK_FILE in build_tools/hot_reload.py
+HOT_RELOAD_LOCK_PATH :: GAME_DLL_DIR + "hot_reload.lock"
+
 // We copy the DLL because using it directly would lock it, which would prevent
 // the compiler from writing to it.
 copy_dll :: proc(to: string) -> bool {
@@ -79,6 +92,67 @@ load_game_api :: proc(api_version: int) -> (api: Game_API, ok: bool) {
 	return
 }
 
+control_socket: net.TCP_Socket
+control_channel_ok: bool
+
+// Set by the control thread when build.py asks for a reload, cleared by frame
+reload_requested: bool
+
+// Opens the control port and writes the lock file build.py looks for
+start_control_channel :: proc() -> bool {
+	socket, listen_err := net.listen_tcp(net.Endpoint{address = net.IP4_Loopback, port = 0})
+	if listen_err != nil {
+		fmt.printfln("Failed opening hot reload control port: {0}", listen_err)
+		return false
+	}
+
+	endpoint, endpoint_err := net.bound_endpoint(socket)
+	if endpoint_err != nil {
+		fmt.printfln("Failed getting hot reload control port: {0}", endpoint_err)
+		net.close(socket)
+		return false
+	}
+
+	lock := fmt.tprintf("%d %d\n", os2.get_pid(), endpoint.port)
+	if !os.write_entire_file(HOT_RELOAD_LOCK_PATH, transmute([]byte)lock) {
+		fmt.println("Failed writing " + HOT_RELOAD_LOCK_PATH)
+		net.close(socket)
+		return false
+	}
+
+	control_socket = socket
+
+	// The thread stays blocked in accept and ends with the process
+	thread.create_and_start(control_listener)
+	return true
+}
+
+control_listener :: proc() {
+	for {
+		client, _, accept_err := net.accept_tcp(control_socket)
+		if accept_err != nil {
+			fmt.printfln("Hot reload control port failed, no more reloads: {0}", accept_err)
+			return
+		}
+
+		// build.py also connects without sending anything to check that the
+		// game is running, then recv returns 0 bytes.
+		buf: [512]byte
+		n, recv_err := net.recv_tcp(client, buf[:])
+		net.close(client)
+
+		if recv_err == nil && strings.has_prefix(string(buf[:n]), "reload") {
+			sync.atomic_store(&reload_requested, true)
+		}
+	}
+}
+
+stop_control_channel :: proc() {
+	if control_channel_ok {
+		os.remove(HOT_RELOAD_LOCK_PATH)
+	}
+}
+
 unload_game_api :: proc(api: ^Game_API) {
 	if api.lib != nil {
 		if !dynlib.unload_library(api.lib) {
@@ -106,10 +180,15 @@ frame :: proc "c" () {
 	game_api.frame()
 
 	reload: bool
-	game_dll_mod, game_dll_mod_err := os.last_write_time_by_name(GAME_DLL_PATH)
 
-	if game_dll_mod_err == os.ERROR_NONE && game_api.modification_time != game_dll_mod {
-		reload = true
+	if control_channel_ok {
+		reload = sync.atomic_exchange(&reload_requested, false)
+	} else {
+		game_dll_mod, game_dll_mod_err := os.last_write_time_by_name(GAME_DLL_PATH)
+
+		if game_dll_mod_err == os.ERROR_NONE && game_api.modification_time != game_dll_mod {
+			reload = true
+		}
 	}
 
 	force_restart := game_api.force_restart()
@@ -207,6 +286,8 @@ main :: proc() {
 	game_api_version += 1
 	old_game_apis = make([dynamic]Game_API, default_allocator)
 
+	control_channel_ok = start_control_channel()
+
 	app_desc := game_api.app_default_desc()
 
 	app_desc.init_cb = init
@@ -234,6 +315,7 @@ main :: proc() {
 	delete(old_game_apis)
 
 	unload_game_api(&game_api)
+	stop_control_channel()
 	mem.tracking_allocator_destroy(&tracking_allocator)
 }
 
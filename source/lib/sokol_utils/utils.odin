@@ -25,4 +25,21 @@ write_entire_file :: proc(name: string, data: []byte, truncate := true) -> (succ
 	} else {
 		return os.write_entire_file(name, data, truncate)
 	}
-}
\ No newline at end of file
+}
+
+// Starts downloading an asset bundle of the web build (see asset_bundles.json).
+// All assets are always there on desktop, so it does nothing there.
+request_asset_bundle :: proc(name: string) {
+	when IS_WEB {
+		web.request_asset_bundle(name)
+	}
+}
+
+// True once the assets of a bundle requested with `request_asset_bundle` can be read.
+asset_bundle_ready :: proc(name: string) -> bool {
+	when IS_WEB {
+		return web.asset_bundle_ready(name)
+	} else {
+		return true
+	}
+}
@@ -0,0 +1,32 @@
+// On-demand asset bundles of web builds, see `build_web_asset_bundles` in
+// build_tools/web.py. Each bundle adds the file `bundles/<name>` when it has arrived.
+
+#+build wasm32, wasm64p32
+
+package web_support
+
+import "core:strings"
+import "core:fmt"
+
+@(default_calling_convention = "c")
+foreign {
+	emscripten_run_script :: proc(script: cstring) ---
+}
+
+// Starts downloading an asset bundle. Does nothing if it was requested before.
+request_asset_bundle :: proc(name: string) {
+	emscripten_run_script(fmt.ctprintf("loadAssetBundle(%q)", name))
+}
+
+// True once the files of the asset bundle can be read.
+asset_bundle_ready :: proc(name: string) -> bool {
+	marker := strings.concatenate({"bundles/", name}, context.temp_allocator)
+	file := fopen(strings.clone_to_cstring(marker, context.temp_allocator), "rb")
+
+	if file == nil {
+		return false
+	}
+
+	fclose(file)
+	return true
+}
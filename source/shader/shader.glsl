@@ -6,6 +6,11 @@
 @ctype mat4 Mat4
 @ctype vec3 Vec3
 
+// Every combination of these is compiled as a program of its own, so code a
+// scene doesn't need is compiled out instead of evaluated. Pick one with
+// texcube_variant_shader_desc, texcube_shader_desc has everything on.
+@variants texcube SHADOWS POINT_LIGHT DIR_LIGHT PCF_SAMPLES=15,8,4
+
 //==============================================================================
 // VERTEX SHADER
 //==============================================================================
@@ -25,7 +30,9 @@ out vec2 uv;
 out vec4 frag_pos;
 out vec3 frag_norm;
 out vec3 view_position;
+#ifdef SHADOWS
 out vec4 direct_light_pos;
+#endif
 
 void main() {
     gl_Position = view_projection * model * pos;
@@ -33,11 +40,14 @@ void main() {
     frag_pos = model * pos;
     frag_norm = normalize(mat3(model) * normal.xyz);
     view_position = view_pos;
+
+#ifdef SHADOWS
     direct_light_pos = direct_light_mvp * pos;
     
     #if !SOKOL_GLSL
         direct_light_pos.y = -direct_light_pos.y;
     #endif
+#endif
 }
 @end
 
@@ -47,13 +57,17 @@ void main() {
 @fs fs
 #import "utils.glsl"
 #import "lights.glsl"
+#ifdef SHADOWS
 #import "shadows.glsl"
+#endif
 
 layout(binding=0) uniform texture2D tex;
 layout(binding=0) uniform sampler   smp;
 
+#ifdef SHADOWS
 layout(binding=1) uniform texture2D shadow_tex;
 layout(binding=1) uniform sampler   shadow_smp;
+#endif
 
 layout(binding = 2) uniform fs_point_light {
     vec4 position[MAX_POINT_LIGHTS];
@@ -73,7 +87,9 @@ in vec2 uv;
 in vec4 frag_pos;
 in vec3 frag_norm;
 in vec3 view_position;
+#ifdef SHADOWS
 in vec4 direct_light_pos;
+#endif
 
 out vec4 frag_color;
 
@@ -113,6 +129,7 @@ void main() {
     vec4 albedo = gamma_to_linear(texture(sampler2D(tex, smp), uv));
     vec4 lighting = vec4(0.4, 0.4, 0.4, 1.0);
 
+#ifdef POINT_LIGHT
     // Process lights in groups of 4 for better optimization
     for(int i = 0; i < MAX_POINT_LIGHTS; i += 4) {
         if (i + 0 < MAX_POINT_LIGHTS) lighting.rgb += calculate_point_light(get_point_light(i + 0), frag_pos.xyz, normal, view_dir);
@@ -120,13 +137,17 @@ void main() {
         if (i + 2 < MAX_POINT_LIGHTS) lighting.rgb += calculate_point_light(get_point_light(i + 2), frag_pos.xyz, normal, view_dir);
         if (i + 3 < MAX_POINT_LIGHTS) lighting.rgb += calculate_point_light(get_point_light(i + 3), frag_pos.xyz, normal, view_dir);
     }
+#endif
 
+#ifdef DIR_LIGHT
     vec3 direct_light_contrib = calculate_directional_light(get_directional_light(), normal, view_dir);
     lighting.rgb += direct_light_contrib;
+#endif
     
     // Apply cel-shading to create stylized lighting bands
     lighting.rgb = apply_cel_shading(lighting.rgb);
     
+#ifdef SHADOWS
     vec3 light_dir = normalize(directional_light.direction.xyz);
     float shadow_factor = calculate_shadow(
         shadow_tex,
@@ -138,6 +159,7 @@ void main() {
     );
     
     lighting = apply_shadow(lighting, shadow_factor, 0.5);
+#endif
     vec4 final_color = albedo * lighting;
     frag_color = linear_to_gamma(final_color);
 }
@@ -2,6 +2,12 @@
 // SHADOW MAPPING UTILITIES
 //==============================================================================
 
+// Sample count of the Vogel disk PCF. @variants programs set it per variant,
+// the plain program gets the highest quality one
+#ifndef PCF_SAMPLES
+#define PCF_SAMPLES 15
+#endif
+
 // Interleaved gradient noise for per-fragment randomization
 float interleaved_gradient_noise(vec2 position) {
     vec3 magic = vec3(0.06711056, 0.00583715, 52.9829189);
@@ -173,7 +179,7 @@ float calculate_shadow(
     float bias = calculate_shadow_bias(normal, light_dir);
     
     // Use Vogel disk sampling for best quality
-    return calculate_pcf_shadow_vogel(shadow_texture, shadow_sampler, shadow_coords, bias, 15, frag_coord);
+    return calculate_pcf_shadow_vogel(shadow_texture, shadow_sampler, shadow_coords, bias, PCF_SAMPLES, frag_coord);
     
     // Or use rotated PCF for compatibility
     // return calculate_pcf_shadow_8x8(shadow_texture, shadow_sampler, shadow_coords, bias, frag_coord);
@@ -0,0 +1,249 @@
+"""
+Runs build.py end to end in a scratch copy of the project. sokol-shdc, odin
+and emscripten are replaced by small Python stand-ins that log their
+command lines, so tests can check what a build ran and what it skipped.
+"""
+
+import os
+import platform
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Writes a fake generated file that depends on the input and language.
+# Sources containing #error fail like a shader compile error would.
+FAKE_SHDC = r'''
+import hashlib
+import os
+import sys
+
+argv = sys.argv[1:]
+src, out, lang = (argv[argv.index(flag) + 1] for flag in ("-i", "-o", "-l"))
+
+with open(os.environ["TOY_TOOL_LOG"], "a") as log:
+	log.write("shdc %s %s\n" % (os.path.basename(src), lang))
+
+with open(src) as f:
+	text = f.read()
+
+if "#error" in text:
+	print("%s:1: error: #error in source" % src)
+	sys.exit(1)
+
+with open(out, "w") as f:
+	f.write("package shader\n// %s %s\n" % (lang, hashlib.sha256(text.encode()).hexdigest()))
+'''
+
+# Writes whatever -out: names. Fails and sleeps as TOY_ODIN_FAIL and
+# TOY_ODIN_SLEEP ask for, `odin version`
+# prints TOY_ODIN_VERSION and `odin root` a directory with the web runtime.
+FAKE_ODIN = r'''
+import os
+import sys
+
+with open(os.environ["TOY_TOOL_LOG"], "a") as log:
+	log.write("odin %s\n" % " ".join(sys.argv[1:]))
+
+if sys.argv[1:] == ["version"]:
+	print("odin version " + os.environ.get("TOY_ODIN_VERSION", "dev-fake"))
+	sys.exit(0)
+
+if sys.argv[1:] == ["root"]:
+	print(os.path.join(os.path.dirname(os.path.abspath(__file__)), "odin_root"), end="")
+	sys.exit(0)
+
+command = " ".join(sys.argv[1:])
+
+# TOY_ODIN_SLEEP=<seconds>:<text> sleeps in commands containing text
+if os.environ.get("TOY_ODIN_SLEEP"):
+	seconds, text = os.environ["TOY_ODIN_SLEEP"].split(":", 1)
+
+	if text in command:
+		import time
+		time.sleep(float(seconds))
+
+# TOY_ODIN_FAIL=1 fails every command, any other value the ones containing it
+fail = os.environ.get("TOY_ODIN_FAIL")
+
+if fail and (fail == "1" or fail in command):
+	print("fake odin: failing as asked")
+	sys.exit(1)
+
+for arg in sys.argv[1:]:
+	if arg.startswith("-out:"):
+		out = arg[len("-out:"):]
+
+		# -build-mode:obj for the web adds the extension itself
+		if "-target:js_wasm32" in sys.argv:
+			out += ".wasm.o"
+
+		with open(out, "w") as f:
+			f.write("fake odin output\n")
+'''
+
+# Writes the files next to -o that a real emcc would
+FAKE_EMCC = r'''
+import os
+import sys
+
+with open(os.environ["TOY_TOOL_LOG"], "a") as log:
+	log.write("emcc %s\n" % " ".join(sys.argv[1:]))
+
+out = sys.argv[sys.argv.index("-o") + 1]
+base = os.path.splitext(out)[0]
+
+for path in (out, base + ".js", base + ".wasm"):
+	with open(path, "w") as f:
+		f.write("fake emcc output\n")
+'''
+
+# Writes the list of packaged files as the .data file
+FAKE_FILE_PACKAGER = r'''
+import json
+import os
+import sys
+
+argv = sys.argv[1:]
+data_path = argv[0]
+stage_dir = argv[argv.index("--preload") + 1].split("@")[0]
+js_path = [a for a in argv if a.startswith("--js-output=")][0].split("=", 1)[1]
+
+with open(os.environ["TOY_TOOL_LOG"], "a") as log:
+	log.write("file_packager %s\n" % os.path.basename(data_path))
+
+files = sorted(os.path.relpath(os.path.join(r, f), stage_dir).replace(os.sep, "/") for r, _, fs in os.walk(stage_dir) for f in fs)
+
+with open(data_path, "w") as f:
+	json.dump(files, f)
+
+with open(js_path, "w") as f:
+	f.write("// loads %s\n" % os.path.basename(data_path))
+'''
+
+def shdc_path():
+	"""Where build.py looks for sokol-shdc on this machine"""
+	arch = platform.machine()
+	arm = "arm64" in arch or "aarch64" in arch
+
+	if sys.platform == "darwin":
+		return "sokol-shdc/osx_arm64/sokol-shdc" if arm else "sokol-shdc/osx/sokol-shdc"
+
+	return "sokol-shdc/linux_arm64/sokol-shdc" if arm else "sokol-shdc/linux/sokol-shdc"
+
+def write_tool(path, code):
+	os.makedirs(os.path.dirname(path), exist_ok=True)
+
+	with open(path, "w") as f:
+		f.write("#!" + sys.executable + "\n" + code)
+
+	os.chmod(path, 0o755)
+
+class Project:
+	def __init__(self, root):
+		self.root = root
+		self.bin_dir = os.path.join(root, ".fake_bin")
+		self.tool_log = os.path.join(root, ".tool_log")
+		self.env = dict(os.environ, TOY_TOOL_LOG=self.tool_log, PATH=self.bin_dir + os.pathsep + os.environ["PATH"])
+
+		shutil.copy(os.path.join(PROJECT_DIR, "build.py"), root)
+		shutil.copytree(os.path.join(PROJECT_DIR, "build_tools"), os.path.join(root, "build_tools"),
+			ignore=shutil.ignore_patterns("__pycache__"))
+		write_tool(self.path(shdc_path()), FAKE_SHDC)
+		write_tool(os.path.join(self.bin_dir, "odin"), FAKE_ODIN)
+		write_tool(os.path.join(self.bin_dir, "emcc"), FAKE_EMCC)
+		write_tool(os.path.join(self.bin_dir, "tools", "file_packager.py"), FAKE_FILE_PACKAGER)
+		self.write(os.path.join(self.bin_dir, "odin_root", "core", "sys", "wasm", "js", "odin.js"), "// odin.js\n")
+
+	def path(self, rel):
+		return os.path.join(self.root, rel)
+
+	def write(self, rel, data):
+		path = self.path(rel)
+		os.makedirs(os.path.dirname(path), exist_ok=True)
+
+		with open(path, "wb" if isinstance(data, bytes) else "w") as f:
+			f.write(data)
+
+	def read(self, rel):
+		with open(self.path(rel), "rb") as f:
+			return f.read()
+
+	def run(self, *args, check=True, env=None):
+		"""Runs build.py with args, fails the test if check and it fails"""
+		open(self.tool_log, "w").close()
+		res = subprocess.run([sys.executable, "build.py", *args], cwd=self.root, env=dict(self.env, **(env or {})),
+			capture_output=True, text=True)
+
+		if check:
+			assert res.returncode == 0, res.stdout + res.stderr
+
+		return res
+
+	def start(self, *args):
+		"""Starts build.py with args without waiting for it, for resident modes like -watch"""
+		open(self.tool_log, "w").close()
+		return Running_Build(subprocess.Popen([sys.executable, "-u", "build.py", *args], cwd=self.root, env=self.env,
+			stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True))
+
+	def tool_calls(self, tool):
+		"""Command lines the given fake tool was run with during the last run()"""
+		with open(self.tool_log) as f:
+			return [line.split(" ", 1)[1].strip() for line in f if line.startswith(tool + " ")]
+
+class Running_Build:
+	"""A build.py process whose output is read on a thread, so tests can wait for lines with a timeout"""
+	def __init__(self, process):
+		import queue
+		import threading
+
+		self.process = process
+		self.lines = queue.Queue()
+		self.output = []
+		threading.Thread(target=self._read, daemon=True).start()
+
+	def _read(self):
+		for line in self.process.stdout:
+			self.lines.put(line)
+
+	def wait_for(self, text, timeout=20):
+		"""Returns the output up to and including the first new line containing text"""
+		import queue
+		import time
+
+		deadline = time.monotonic() + timeout
+		seen = []
+
+		while True:
+			try:
+				line = self.lines.get(timeout=max(0, deadline - time.monotonic()))
+			except queue.Empty:
+				raise AssertionError("timed out waiting for %r, output:\n%s" % (text, "".join(self.output + seen)))
+
+			seen.append(line)
+
+			if text in line:
+				self.output += seen
+				return "".join(seen)
+
+	def stop(self):
+		import signal
+
+		if self.process.poll() is None:
+			self.process.send_signal(signal.SIGINT)
+
+		try:
+			self.process.wait(timeout=10)
+		except subprocess.TimeoutExpired:
+			self.process.kill()
+			self.process.wait()
+
+@pytest.fixture
+def project(tmp_path):
+	if os.name == "nt":
+		pytest.skip("the fake tools are Python scripts run through a shebang")
+
+	return Project(str(tmp_path))
@@ -0,0 +1,313 @@
+@header package shader
+@header import sg "../lib/sokol/gfx"
+@header Mat4 :: matrix[4,4]f32
+@header Vec3 :: [3]f32
+@ctype mat4 Mat4
+@ctype vec3 Vec3
+@vs vs
+layout(binding=0) uniform vs_params {
+mat4 view_projection;
+mat4 model;
+mat4 direct_light_mvp;
+vec3 view_pos;
+};
+in vec4 pos;
+in vec4 normal;
+in vec2 texcoord0;
+out vec2 uv;
+out vec4 frag_pos;
+out vec3 frag_norm;
+out vec3 view_position;
+out vec4 direct_light_pos;
+void main() {
+gl_Position = view_projection * model * pos;
+uv = texcoord0;
+frag_pos = model * pos;
+frag_norm = normalize(mat3(model) * normal.xyz);
+view_position = view_pos;
+direct_light_pos = direct_light_mvp * pos;
+#if !SOKOL_GLSL
+direct_light_pos.y = -direct_light_pos.y;
+#endif
+}
+@end
+@fs fs
+#define PCF_SAMPLES 15
+vec4 gamma_to_linear(vec4 color) {
+vec3 linear_rgb;
+if (color.r <= 0.04045) {
+linear_rgb.r = color.r / 12.92;
+} else {
+linear_rgb.r = pow(abs(color.r + 0.055) / 1.055, 2.4);
+}
+if (color.g <= 0.04045) {
+linear_rgb.g = color.g / 12.92;
+} else {
+linear_rgb.g = pow(abs(color.g + 0.055) / 1.055, 2.4);
+}
+if (color.b <= 0.04045) {
+linear_rgb.b = color.b / 12.92;
+} else {
+linear_rgb.b = pow(abs(color.b + 0.055) / 1.055, 2.4);
+}
+return vec4(linear_rgb, color.a);
+}
+vec4 linear_to_gamma(vec4 color) {
+vec3 srgb;
+if (color.r <= 0.0031308) {
+srgb.r = color.r * 12.92;
+} else {
+srgb.r = 1.055 * pow(abs(color.r), 1.0/2.4) - 0.055;
+}
+if (color.g <= 0.0031308) {
+srgb.g = color.g * 12.92;
+} else {
+srgb.g = 1.055 * pow(abs(color.g), 1.0/2.4) - 0.055;
+}
+if (color.b <= 0.0031308) {
+srgb.b = color.b * 12.92;
+} else {
+srgb.b = 1.055 * pow(abs(color.b), 1.0/2.4) - 0.055;
+}
+return vec4(srgb, color.a);
+}
+#define MAX_POINT_LIGHTS 8
+struct point_light_t {
+vec3 position;
+vec3 color;
+float range;
+float intensity;
+};
+struct directional_light_t {
+vec3 position;
+vec3 direction;
+vec3 color;
+float intensity;
+};
+vec3 calculate_point_light(point_light_t light, vec3 frag_pos, vec3 normal, vec3 view_dir) {
+vec3 light_pos = light.position;
+vec3 light_color = light.color;
+float intensity = light.intensity;
+float range = light.range;
+vec3 light_dir = normalize(light_pos - frag_pos);
+float distance = length(light_pos - frag_pos);
+float attenuation = 1.0 - clamp(distance / range, 0.0, 1.0);
+attenuation = attenuation * attenuation;
+float diff = max(dot(normal, light_dir), 0.0);
+vec3 halfway_dir = normalize(light_dir + view_dir);
+float spec = pow(max(dot(normal, halfway_dir), 0.0), 64.0);
+vec3 diffuse = light_color * diff * intensity * attenuation;
+vec3 specular = light_color * spec * intensity * attenuation * 2;
+return diffuse + specular;
+}
+vec3 calculate_directional_light(directional_light_t light, vec3 normal, vec3 view_dir) {
+vec3 light_dir = normalize(-light.direction);
+float diff = max(dot(normal, light_dir), 0.0);
+vec3 halfway_dir = normalize(light_dir + view_dir);
+float spec = pow(max(dot(normal, halfway_dir), 0.0), 64.0);
+vec3 diffuse = light.color * diff * light.intensity;
+vec3 specular = light.color * spec * light.intensity * 2;
+return diffuse + specular;
+}
+float interleaved_gradient_noise(vec2 position) {
+vec3 magic = vec3(0.06711056, 0.00583715, 52.9829189);
+return fract(magic.z * fract(dot(position, magic.xy)));
+}
+vec2 vogel_disk_sample(int sample_index, int sample_count, float phi) {
+float golden_angle = 2.4;
+float radius = sqrt(float(sample_index) + 0.5) / sqrt(float(sample_count));
+float theta = float(sample_index) * golden_angle + phi;
+return radius * vec2(cos(theta), sin(theta));
+}
+const vec2 pcf_kernel_16x16[16] = vec2[](
+vec2(0.98, 0.18),
+vec2(0.71, 0.67),
+vec2(0.29, 0.96),
+vec2(-0.19, 0.81),
+vec2(-0.62, 0.78),
+vec2(-0.92, 0.23),
+vec2(-0.99, -0.10),
+vec2(-0.73, -0.68),
+vec2(-0.31, -0.95),
+vec2(0.18, -0.98),
+vec2(0.60, -0.80),
+vec2(0.93, -0.36),
+vec2(0.54, 0.32),
+vec2(-0.44, 0.12),
+vec2(-0.56, -0.41),
+vec2(0.21, -0.44)
+);
+const vec2 pcf_kernel_8x8[8] = vec2[](
+vec2(0.92, 0.19),
+vec2(0.38, 0.92),
+vec2(-0.36, 0.62),
+vec2(-0.85, 0.52),
+vec2(-0.92, -0.19),
+vec2(-0.21, -0.44),
+vec2(0.73, -0.68),
+vec2(0.19, -0.98)
+);
+const vec2 pcf_kernel_4x4[4] = vec2[](
+vec2(0.92, 0.19),
+vec2(-0.38, 0.60),
+vec2(-0.73, -0.68),
+vec2(0.21, -0.44)
+);
+const int PCF_NUM_SAMPLES_16x16 = 16;
+const int PCF_NUM_SAMPLES_8X8 = 8;
+const int PCF_NUM_SAMPLES_4X4 = 4;
+const float PCF_SAMPLE_RADIUS = 0.002;
+float calculate_pcf_shadow_vogel(texture2D shadow_texture, sampler shadow_sampler, vec3 light_space_pos, float bias, int sample_count, vec2 frag_coord) {
+float shadow = 0.0;
+float noise = interleaved_gradient_noise(frag_coord);
+float rotation_angle = noise * 6.28318530718;
+for (int i = 0; i < sample_count; i++) {
+vec2 offset = vogel_disk_sample(i, sample_count, rotation_angle) * PCF_SAMPLE_RADIUS;
+vec3 sample_pos = vec3(light_space_pos.xy + offset, light_space_pos.z - bias);
+shadow += texture(sampler2DShadow(shadow_texture, shadow_sampler), sample_pos);
+}
+return shadow / float(sample_count);
+}
+float calculate_shadow_bias(vec3 normal, vec3 light_dir) {
+const float min_bias = 0.0001;
+const float max_bias = 0.0005;
+float cos_angle = dot(normal, light_dir);
+return max(max_bias * (1.0 - cos_angle), min_bias);
+}
+float calculate_shadow(
+texture2D shadow_texture,
+sampler shadow_sampler,
+vec4 light_space_pos,
+vec3 normal,
+vec3 light_dir,
+vec2 frag_coord
+) {
+vec3 proj_coords = light_space_pos.xyz / light_space_pos.w;
+vec3 shadow_coords;
+shadow_coords.xy = (proj_coords.xy + 1.0) * 0.5;
+shadow_coords.z = proj_coords.z;
+if (shadow_coords.x < 0.0 || shadow_coords.x > 1.0 ||
+shadow_coords.y < 0.0 || shadow_coords.y > 1.0 ||
+shadow_coords.z < 0.0 || shadow_coords.z > 1.0) {
+return 1.0;
+}
+float bias = calculate_shadow_bias(normal, light_dir);
+return calculate_pcf_shadow_vogel(shadow_texture, shadow_sampler, shadow_coords, bias, PCF_SAMPLES, frag_coord);
+}
+vec4 apply_shadow(vec4 lighting, float shadow_factor, float ambient_factor) {
+return lighting * mix(ambient_factor, 1.0, shadow_factor);
+}
+layout(binding=0) uniform texture2D tex;
+layout(binding=0) uniform sampler smp;
+layout(binding=1) uniform texture2D shadow_tex;
+layout(binding=1) uniform sampler shadow_smp;
+layout(binding = 2) uniform fs_point_light {
+vec4 position[MAX_POINT_LIGHTS];
+vec4 color[MAX_POINT_LIGHTS];
+vec4 range[MAX_POINT_LIGHTS];
+vec4 intensity[MAX_POINT_LIGHTS];
+} point_lights;
+layout(binding = 3) uniform fs_directional_light {
+vec4 position;
+vec4 direction;
+vec4 color;
+vec4 intensity;
+} directional_light;
+in vec2 uv;
+in vec4 frag_pos;
+in vec3 frag_norm;
+in vec3 view_position;
+in vec4 direct_light_pos;
+out vec4 frag_color;
+point_light_t get_point_light(int index) {
+return point_light_t(
+point_lights.position[index].xyz,
+point_lights.color[index].rgb,
+point_lights.range[index].x,
+point_lights.intensity[index].x
+);
+}
+directional_light_t get_directional_light() {
+return directional_light_t(
+directional_light.position.xyz,
+directional_light.direction.xyz,
+directional_light.color.rgb,
+directional_light.intensity.x
+);
+}
+vec3 apply_cel_shading(vec3 color) {
+float brightness = dot(color, vec3(0.299, 0.587, 0.114));
+const float levels = 3.0;
+float quantized = floor(brightness * levels) / levels;
+quantized = mix(quantized, quantized + 0.1, 0.5);
+vec3 cel_shaded = color * (quantized / max(brightness, 0.001));
+return cel_shaded;
+}
+void main() {
+vec3 normal = normalize(frag_norm);
+vec3 view_dir = normalize(view_position - frag_pos.xyz);
+vec4 albedo = gamma_to_linear(texture(sampler2D(tex, smp), uv));
+vec4 lighting = vec4(0.4, 0.4, 0.4, 1.0);
+for(int i = 0; i < MAX_POINT_LIGHTS; i += 4) {
+if (i + 0 < MAX_POINT_LIGHTS) lighting.rgb += calculate_point_light(get_point_light(i + 0), frag_pos.xyz, normal, view_dir);
+if (i + 1 < MAX_POINT_LIGHTS) lighting.rgb += calculate_point_light(get_point_light(i + 1), frag_pos.xyz, normal, view_dir);
+if (i + 2 < MAX_POINT_LIGHTS) lighting.rgb += calculate_point_light(get_point_light(i + 2), frag_pos.xyz, normal, view_dir);
+if (i + 3 < MAX_POINT_LIGHTS) lighting.rgb += calculate_point_light(get_point_light(i + 3), frag_pos.xyz, normal, view_dir);
+}
+vec3 direct_light_contrib = calculate_directional_light(get_directional_light(), normal, view_dir);
+lighting.rgb += direct_light_contrib;
+lighting.rgb = apply_cel_shading(lighting.rgb);
+vec3 light_dir = normalize(directional_light.direction.xyz);
+float shadow_factor = calculate_shadow(
+shadow_tex,
+shadow_smp,
+direct_light_pos,
+normal,
+light_dir,
+gl_FragCoord.xy
+);
+lighting = apply_shadow(lighting, shadow_factor, 0.5);
+vec4 final_color = albedo * lighting;
+frag_color = linear_to_gamma(final_color);
+}
+@end
+@program texcube vs fs
+@vs vs_shadow
+@glsl_options fixup_clipspace
+layout(binding=0) uniform vs_shadow_params {
+mat4 view_projection;
+mat4 model;
+};
+in vec4 pos;
+void main() {
+gl_Position = view_projection * model * pos;
+}
+@end
+@fs fs_shadow
+void main() { }
+@end
+@program shadow vs_shadow fs_shadow
+@vs vs_outline
+layout(binding=0) uniform vs_outline_params {
+mat4 view_projection;
+mat4 model;
+vec3 view_pos;
+float pixel_factor;
+};
+in vec4 pos;
+in vec4 normal;
+const float OUTLINE_PIXELS = 2.0;
+void main() {
+vec4 world_pos = model * pos;
+vec3 world_normal = normalize(mat3(model) * normal.xyz);
+float dist = length(world_pos.xyz - view_pos);
+float scale = OUTLINE_PIXELS * pixel_factor * dist;
+world_pos.xyz += world_normal * scale;
+gl_Position = view_projection * world_pos;
+}
+@end
+@fs fs_outline
+out vec4 frag_color;
+void main() { frag_color = vec4(0,0,0,1); }
+@end
+@program outline vs_outline fs_outline
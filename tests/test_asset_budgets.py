@@ -0,0 +1,112 @@
+"""-asset-report checks every assets/*.glb against asset_budgets.json"""
+
+import json
+import struct
+import zlib
+
+REPORT = "build/asset_report.json"
+
+def png(width, height):
+	"""An RGBA PNG of zeros"""
+	def chunk(kind, data):
+		return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+	rows = b"".join(b"\0" + bytes(width * 4) for _ in range(height))
+	return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)) + chunk(b"IDAT", zlib.compress(rows)) + chunk(b"IEND", b"")
+
+def write_glb(project, rel, vertex_count, triangle_count, attributes=("POSITION", "NORMAL", "TEXCOORD_0"), texture_size=16):
+	"""A .glb with one primitive with the given counts and a base color texture, the data itself is zeros"""
+	sizes = {"POSITION": ("VEC3", 12), "NORMAL": ("VEC3", 12), "TEXCOORD_0": ("VEC2", 8)}
+	views, accessors, mesh_attributes = [], [], {}
+	binary = b""
+
+	for name in attributes:
+		kind, size = sizes[name]
+		views.append({"buffer": 0, "byteOffset": len(binary), "byteLength": vertex_count * size})
+		mesh_attributes[name] = len(accessors)
+		accessors.append({"bufferView": len(views) - 1, "componentType": 5126, "count": vertex_count, "type": kind})
+		binary += bytes(vertex_count * size)
+
+	views.append({"buffer": 0, "byteOffset": len(binary), "byteLength": triangle_count * 12})
+	accessors.append({"bufferView": len(views) - 1, "componentType": 5125, "count": triangle_count * 3, "type": "SCALAR"})
+	binary += bytes(triangle_count * 12)
+
+	image = png(texture_size, texture_size)
+	views.append({"buffer": 0, "byteOffset": len(binary), "byteLength": len(image)})
+	binary += image + b"\0" * (-len(image) % 4)
+
+	gltf = {
+		"asset": {"version": "2.0"},
+		"buffers": [{"byteLength": len(binary)}],
+		"bufferViews": views,
+		"accessors": accessors,
+		"meshes": [{"primitives": [{"attributes": mesh_attributes, "indices": len(accessors) - 1}]}],
+		"images": [{"bufferView": len(views) - 1, "mimeType": "image/png"}],
+		"textures": [{"source": 0}],
+		"materials": [{"pbrMetallicRoughness": {"baseColorTexture": {"index": 0}}}],
+	}
+
+	js = json.dumps(gltf).encode()
+	js += b" " * (-len(js) % 4)
+	data = struct.pack("<III", 0x46546C67, 2, 12 + 8 + len(js) + 8 + len(binary))
+	data += struct.pack("<II", len(js), 0x4E4F534A) + js
+	data += struct.pack("<II", len(binary), 0x004E4942) + binary
+	project.write(rel, data)
+	return data
+
+def write_budgets(project, **budgets):
+	project.write("asset_budgets.json", json.dumps(budgets))
+
+def report(project):
+	with open(project.path(REPORT)) as f:
+		return json.load(f)
+
+def test_assets_within_budget(project):
+	write_glb(project, "assets/small.glb", 100, 50)
+	res = project.run("-asset-report")
+
+	assert "small.glb" in res.stdout
+	[asset] = report(project)["assets"]
+	assert (asset["vertices"], asset["triangles"], asset["index_bits"]) == (100, 50, 32)
+	assert asset["texture"] == {"width": 16, "height": 16, "channels": 4, "bit_depth": 8}
+	assert report(project)["violations"] == []
+
+def test_violations_fail_the_build(project):
+	write_glb(project, "assets/big.glb", 1000, 600)
+	write_glb(project, "assets/no_uv.glb", 10, 5, attributes=("POSITION", "NORMAL"))
+	write_glb(project, "assets/huge_texture.glb", 10, 5, texture_size=64)
+	write_budgets(project, max_triangles=500, max_texture_size=32)
+
+	res = project.run("-asset-report", check=False)
+	assert res.returncode != 0
+	assert "big.glb: 600 triangles > 500" in res.stdout
+	assert "no_uv.glb" in res.stdout and "TEXCOORD_0" in res.stdout
+	assert "huge_texture.glb: 64x64 texture > 32" in res.stdout
+	assert "3 asset budget violation(s)" in res.stdout + res.stderr
+
+def test_overrides_apply_by_pattern(project):
+	write_glb(project, "assets/hero/hero.glb", 1000, 600)
+	write_budgets(project, max_triangles=500, overrides={"hero/*": {"max_triangles": 1000}})
+
+	project.run("-asset-report")
+
+def test_corrupt_glbs_are_violations(project):
+	data = write_glb(project, "assets/good.glb", 10, 5)
+	project.write("assets/truncated.glb", data[:len(data) // 2])
+	project.write("assets/tiny.glb", b"glTF")
+	project.write("assets/bad_chunk.glb", data[:12] + struct.pack("<II", 1 << 30, 0x4E4F534A))
+
+	res = project.run("-asset-report", check=False)
+	assert res.returncode != 0
+	assert "Traceback" not in res.stderr
+
+	problems = {a["path"]: a["violations"] for a in report(project)["assets"]}
+	assert problems["good.glb"] == []
+
+	for name in ("truncated.glb", "tiny.glb", "bad_chunk.glb"):
+		assert problems[name][0].startswith("can't be read:"), problems[name]
+
+def test_unknown_budget_is_an_error(project):
+	write_budgets(project, max_polygons=10)
+	res = project.run("-asset-report", check=False)
+	assert "Unknown budget 'max_polygons'" in res.stdout + res.stderr
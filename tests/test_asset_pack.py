@@ -0,0 +1,99 @@
+"""-release -pack-assets ships one assets.pack, read back here with the layout from build.py"""
+
+import os
+import struct
+
+PACK = "build/release/assets.pack"
+HEADER_FORMAT = "<4sIIIQQ"
+ENTRY_FORMAT = "<QQQQII"
+
+FILES = {
+	"a.bin": b"first asset",
+	"b/c.bin": b"x" * 5000,
+	"b/d.bin": b"first asset",  # same content as a.bin
+	"e.txt": b"",
+}
+
+def fnv1a_64(data):
+	h = 0xcbf29ce484222325
+
+	for b in data:
+		h = ((h ^ b) * 0x100000001b3) & 0xFFFFFFFFFFFFFFFF
+
+	return h
+
+def make_assets(project, files=FILES):
+	project.write("source/game.odin", "package game\n")
+
+	for path, data in files.items():
+		project.write("assets/" + path, data)
+
+def read_pack(project):
+	data = project.read(PACK)
+	magic, version, count, alignment, toc_offset, strings_offset = struct.unpack_from(HEADER_FORMAT, data, 0)
+	assert magic == b"TPAK" and version == 1
+
+	entries = []
+	for i in range(count):
+		path_hash, offset, size, content_hash, path_offset, path_length = struct.unpack_from(
+			ENTRY_FORMAT, data, toc_offset + i * struct.calcsize(ENTRY_FORMAT))
+		path = data[strings_offset + path_offset:strings_offset + path_offset + path_length].decode()
+		entries.append({"path": path, "hash": path_hash, "offset": offset, "payload": data[offset:offset + size]})
+
+	return alignment, entries
+
+def test_round_trip(project):
+	make_assets(project)
+	res = project.run("-release", "-pack-assets")
+	assert "Verified build/release/assets.pack: 4 assets OK" in res.stdout
+	assert not os.path.exists(project.path("build/release/assets"))
+
+	alignment, entries = read_pack(project)
+	assert {e["path"]: e["payload"] for e in entries} == {"assets/" + p: d for p, d in FILES.items()}
+	assert [e["hash"] for e in entries] == sorted(fnv1a_64(e["path"].encode()) for e in entries)
+	assert all(e["offset"] % alignment == 0 for e in entries)
+
+def test_identical_payloads_stored_once(project):
+	make_assets(project)
+	res = project.run("-release", "-pack-assets")
+	assert "Packed 4 assets (3 unique)" in res.stdout
+
+	offsets = {e["path"]: e["offset"] for e in read_pack(project)[1]}
+	assert offsets["assets/a.bin"] == offsets["assets/b/d.bin"]
+
+def test_page_alignment(project):
+	make_assets(project)
+	project.run("-release", "-pack-assets", "-pack-alignment=4096")
+
+	alignment, entries = read_pack(project)
+	assert alignment == 4096
+	assert all(e["offset"] % 4096 == 0 for e in entries)
+
+def test_bad_alignment_fails(project):
+	make_assets(project)
+	res = project.run("-release", "-pack-assets", "-pack-alignment=24", check=False)
+	assert res.returncode != 0
+	assert "power of two" in res.stdout
+
+def test_unchanged_assets_leave_the_pack_alone(project):
+	make_assets(project)
+	project.run("-release", "-pack-assets")
+	data = project.read(PACK)
+	mtime = os.stat(project.path(PACK)).st_mtime_ns
+
+	res = project.run("-release", "-pack-assets")
+	assert "is up to date (4 assets)" in res.stdout
+	assert project.read(PACK) == data
+	assert os.stat(project.path(PACK)).st_mtime_ns == mtime
+
+	project.write("assets/a.bin", b"changed")
+	project.run("-release", "-pack-assets")
+	assert {e["path"]: e["payload"] for e in read_pack(project)[1]}["assets/a.bin"] == b"changed"
+
+def test_loose_release_removes_the_pack(project):
+	make_assets(project)
+	project.run("-release", "-pack-assets")
+	project.run("-release")
+
+	assert not os.path.exists(project.path(PACK))
+	assert project.read("build/release/assets/b/c.bin") == FILES["b/c.bin"]
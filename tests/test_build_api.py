@@ -0,0 +1,38 @@
+"""build.py can be imported and driven with options instead of command line arguments"""
+
+import os
+
+import pytest
+
+import build
+from build_tools import common
+
+def test_parse_options():
+	options = build.parse_options(["-watch", "-j", "3"])
+	assert options.hot_reload and options.watch
+	assert options.j == 3
+
+def test_default_options():
+	options = build.default_options(debug=True)
+	assert options.debug and not options.release
+
+	with pytest.raises(TypeError):
+		build.default_options(no_such_option=True)
+
+def test_build_mode_conflicts(capsys):
+	assert build.main(["-hot-reload", "-release"]) == 1
+	assert "Can only use one of" in capsys.readouterr().out
+
+def test_entry_point_runs_in_the_project_with_its_options(tmp_path, monkeypatch):
+	monkeypatch.setattr(common, "PROJECT_DIR", str(tmp_path))
+	(tmp_path / "source").mkdir()
+	(tmp_path / "source" / "shader.glsl").write_text("@program quad vs fs\n")
+	cwd = os.getcwd()
+	args = common.args
+
+	# There is no sokol-shdc in the scratch project
+	with pytest.raises(build.Build_Error, match="Could not find shader compiler"):
+		build.build_shaders(options=build.default_options(shaders=True))
+
+	assert os.getcwd() == cwd
+	assert common.args is args
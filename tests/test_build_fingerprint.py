@@ -0,0 +1,70 @@
+"""Hot reload builds skip the odin compile when sources, compiler and flags are unchanged"""
+
+import os
+
+def builds(project):
+	return [c for c in project.tool_calls("odin") if c.startswith("build ")]
+
+def dll_builds(project):
+	return [c for c in builds(project) if "-build-mode:dll" in c]
+
+def make_game(project):
+	project.write("source/game.odin", "package game\n")
+	project.write("source/lib/main_hot_reload/main.odin", 'package main\nimport "../util"\n')
+	project.write("source/lib/util/util.odin", "package util\n")
+
+def test_second_build_skips_odin(project):
+	make_game(project)
+	project.run("-hot-reload")
+	assert len(builds(project)) == 2
+
+	res = project.run("-hot-reload")
+	assert builds(project) == []
+	assert "game.so is up to date, skipping build" in res.stdout
+	assert "game_hot_reload.bin is up to date, skipping build" in res.stdout
+
+def test_touch_is_not_a_change(project):
+	make_game(project)
+	project.run("-hot-reload")
+
+	path = project.path("source/game.odin")
+	st = os.stat(path)
+	os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+	project.run("-hot-reload")
+	assert builds(project) == []
+
+def test_source_change_only_rebuilds_what_uses_it(project):
+	make_game(project)
+	project.run("-hot-reload")
+
+	project.write("source/game.odin", "package game\n// changed\n")
+	project.run("-hot-reload")
+	assert len(dll_builds(project)) == 1
+	assert len(builds(project)) == 1
+
+	# The executable imports util by relative path
+	project.write("source/lib/util/util.odin", "package util\n// changed\n")
+	project.run("-hot-reload")
+	assert len(builds(project)) == 2
+
+def test_flags_and_compiler_version_are_part_of_the_fingerprint(project):
+	make_game(project)
+	project.run("-hot-reload")
+
+	project.run("-hot-reload", "-debug")
+	assert len(builds(project)) == 2
+
+	project.run("-hot-reload", "-debug", env={"TOY_ODIN_VERSION": "dev-newer"})
+	assert len(builds(project)) == 2
+
+def test_failed_build_is_not_fingerprinted(project):
+	make_game(project)
+	project.run("-hot-reload")
+	project.write("source/game.odin", "package game\n// broken\n")
+
+	res = project.run("-hot-reload", check=False, env={"TOY_ODIN_FAIL": "1"})
+	assert res.returncode != 0
+
+	project.run("-hot-reload")
+	assert len(dll_builds(project)) == 1
@@ -0,0 +1,68 @@
+"""Build steps run as a Build_Graph: ordered by their inputs and outputs, stopped as a whole on failure"""
+
+import json
+import os
+import time
+
+SHADER = """@vs vs
+void main() { gl_Position = vec4(0.0); }
+@end
+@fs fs
+out vec4 frag_color;
+void main() { frag_color = vec4(1.0); }
+@end
+@program quad vs fs
+"""
+
+def make_game(project):
+	project.write("source/game.odin", "package game\n")
+	project.write("source/lib/main_hot_reload/main.odin", "package main\n")
+	project.write("source/shader/shader.glsl", SHADER)
+	project.write("assets/a.txt", "a")
+
+def task_spans(project, trace):
+	with open(project.path(trace)) as f:
+		return {e["name"]: e for e in json.load(f)["traceEvents"] if e["cat"] == "task"}
+
+def test_tasks_wait_for_the_outputs_they_read(project):
+	make_game(project)
+	res = project.run("-hot-reload", "-j", "4", "-trace=build/trace.json")
+
+	assert "Running 4 build tasks on 4 worker(s): shaders, dll (after shaders), assets, exe" in res.stdout
+
+	spans = task_spans(project, "build/trace.json")
+	assert spans["dll"]["ts"] >= spans["shaders"]["ts"] + spans["shaders"]["dur"]
+
+def test_independent_tasks_run_concurrently(project):
+	make_game(project)
+	start = time.monotonic()
+	project.run("-hot-reload", "-j", "4", "-no-shader-compile", "-trace=build/trace.json", env={"TOY_ODIN_SLEEP": "1:-out:"})
+	assert time.monotonic() - start < 3
+
+	spans = task_spans(project, "build/trace.json")
+	dll, exe = spans["dll"], spans["exe"]
+	assert dll["ts"] < exe["ts"] + exe["dur"] and exe["ts"] < dll["ts"] + dll["dur"]
+
+def test_failed_task_stops_its_dependents(project):
+	make_game(project)
+	project.write("source/shader/shader.glsl", SHADER + "#error broken\n")
+	res = project.run("-hot-reload", "-j", "1", check=False)
+
+	assert res.returncode != 0
+	assert "Build task 'shaders' failed: 1 of 1 shader compile(s) failed" in res.stdout
+	assert "Cancelled: assets, exe" in res.stdout
+	assert "Not started: dll" in res.stdout
+	assert project.tool_calls("odin") == []
+	assert not os.path.exists(project.path("build/hot_reload/assets"))
+
+def test_failed_task_cancels_running_commands(project):
+	make_game(project)
+	start = time.monotonic()
+	res = project.run("-hot-reload", "-j", "4", "-no-shader-compile", check=False,
+		env={"TOY_ODIN_FAIL": "-build-mode:dll", "TOY_ODIN_SLEEP": "30:main_hot_reload"})
+
+	assert res.returncode != 0
+	assert time.monotonic() - start < 15
+	assert "Build task 'dll' failed: Failed running:odin build source" in res.stdout
+	assert "Cancelled: exe" in res.stdout
+	assert "[dll] fake odin: failing as asked" in res.stdout
@@ -0,0 +1,117 @@
+"""store_cooked_outputs stores identical cooked files once and points the per-asset files at them"""
+
+import os
+
+import pytest
+
+from build_tools import assets
+
+@pytest.fixture
+def cook_dir(tmp_path, monkeypatch):
+	monkeypatch.chdir(tmp_path)
+	os.makedirs("build/cook_cache")
+
+def cache_file(name, data):
+	path = os.path.join("build/cook_cache", name)
+
+	with open(path, 'wb') as f:
+		f.write(data)
+
+	return path
+
+def output(name):
+	return os.path.join(assets.COOKED_ASSETS_DIR, name)
+
+def resolve(path):
+	"""What the game's read_cooked_asset ends up reading for path"""
+	target = assets.read_cooked_reference(path)
+
+	if target is not None:
+		path = os.path.join(assets.COOKED_ASSETS_DIR, target.removeprefix("assets/"))
+
+	with open(path, 'rb') as f:
+		return f.read()
+
+def test_reference_round_trip(tmp_path):
+	path = tmp_path / "a.tex"
+	path.write_bytes(assets.cooked_reference("assets/_shared/0123abcd.tex"))
+	assert assets.read_cooked_reference(str(path)) == "assets/_shared/0123abcd.tex"
+
+	path.write_bytes(b"TEX0" + bytes(100))
+	assert assets.read_cooked_reference(str(path)) is None
+
+def test_identical_outputs_are_shared(cook_dir):
+	texture = b"TEX0" + bytes(range(256)) * 64
+	outputs = [
+		("assets/cube.glb", output("cube.tex"), cache_file("1.tex", texture)),
+		("assets/props/floor.glb", output("props/floor.tex"), cache_file("2.tex", texture)),
+		("assets/cube.glb", output("cube.mesh"), cache_file("3.mesh", b"MESH cube")),
+	]
+
+	written, total_bytes, stored_bytes, shared = assets.store_cooked_outputs(outputs)
+
+	[(shared_path, size, sources)] = shared
+	assert shared_path.startswith(os.path.join(assets.COOKED_ASSETS_DIR, assets.COOKED_SHARED_DIR))
+	assert shared_path.endswith(".tex")
+	assert sources == ["assets/cube.glb", "assets/props/floor.glb"]
+
+	assert resolve(output("cube.tex")) == texture
+	assert resolve(output("props/floor.tex")) == texture
+	assert assets.read_cooked_reference(output("cube.mesh")) is None
+	assert resolve(output("cube.mesh")) == b"MESH cube"
+
+	assert written == {os.path.normpath(p) for p in (shared_path, output("cube.tex"), output("props/floor.tex"), output("cube.mesh"))}
+	assert total_bytes == 2 * len(texture) + len(b"MESH cube")
+	assert stored_bytes < len(texture) + 200
+
+def test_outputs_that_stop_matching_are_written_again(cook_dir):
+	assets.store_cooked_outputs([
+		("a.glb", output("a.tex"), cache_file("1.tex", b"same")),
+		("b.glb", output("b.tex"), cache_file("2.tex", b"same")),
+	])
+
+	written, total_bytes, stored_bytes, shared = assets.store_cooked_outputs([
+		("a.glb", output("a.tex"), cache_file("1.tex", b"same")),
+		("b.glb", output("b.tex"), cache_file("2.tex", b"changed")),
+	])
+
+	assert shared == []
+	assert resolve(output("a.tex")) == b"same"
+	assert resolve(output("b.tex")) == b"changed"
+
+def cooked_texture(pixel_format):
+	import struct
+	return struct.pack("<4s5I", assets.COOKED_TEXTURE_MAGIC, assets.COOKED_TEXTURE_VERSION, 1, 1, pixel_format, 1).ljust(assets.COOKED_TEXTURE_HEADER_SIZE, b"\0")
+
+def write_files(root, files):
+	for rel, data in files.items():
+		path = os.path.join(root, rel)
+		os.makedirs(os.path.dirname(path), exist_ok=True)
+
+		with open(path, 'wb') as f:
+			f.write(data)
+
+	return root
+
+def test_glbs_replaced_by_cooked_files_are_not_shipped(tmp_path, monkeypatch):
+	monkeypatch.chdir(tmp_path)
+	asset_dir = write_files("assets", {"rgba.glb": b"glTF", "bc1.glb": b"glTF", "mesh_only.glb": b"glTF"})
+	cooked = write_files("cooked", {
+		"rgba.mesh": b"mesh",
+		"_shared/0123.tex": cooked_texture(assets.COOKED_TEXTURE_FORMAT_RGBA8),
+		"rgba.tex": assets.cooked_reference("assets/_shared/0123.tex"),
+		"bc1.mesh": b"mesh",
+		"bc1.tex": cooked_texture(assets.COOKED_TEXTURE_FORMAT_BC1),
+		"mesh_only.mesh": b"mesh",
+	})
+
+	sources = assets.asset_pack_sources([asset_dir, cooked])
+	assert "assets/rgba.glb" not in sources
+	assert {"assets/rgba.mesh", "assets/rgba.tex", "assets/bc1.glb", "assets/mesh_only.glb"} <= set(sources)
+
+	# Loose release assets leave it out too, hot reload builds keep it
+	assets.sync_assets([asset_dir, cooked], "release", skip_replaced_glbs=True)
+	assets.sync_assets([asset_dir, cooked], "hot_reload")
+	assert not os.path.exists("release/rgba.glb")
+	assert os.path.exists("release/bc1.glb")
+	assert os.path.exists("hot_reload/rgba.glb")
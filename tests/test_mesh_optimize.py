@@ -0,0 +1,168 @@
+"""-cook-assets welds, cleans up and reorders meshes for the vertex cache when NumPy is installed"""
+
+import json
+import random
+import re
+import struct
+
+import pytest
+
+pytest.importorskip("numpy")
+
+HEADER_FORMAT = "<4s5I16I"
+POSITIONS, NORMALS, UVS, INDICES, SMOOTH_NORMALS = range(5)
+
+def write_glb(project, rel, positions, indices, index_format="I"):
+	"""A .glb with one primitive: positions, flat normals, zero UVs and the given indices"""
+	count = len(positions)
+	chunks = [
+		struct.pack("<%if" % (3 * count), *(c for p in positions for c in p)),
+		struct.pack("<%if" % (3 * count), *([0.0, 1.0, 0.0] * count)),
+		struct.pack("<%if" % (2 * count), *([0.0, 0.0] * count)),
+		struct.pack("<%i%s" % (len(indices), index_format), *indices),
+	]
+
+	views = []
+	binary = b""
+
+	for chunk in chunks:
+		binary += b"\0" * (-len(binary) % 4)
+		views.append({"buffer": 0, "byteOffset": len(binary), "byteLength": len(chunk)})
+		binary += chunk
+
+	binary += b"\0" * (-len(binary) % 4)
+	gltf = {
+		"asset": {"version": "2.0"},
+		"buffers": [{"byteLength": len(binary)}],
+		"bufferViews": views,
+		"accessors": [
+			{"bufferView": 0, "componentType": 5126, "count": count, "type": "VEC3"},
+			{"bufferView": 1, "componentType": 5126, "count": count, "type": "VEC3"},
+			{"bufferView": 2, "componentType": 5126, "count": count, "type": "VEC2"},
+			{"bufferView": 3, "componentType": 5125 if index_format == "I" else 5123, "count": len(indices), "type": "SCALAR"},
+		],
+		"meshes": [{"primitives": [{"attributes": {"POSITION": 0, "NORMAL": 1, "TEXCOORD_0": 2}, "indices": 3}]}],
+	}
+
+	js = json.dumps(gltf).encode()
+	js += b" " * (-len(js) % 4)
+	data = struct.pack("<III", 0x46546C67, 2, 12 + 8 + len(js) + 8 + len(binary))
+	data += struct.pack("<II", len(js), 0x4E4F534A) + js
+	data += struct.pack("<II", len(binary), 0x004E4942) + binary
+	project.write(rel, data)
+
+def read_mesh(project, rel):
+	data = project.read(rel)
+	magic, version, vertex_count, index_count, index_size, section_count, *table = struct.unpack_from(HEADER_FORMAT, data)
+	assert magic == b"TMSH"
+
+	def section(i):
+		offset, size = table[2 * i], table[2 * i + 1]
+		return data[offset:offset + size]
+
+	positions = struct.unpack("<%if" % (3 * vertex_count), section(POSITIONS))
+	positions = [positions[i:i + 3] for i in range(0, len(positions), 3)]
+	indices = struct.unpack("<%i%s" % (index_count, "H" if index_size == 2 else "I"), section(INDICES))
+	return {"vertex_count": vertex_count, "index_size": index_size, "positions": positions, "indices": list(indices),
+		"smooth_normals": len(section(SMOOTH_NORMALS))}
+
+def grid_triangles(n):
+	"""Triangles of an n x n quad grid as corner coordinates"""
+	triangles = []
+
+	for y in range(n):
+		for x in range(n):
+			a, b, c, d = (x, y, 0.0), (x + 1, y, 0.0), (x, y + 1, 0.0), (x + 1, y + 1, 0.0)
+			triangles += [(a, b, c), (b, d, c)]
+
+	return triangles
+
+def unwelded(triangles):
+	"""Every triangle gets its own three vertices, like a naive exporter writes them"""
+	positions = [p for t in triangles for p in t]
+	return positions, list(range(len(positions)))
+
+def miss_ratio(indices, cache_size=16):
+	cache = []
+	misses = 0
+
+	for i in indices:
+		if i not in cache:
+			misses += 1
+			cache.append(i)
+			if len(cache) > cache_size:
+				cache.pop(0)
+
+	return misses / (len(indices) // 3)
+
+def triangle_set(mesh):
+	p, idx = mesh["positions"], mesh["indices"]
+	return sorted(tuple(sorted(p[i] for i in idx[t:t + 3])) for t in range(0, len(idx), 3))
+
+def cook(project):
+	project.write("source/game.odin", "package game\n")
+	return project.run("-cook-assets")
+
+def report_line(res, name):
+	return next(line for line in res.stdout.splitlines() if name in line and "vertices" in line)
+
+def test_welds_identical_vertices(project):
+	triangles = grid_triangles(8)
+	write_glb(project, "assets/grid.glb", *unwelded(triangles))
+	res = cook(project)
+
+	mesh = read_mesh(project, "build/cooked_assets/grid.mesh")
+	assert mesh["vertex_count"] == 9 * 9
+	assert re.search(r"vertices\s+384 -> 81\s+u16", report_line(res, "grid.glb"))
+	assert triangle_set(mesh) == sorted(tuple(sorted(t)) for t in triangles)
+	assert mesh["smooth_normals"] == 81 * 12
+
+def test_drops_degenerate_triangles(project):
+	triangles = grid_triangles(2)
+	positions, indices = unwelded(triangles)
+	indices += [0, 0, 1, 2, 3, 2]
+	write_glb(project, "assets/grid.glb", positions, indices)
+	cook(project)
+
+	mesh = read_mesh(project, "build/cooked_assets/grid.mesh")
+	assert len(mesh["indices"]) == 3 * len(triangles)
+
+def test_reordering_lowers_the_vertex_cache_miss_ratio(project):
+	triangles = grid_triangles(24)
+	random.Random(1).shuffle(triangles)
+	positions = sorted({p for t in triangles for p in t})
+	index = {p: i for i, p in enumerate(positions)}
+	indices = [index[p] for t in triangles for p in t]
+	write_glb(project, "assets/grid.glb", positions, indices)
+	res = cook(project)
+
+	before, after = map(float, re.search(r"ACMR ([\d.]+) -> ([\d.]+)", report_line(res, "grid.glb")).groups())
+	mesh = read_mesh(project, "build/cooked_assets/grid.mesh")
+	assert before == pytest.approx(miss_ratio(indices), abs=0.01)
+	assert after == pytest.approx(miss_ratio(mesh["indices"]), abs=0.01)
+	assert after < 0.8 < before
+
+	# Vertices are renumbered in order of first use
+	first_use = list(dict.fromkeys(mesh["indices"]))
+	assert first_use == list(range(len(first_use)))
+
+def test_large_meshes_get_32_bit_indices(project):
+	triangles = [((i, 0.0, 0.0), (i, 1.0, 0.0), (i, 0.0, 1.0)) for i in range(22000)]
+	write_glb(project, "assets/big.glb", *unwelded(triangles))
+	res = cook(project)
+
+	mesh = read_mesh(project, "build/cooked_assets/big.mesh")
+	assert mesh["vertex_count"] == 66000
+	assert mesh["index_size"] == 4
+	assert max(mesh["indices"]) == 65999
+	assert "u32" in report_line(res, "big.glb")
+
+def test_missing_numpy_is_a_warning(project):
+	write_glb(project, "assets/grid.glb", *unwelded(grid_triangles(2)))
+	project.write("no_numpy/numpy.py", "raise ImportError('no numpy here')\n")
+	project.write("source/game.odin", "package game\n")
+	res = project.run("-cook-assets", env={"PYTHONPATH": project.path("no_numpy")})
+
+	assert "Warning: NumPy not found" in res.stdout
+	assert "Warning: 1 mesh(es) not optimized" in res.stdout
+	assert read_mesh(project, "build/cooked_assets/grid.mesh")["vertex_count"] == 24
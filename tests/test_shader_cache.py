@@ -0,0 +1,81 @@
+"""build_shaders caches sokol-shdc output by preprocessed source, language and shdc binary"""
+
+import os
+
+from conftest import shdc_path
+
+SHADER = """@vs vs
+#import "utils.glsl"
+void main() { gl_Position = scale(vec4(0.0)); }
+@end
+@fs fs
+out vec4 frag_color;
+void main() { frag_color = vec4(1.0); }
+@end
+@program quad vs fs
+"""
+
+UTILS = "vec4 scale(vec4 v) { return v * 2.0; }\n"
+
+GEN = "source/shader/gen__shader.odin"
+
+def make_shaders(project):
+	project.write("source/shader/shader.glsl", SHADER)
+	project.write("source/shader/utils.glsl", UTILS)
+
+def test_unchanged_sources_skip_shdc(project):
+	make_shaders(project)
+	project.run("-shaders")
+	assert len(project.tool_calls("shdc")) == 1
+	generated = project.read(GEN)
+	mtime = os.stat(project.path(GEN)).st_mtime_ns
+
+	res = project.run("-shaders")
+	assert project.tool_calls("shdc") == []
+	assert "Shader cache hit" in res.stdout
+	assert project.read(GEN) == generated
+	assert os.stat(project.path(GEN)).st_mtime_ns == mtime
+
+def test_changed_import_invalidates(project):
+	make_shaders(project)
+	project.run("-shaders")
+	generated = project.read(GEN)
+
+	project.write("source/shader/utils.glsl", UTILS.replace("2.0", "3.0"))
+	project.run("-shaders")
+	assert len(project.tool_calls("shdc")) == 1
+	assert project.read(GEN) != generated
+
+	# Going back is a cache hit on the first entry
+	project.write("source/shader/utils.glsl", UTILS)
+	project.run("-shaders")
+	assert project.tool_calls("shdc") == []
+	assert project.read(GEN) == generated
+
+def test_changed_shdc_invalidates(project):
+	make_shaders(project)
+	project.run("-shaders")
+
+	with open(project.path(shdc_path()), "a") as f:
+		f.write("# a new sokol-shdc\n")
+
+	project.run("-shaders")
+	assert len(project.tool_calls("shdc")) == 1
+
+def test_change_in_unused_file_is_a_hit(project):
+	make_shaders(project)
+	project.write("source/shader/unused.glsl", "#pragma once\nvec4 unused() { return vec4(0.0); }\n")
+	project.run("-shaders")
+
+	project.write("source/shader/unused.glsl", "#pragma once\nvec4 unused() { return vec4(1.0); }\n")
+	project.run("-shaders")
+	assert project.tool_calls("shdc") == []
+
+def test_failed_compile_leaves_no_files_behind(project):
+	make_shaders(project)
+	project.write("source/shader/utils.glsl", UTILS + "#error broken\n")
+
+	res = project.run("-shaders", check=False)
+	assert res.returncode != 0
+	assert sorted(os.listdir(project.path("source/shader"))) == ["shader.glsl", "utils.glsl"]
+	assert [f for f in os.listdir(project.path("build/shader_cache")) if f.endswith(".odin")] == []
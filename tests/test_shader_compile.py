@@ -0,0 +1,56 @@
+"""build_shaders compiles every program and language as its own job on -j workers"""
+
+import os
+
+def program(name, body="vec4(1.0)"):
+	return f"""@vs vs
+void main() {{ gl_Position = {body}; }}
+@end
+@fs fs
+out vec4 frag_color;
+void main() {{ frag_color = vec4(1.0); }}
+@end
+@program {name} vs fs
+"""
+
+def test_programs_and_languages_are_separate_jobs(project):
+	project.write("source/shader/a.glsl", program("a"))
+	project.write("source/shader/b.glsl", program("b"))
+
+	res = project.run("-shaders", "-j", "4", "-shader-langs", "glsl300es")
+	calls = sorted(project.tool_calls("shdc"))
+	assert calls == ["source_shader_a.glsl.preprocessed glsl300es", "source_shader_a.glsl.preprocessed glsl430", "source_shader_b.glsl.preprocessed glsl300es", "source_shader_b.glsl.preprocessed glsl430"]
+	assert "Compiling 4 shader job(s) on 4 worker(s)" in res.stdout
+
+	# Only the platform's language is installed, the other is cached for later
+	assert b"glsl430" in project.read("source/shader/gen__a.odin")
+
+	project.run("-shaders", "-shader-langs", "glsl300es")
+	assert project.tool_calls("shdc") == []
+
+def test_failed_job_reports_all_failures_and_keeps_the_rest(project):
+	project.write("source/shader/a.glsl", program("a"))
+	project.write("source/shader/b.glsl", program("b", "vec4(0.0);\n#error broken\n"))
+	project.write("source/shader/c.glsl", program("c", "vec4(0.0);\n#error broken\n"))
+
+	res = project.run("-shaders", "-j", "2", check=False)
+	assert res.returncode != 0
+	assert "2 of 3 shader compile(s) failed" in res.stdout
+	assert "b.glsl (glsl430)" in res.stdout and "c.glsl (glsl430)" in res.stdout
+
+	# Nothing is installed from a failed build, but a's result is cached
+	assert not os.path.exists(project.path("source/shader/gen__a.odin"))
+	project.write("source/shader/b.glsl", program("b"))
+	project.write("source/shader/c.glsl", program("c"))
+	project.run("-shaders")
+	assert sorted(project.tool_calls("shdc")) == ["source_shader_b.glsl.preprocessed glsl430", "source_shader_c.glsl.preprocessed glsl430"]
+	assert os.path.exists(project.path("source/shader/gen__a.odin"))
+
+def test_failed_preprocess_leaves_no_temporary_files(project):
+	project.write("source/shader/a.glsl", program("a"))
+	# os.walk gets to subdirectories last, so a's input is written by then
+	project.write("source/shader/z/z.glsl", '#import "missing.glsl"\n' + program("z"))
+
+	res = project.run("-shaders", check=False)
+	assert res.returncode != 0
+	assert sorted(os.listdir(project.path("source/shader"))) == ["a.glsl", "z"]
@@ -0,0 +1,76 @@
+"""build_shaders keeps the shader import graph in build/shader_cache/graph.json between runs"""
+
+import json
+import os
+
+GRAPH = "build/shader_cache/graph.json"
+
+def program(name, imports=()):
+	lines = ['#import "%s"\n' % imp for imp in imports]
+	return "".join(lines) + """@vs vs
+void main() { gl_Position = vec4(0.0); }
+@end
+@fs fs
+out vec4 frag_color;
+void main() { frag_color = vec4(1.0); }
+@end
+@program %s vs fs
+""" % name
+
+def make_shaders(project):
+	project.write("source/shader/a.glsl", program("a", ["common.glsl"]))
+	project.write("source/shader/b.glsl", program("b"))
+	project.write("source/shader/common.glsl", "#pragma once\nfloat common_value() { return 1.0; }\n")
+
+def test_graph_is_saved_and_reused(project):
+	make_shaders(project)
+	project.run("-shaders")
+
+	with open(project.path(GRAPH)) as f:
+		graph = json.load(f)
+
+	a = os.path.join("source", "shader", "a.glsl")
+	assert sorted(graph["programs"][a]["deps"]) == sorted([a, os.path.join("source", "shader", "common.glsl")])
+
+	res = project.run("-shaders")
+	assert "Preprocessing" not in res.stdout
+	assert "Shader sources unchanged: source/shader/a.glsl" in res.stdout
+	assert "Shader sources unchanged: source/shader/b.glsl" in res.stdout
+	assert project.tool_calls("shdc") == []
+
+def test_changed_import_only_preprocesses_its_programs(project):
+	make_shaders(project)
+	project.run("-shaders")
+
+	project.write("source/shader/common.glsl", "#pragma once\nfloat common_value() { return 2.0; }\n")
+	res = project.run("-shaders")
+
+	assert "Preprocessing source/shader/a.glsl (changed: source/shader/common.glsl)" in res.stdout
+	assert "Shader sources unchanged: source/shader/b.glsl" in res.stdout
+	assert project.tool_calls("shdc") == ["source_shader_a.glsl.preprocessed glsl430"]
+
+def test_touch_without_edit_keeps_the_graph_entry(project):
+	make_shaders(project)
+	project.run("-shaders")
+
+	path = project.path("source/shader/common.glsl")
+	st = os.stat(path)
+	os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+	res = project.run("-shaders")
+	assert "Preprocessing" not in res.stdout
+	assert project.tool_calls("shdc") == []
+
+def test_unreadable_graph_is_rebuilt(project):
+	make_shaders(project)
+	project.run("-shaders")
+	project.write(GRAPH, "{ not json")
+
+	res = project.run("-shaders")
+	assert "Ignoring unreadable shader graph" in res.stdout
+	assert "Preprocessing source/shader/a.glsl..." in res.stdout
+	# The preprocessed output is the same, so shdc output comes from the cache
+	assert project.tool_calls("shdc") == []
+
+	with open(project.path(GRAPH)) as f:
+		assert "programs" in json.load(f)
@@ -0,0 +1,61 @@
+"""
+Golden test for the -minify-shaders path: source/shader/shader.glsl as
+build_shaders hands it to sokol-shdc when minifying. After an intended
+change to the shaders or the minifier, regenerate the golden file with
+
+    UPDATE_GOLDEN=1 python -m pytest tests/test_shader_minify.py
+"""
+
+import os
+import subprocess
+
+import pytest
+
+import build
+from build_tools import common, shaders
+
+SHADER_PATH = "source/shader/shader.glsl"
+GOLDEN_PATH = os.path.join(os.path.dirname(__file__), "golden", "shader.min.glsl")
+
+@pytest.fixture
+def project_dir(monkeypatch):
+	monkeypatch.chdir(common.PROJECT_DIR)
+	monkeypatch.setattr(common, "args", build.default_options())
+
+def minified_shader():
+	source = shaders.expand_shader_variants(shaders.preprocess_shader(SHADER_PATH), SHADER_PATH).sources[""]
+	return shaders.minify_shader_source(source)
+
+def test_minified_shader_matches_golden(project_dir):
+	minified = minified_shader()
+
+	if os.environ.get("UPDATE_GOLDEN"):
+		with open(GOLDEN_PATH, 'w', encoding='utf-8') as f:
+			f.write(minified)
+
+	with open(GOLDEN_PATH, 'r', encoding='utf-8') as f:
+		assert minified == f.read()
+
+def test_minify_strips_dead_functions(project_dir):
+	minified = minified_shader()
+
+	# Stripping again finds nothing more to remove
+	for kind, name, lines in shaders.split_shader_snippets(minified):
+		if kind not in (None, "block") and "@include_block" not in ''.join(lines):
+			segment = ''.join(lines)
+			assert shaders.strip_dead_shader_functions(segment) == segment
+
+def test_minified_shader_compiles(project_dir, tmp_path):
+	try:
+		shdc = os.path.abspath(shaders.get_shader_compiler())
+	except build.Build_Error:
+		pytest.skip("sokol-shdc is not installed, run build.py -update-sokol")
+
+	source = tmp_path / "shader.min.glsl"
+	source.write_text(minified_shader(), encoding='utf-8')
+	out = tmp_path / "gen__shader.odin"
+
+	res = subprocess.run([shdc, "-i", str(source), "-o", str(out), "-l", shaders.get_shader_languages(), "-f", "sokol_odin"], capture_output=True, text=True)
+
+	assert res.returncode == 0, res.stdout + res.stderr
+	assert out.exists()
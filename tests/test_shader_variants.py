@@ -0,0 +1,95 @@
+"""@variants programs are compiled once per distinct permutation, with #if on features resolved first"""
+
+import pytest
+
+import build
+from build_tools import shaders
+
+VALUES = {"SHADOWS": True, "POINT_LIGHT": False, "PCF_SAMPLES": 8}
+
+@pytest.mark.parametrize("expr, expected", [
+	("SHADOWS", True),
+	("POINT_LIGHT", False),
+	("!POINT_LIGHT && SHADOWS", True),
+	("defined(POINT_LIGHT) || defined SHADOWS", True),
+	("PCF_SAMPLES >= 8 && PCF_SAMPLES < 15", True),
+	("PCF_SAMPLES == 0x8 && 010 == PCF_SAMPLES", True),
+	("(PCF_SAMPLES - 2) * 2 == 12", True),
+	("-7 / 2 == -3 && -7 % 2 == -1", True),
+	("1 << 3 == PCF_SAMPLES", True),
+	("SHADOWS ? PCF_SAMPLES == 4 : 1", False),
+	# Not decidable from the features alone, left to shdc
+	("defined(SOKOL_GLSL)", None),
+	("SHADOWS && SOKOL_GLSL", None),
+	("PCF_SAMPLES / 0", None),
+	("SHADOWS +", None),
+	("__has_include(<x.h>)", None),
+])
+def test_condition(expr, expected):
+	assert shaders.eval_shader_condition("if", expr, VALUES) is expected
+
+def test_unresolved_conditionals_are_passed_through():
+	text = """#ifdef SHADOWS
+shadows
+#endif
+#if POINT_LIGHT
+point
+#elif PCF_SAMPLES == 8
+eight
+#else
+other
+#endif
+#if defined(SOKOL_GLSL)
+#ifndef SHADOWS
+no shadows
+#endif
+glsl
+#endif
+"""
+	assert shaders.resolve_shader_features(text, VALUES) == "shadows\neight\n#if defined(SOKOL_GLSL)\nglsl\n#endif\n"
+
+def test_elif_on_other_macros_is_an_error():
+	with pytest.raises(build.Build_Error, match="nested #if"):
+		shaders.resolve_shader_features("#if POINT_LIGHT\na\n#elif defined(SOKOL_GLSL)\nb\n#endif\n", VALUES)
+
+SHADER = """@variants quad SHADOWS SAMPLES=4,2
+@vs vs
+void main() { gl_Position = vec4(0.0); }
+@end
+@fs fs
+out vec4 frag_color;
+void main() {
+#ifdef SHADOWS
+    frag_color = vec4(SAMPLES);
+#else
+    frag_color = vec4(1.0);
+#endif
+}
+@end
+@program quad vs fs
+"""
+
+def test_expansion_shares_identical_permutations():
+	expansion = shaders.expand_shader_variants(SHADER, "quad.glsl")
+
+	# Without shadows SAMPLES is unused, so both values are one program
+	assert expansion.units == ["", "quad_samples_2", "quad_no_shadows"]
+	assert "#define SAMPLES 2" in expansion.sources["quad_samples_2"]
+	assert "SHADOWS" not in expansion.sources["quad_no_shadows"].replace("quad_no_shadows", "")
+	assert "quad_variant_shader_desc :: proc (backend: sg.Backend, shadows := true, samples := 4)" in expansion.selectors
+	assert "if !shadows && samples == 2 { return quad_no_shadows_shader_desc(backend) }" in expansion.selectors
+
+def test_variants_compile_in_a_build(project):
+	project.write("source/shader/quad.glsl", SHADER)
+	project.run("-shaders")
+
+	assert sorted(project.tool_calls("shdc")) == ["source_shader_quad.glsl.preprocessed glsl430",
+		"source_shader_quad.glsl.quad_no_shadows.preprocessed glsl430", "source_shader_quad.glsl.quad_samples_2.preprocessed glsl430"]
+	assert b"quad_variant_shader_desc ::" in project.read("source/shader/gen__quad.odin")
+
+def test_stale_output_warning(project):
+	project.write("source/shader/quad.glsl", SHADER)
+	project.write("source/shader/gen__quad.odin", "package shader\n")
+
+	res = project.run("-no-shader-compile", "-hot-reload", check=False)
+	assert "gen__quad.odin has no quad_variant_shader_desc" in res.stdout
@@ -0,0 +1,137 @@
+"""download_cached revalidates and resumes downloads, extract_archive only writes what changed"""
+
+import http.server
+import os
+import threading
+import zipfile
+
+import pytest
+
+import build
+from build_tools import sokol
+
+PAYLOAD = bytes(range(256)) * 1024
+
+class File_Server(http.server.ThreadingHTTPServer):
+	"""Serves one file with an ETag and Range support, and can drop a response half way"""
+	def __init__(self):
+		super().__init__(("127.0.0.1", 0), File_Handler)
+		self.data = PAYLOAD
+		self.etag = '"v1"'
+		self.drop_after = None
+		self.requests = []
+
+	@property
+	def url(self):
+		return "http://127.0.0.1:%i/sokol.zip" % self.server_address[1]
+
+class File_Handler(http.server.BaseHTTPRequestHandler):
+	def log_message(self, *a):
+		pass
+
+	def do_GET(self):
+		server = self.server
+		server.requests.append(dict(self.headers))
+
+		if self.headers.get("If-None-Match") == server.etag:
+			self.send_response(304)
+			self.end_headers()
+			return
+
+		start = 0
+		range_header = self.headers.get("Range")
+
+		if range_header and self.headers.get("If-Range") == server.etag:
+			start = int(range_header.split("=")[1].rstrip("-"))
+
+		body = server.data[start:]
+		self.send_response(206 if start else 200)
+		self.send_header("ETag", server.etag)
+		self.send_header("Content-Length", str(len(body)))
+		self.end_headers()
+
+		if server.drop_after is not None:
+			body = body[:server.drop_after]
+			server.drop_after = None
+
+		self.wfile.write(body)
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+	monkeypatch.chdir(tmp_path)
+	server = File_Server()
+	threading.Thread(target=server.serve_forever, daemon=True).start()
+	yield server
+	server.shutdown()
+	server.server_close()
+
+def read(path):
+	with open(path, 'rb') as f:
+		return f.read()
+
+def test_unchanged_file_is_not_downloaded_again(server, capsys):
+	path = sokol.download_cached(server.url)
+	assert read(path) == PAYLOAD
+
+	assert sokol.download_cached(server.url) == path
+	assert server.requests[-1]["If-None-Match"] == '"v1"'
+	assert "unchanged, using cached download" in capsys.readouterr().out
+
+def test_changed_file_is_downloaded_again(server):
+	sokol.download_cached(server.url)
+	server.data, server.etag = b"new archive", '"v2"'
+
+	assert read(sokol.download_cached(server.url)) == b"new archive"
+
+def test_interrupted_download_resumes(server, capsys):
+	server.drop_after = 1000
+
+	with pytest.raises(build.Build_Error, match="interrupted"):
+		sokol.download_cached(server.url)
+
+	path = sokol.download_cached(server.url)
+	assert server.requests[-1]["Range"] == "bytes=1000-"
+	assert server.requests[-1]["If-Range"] == '"v1"'
+	assert "Resuming download" in capsys.readouterr().out
+	assert read(path) == PAYLOAD
+	assert not os.path.exists(path + ".part")
+
+def test_resume_restarts_when_the_file_changed(server):
+	server.drop_after = 1000
+
+	with pytest.raises(build.Build_Error):
+		sokol.download_cached(server.url)
+
+	server.data, server.etag = b"new archive", '"v2"'
+	assert read(sokol.download_cached(server.url)) == b"new archive"
+
+def test_cached_copy_is_used_when_the_server_is_gone(server, capsys):
+	path = sokol.download_cached(server.url)
+	server.shutdown()
+	server.server_close()
+
+	assert sokol.download_cached(server.url) == path
+	assert "using cached download" in capsys.readouterr().out
+
+def make_zip(path, files):
+	with zipfile.ZipFile(path, "w") as z:
+		for name, data in files.items():
+			z.writestr("top/sokol/" + name, data)
+
+def test_extract_only_writes_changed_files(tmp_path, monkeypatch):
+	monkeypatch.chdir(tmp_path)
+	make_zip("a.zip", {"a.odin": "a", "gfx/b.odin": "b", "old.odin": "old"})
+	sokol.extract_archive("a.zip", "top/sokol/", "sokol")
+
+	os.makedirs("sokol/lib")
+	with open("sokol/lib/compiled.a", "w") as f:
+		f.write("local build output")
+
+	mtime = os.stat("sokol/a.odin").st_mtime_ns
+	make_zip("a.zip", {"a.odin": "a", "gfx/b.odin": "changed"})
+	sokol.extract_archive("a.zip", "top/sokol/", "sokol")
+
+	assert os.stat("sokol/a.odin").st_mtime_ns == mtime
+	assert read("sokol/gfx/b.odin") == b"changed"
+	assert not os.path.exists("sokol/old.odin")
+	assert read("sokol/lib/compiled.a") == b"local build output"
@@ -0,0 +1,83 @@
+"""Builds sync assets/ into the build incrementally, as separate copies of the sources"""
+
+import os
+
+HOT_RELOAD_ASSETS = "build/hot_reload/assets"
+
+def make_assets(project):
+	project.write("source/game.odin", "package game\n")
+	project.write("assets/a.txt", "a")
+	project.write("assets/sub/b.txt", "b")
+
+def listing(project, rel):
+	root = project.path(rel)
+	return sorted(os.path.relpath(os.path.join(r, f), root) for r, _, files in os.walk(root) for f in files)
+
+def test_unchanged_assets_are_skipped(project):
+	make_assets(project)
+	res = project.run("-hot-reload")
+	assert "2 copied" in res.stdout
+
+	res = project.run("-hot-reload")
+	assert "0 copied" in res.stdout and "2 unchanged" in res.stdout
+
+	# Touched but not changed is caught by the content hash
+	path = project.path("assets/a.txt")
+	st = os.stat(path)
+	os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+	res = project.run("-hot-reload")
+	assert "0 copied" in res.stdout and "2 unchanged" in res.stdout
+
+def test_changes_deletes_and_renames(project):
+	make_assets(project)
+	project.run("-hot-reload")
+
+	project.write("assets/a.txt", "changed")
+	os.rename(project.path("assets/sub/b.txt"), project.path("assets/sub/c.txt"))
+	res = project.run("-hot-reload")
+
+	assert "2 copied" in res.stdout and "1 removed" in res.stdout
+	assert listing(project, HOT_RELOAD_ASSETS) == ["a.txt", os.path.join("sub", "c.txt")]
+	assert project.read(HOT_RELOAD_ASSETS + "/a.txt") == b"changed"
+
+	os.remove(project.path("assets/sub/c.txt"))
+	os.rmdir(project.path("assets/sub"))
+	project.run("-hot-reload")
+	assert listing(project, HOT_RELOAD_ASSETS) == ["a.txt"]
+	assert not os.path.exists(project.path(HOT_RELOAD_ASSETS + "/sub"))
+
+def test_copies_never_share_files_with_the_sources(project):
+	make_assets(project)
+	project.run("-hot-reload")
+
+	for rel in ("a.txt", os.path.join("sub", "b.txt")):
+		src = os.stat(project.path(os.path.join("assets", rel)))
+		dest = os.stat(project.path(os.path.join(HOT_RELOAD_ASSETS, rel)))
+		assert not os.path.samestat(src, dest)
+
+	with open(project.path(HOT_RELOAD_ASSETS + "/a.txt"), "w") as f:
+		f.write("written to the build")
+
+	assert project.read("assets/a.txt") == b"a"
+
+def test_hardlinks_from_older_builds_are_replaced(project):
+	make_assets(project)
+	project.run("-hot-reload")
+
+	dest = project.path(HOT_RELOAD_ASSETS + "/a.txt")
+	os.remove(dest)
+	os.link(project.path("assets/a.txt"), dest)
+
+	res = project.run("-hot-reload")
+	assert "1 copied" in res.stdout
+	assert not os.path.samestat(os.stat(project.path("assets/a.txt")), os.stat(dest))
+
+def test_release_keeps_only_its_assets(project):
+	make_assets(project)
+	project.run("-release")
+	project.write("build/release/stale.txt", "left over")
+
+	res = project.run("-release")
+	assert "0 copied" in res.stdout and "2 unchanged" in res.stdout
+	assert not os.path.exists(project.path("build/release/stale.txt"))
+	assert listing(project, "build/release/assets") == ["a.txt", os.path.join("sub", "b.txt")]
@@ -0,0 +1,93 @@
+"""Block compressed textures decode to what cook_texture reports, and keep a usable PSNR"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from build_tools import texture_encode
+
+def make_image(width=64, height=48, alpha=False):
+	y, x = np.mgrid[0:height, 0:width]
+	rng = np.random.default_rng(1)
+	pixels = np.stack([x * 255 // width, y * 255 // height, (x + y) * 127 // (width + height) + 64, np.full_like(x, 255)], axis=2)
+	pixels[..., :3] += rng.integers(-6, 7, pixels[..., :3].shape)
+
+	if alpha:
+		pixels[..., 3] = np.where((x // 8 + y // 8) % 2, 255, 32)
+
+	return np.clip(pixels, 0, 255).astype(np.uint8)
+
+def expand_565(v):
+	r, g, b = v >> 11, (v >> 5) & 63, v & 31
+	return np.array([(r << 3) | (r >> 2), (g << 2) | (g >> 4), (b << 3) | (b >> 2)], dtype=np.float64)
+
+def decode_bc1_block(data):
+	"""BC1 color block as the spec describes it, (16, 3)"""
+	c0, c1, bits = int.from_bytes(data[0:2], "little"), int.from_bytes(data[2:4], "little"), int.from_bytes(data[4:8], "little")
+	p0, p1 = expand_565(c0), expand_565(c1)
+
+	if c0 > c1:
+		palette = [p0, p1, (2 * p0 + p1) / 3, (p0 + 2 * p1) / 3]
+	else:
+		palette = [p0, p1, (p0 + p1) / 2, np.zeros(3)]
+
+	return np.array([palette[(bits >> (2 * i)) & 3] for i in range(16)])
+
+def decode_bc4_block(data):
+	a0, a1, bits = data[0], data[1], int.from_bytes(data[2:8], "little")
+
+	if a0 > a1:
+		palette = [a0, a1] + [((7 - i) * a0 + i * a1) / 7 for i in range(1, 7)]
+	else:
+		palette = [a0, a1] + [((5 - i) * a0 + i * a1) / 5 for i in range(1, 5)] + [0, 255]
+
+	return np.array([palette[(bits >> (3 * i)) & 7] for i in range(16)], dtype=np.float64)
+
+def decode_blocks(data, block_format, width, height):
+	size = 8 if block_format == "bc1" else 16
+	blocks = []
+
+	for start in range(0, len(data), size):
+		block = data[start:start + size]
+
+		if block_format == "bc1":
+			blocks.append(np.concatenate([decode_bc1_block(block), np.full((16, 1), 255.0)], axis=1))
+		else:
+			blocks.append(np.concatenate([decode_bc1_block(block[8:]), decode_bc4_block(block[:8])[:, None]], axis=1))
+
+	return texture_encode.untile_texture_blocks(np.array(blocks), width, height)
+
+@pytest.mark.parametrize("block_format, alpha", [("bc1", False), ("bc3", True)])
+@pytest.mark.parametrize("quality", [0, 1, 2])
+def test_reported_decode_matches_the_format(block_format, alpha, quality):
+	pixels = make_image(alpha=alpha)
+	data, decoded = texture_encode.encode_texture_blocks(pixels, block_format, quality)
+	reference = decode_blocks(data, block_format, 64, 48)
+
+	# GPUs round the interpolated colors differently, the spec allows some slack
+	assert np.abs(reference - decoded).max() <= 1.5
+
+	channels = 4 if alpha else 3
+	reported = texture_encode.texture_psnr(pixels, decoded, channels)
+	assert abs(texture_encode.texture_psnr(pixels, reference, channels) - reported) < 0.2
+	assert reported > 30
+
+@pytest.mark.parametrize("block_format", ["bc1", "bc3", "bc7", "etc2_rgb8", "etc2_rgba8"])
+def test_psnr_of_every_format(block_format):
+	alpha = block_format in ("bc3", "bc7", "etc2_rgba8")
+	pixels = make_image(width=30, height=22, alpha=alpha)
+	channels = 4 if alpha else 3
+	psnr = {}
+
+	for quality in (0, 2):
+		data, decoded = texture_encode.encode_texture_blocks(pixels, block_format, quality)
+		assert decoded.shape == pixels.shape
+		assert len(data) == 8 * 6 * (8 if block_format in ("bc1", "etc2_rgb8") else 16)
+		psnr[quality] = texture_encode.texture_psnr(pixels, decoded, channels)
+
+	assert psnr[0] > 28
+	assert psnr[2] >= psnr[0] - 0.1
+
+def test_identical_decode_has_no_psnr():
+	pixels = make_image()
+	assert texture_encode.texture_psnr(pixels, pixels.astype(np.float32), 4) is None
@@ -0,0 +1,79 @@
+"""-watch rebuilds only what a change needs and keeps running after failures"""
+
+import os
+import time
+
+import pytest
+
+SHADER = """@vs vs
+void main() { gl_Position = vec4(0.0); }
+@end
+@fs fs
+out vec4 frag_color;
+void main() { frag_color = vec4(1.0); }
+@end
+@program quad vs fs
+"""
+
+@pytest.fixture
+def watching(project):
+	project.write("source/game.odin", "package game\n")
+	project.write("source/shader/shader.glsl", SHADER)
+	project.write("assets/a.txt", "a")
+
+	build = project.start("-watch")
+	build.wait_for("Watching source and assets")
+	yield build
+	build.stop()
+
+def dll_builds(project):
+	return [c for c in project.tool_calls("odin") if "-build-mode:dll" in c]
+
+def edit(project, rel, data):
+	# Some file systems have coarse mtimes, make sure the polling fallback sees the change
+	time.sleep(0.05)
+	project.write(rel, data)
+
+def test_odin_change_rebuilds_the_dll(project, watching):
+	open(project.tool_log, "w").close()
+	edit(project, "source/game.odin", "package game\n// changed\n")
+	watching.wait_for("Rebuilt in")
+
+	assert len(dll_builds(project)) == 1
+	assert project.tool_calls("shdc") == []
+
+def test_unchanged_save_does_nothing(project, watching):
+	open(project.tool_log, "w").close()
+	edit(project, "source/game.odin", "package game\n")
+	# A real change afterwards shows the watcher has looked at the first save
+	edit(project, "assets/b.txt", "b")
+	out = watching.wait_for("Synced assets")
+
+	assert "Building" not in out
+	assert dll_builds(project) == []
+
+def test_shader_change_compiles_the_shader_and_the_dll(project, watching):
+	open(project.tool_log, "w").close()
+	edit(project, "source/shader/shader.glsl", SHADER.replace("1.0", "0.5"))
+	watching.wait_for("Rebuilt in")
+
+	assert len(project.tool_calls("shdc")) == 1
+	assert len(dll_builds(project)) == 1
+
+def test_assets_are_copied_and_removed(project, watching):
+	edit(project, "assets/b.txt", "b")
+	watching.wait_for("Rebuilt in")
+	assert project.read("build/hot_reload/assets/b.txt") == b"b"
+
+	os.remove(project.path("assets/a.txt"))
+	watching.wait_for("Rebuilt in")
+	assert not os.path.exists(project.path("build/hot_reload/assets/a.txt"))
+
+def test_failed_build_keeps_watching(project, watching):
+	edit(project, "source/shader/shader.glsl", SHADER + "#error broken\n")
+	watching.wait_for("Build failed, waiting for changes")
+
+	open(project.tool_log, "w").close()
+	edit(project, "source/shader/shader.glsl", SHADER.replace("1.0", "0.25"))
+	watching.wait_for("Updated source/shader/gen__shader.odin")
+	assert len(project.tool_calls("shdc")) == 1
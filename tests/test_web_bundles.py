@@ -0,0 +1,68 @@
+"""-web splits the assets into the bundles of asset_bundles.json"""
+
+import json
+import os
+
+MANIFEST = {
+	"boot": ["player.glb"],
+	"on_demand": {
+		"props": ["props/*"],
+	},
+}
+
+def make_project(project, manifest=MANIFEST):
+	project.write("source/game.odin", "package game\n")
+	project.write("asset_bundles.json", json.dumps(manifest))
+	project.write("assets/player.glb", "player")
+	project.write("assets/props/floor.glb", "floor")
+	project.write("assets/music.ogg", "music")
+
+def bundle_files(project, name):
+	with open(project.path("build/web/%s.data" % name)) as f:
+		return json.load(f)
+
+def test_assets_go_into_their_bundles(project):
+	make_project(project)
+	res = project.run("-web")
+
+	assert sorted(project.tool_calls("file_packager")) == ["boot.data", "default.data", "props.data"]
+	assert bundle_files(project, "boot") == ["assets/player.glb", "bundles/boot"]
+	assert bundle_files(project, "props") == ["assets/props/floor.glb", "bundles/props"]
+	assert bundle_files(project, "default") == ["assets/music.ogg", "bundles/default"]
+	assert "props               1 assets" in res.stdout
+
+def test_only_the_boot_bundle_is_linked_in(project):
+	make_project(project)
+	project.run("-web")
+	[emcc] = project.tool_calls("emcc")
+
+	assert "--pre-js build/web_bundles/boot.data.js" in emcc
+	assert "--preload-file" not in emcc
+	assert os.path.exists(project.path("build/web/props.data.js"))
+	assert not os.path.exists(project.path("build/web/boot.data.js"))
+
+	with open(project.path("build/web_bundles/asset_bundles.js")) as f:
+		assert f.read() == "Module['backgroundAssetBundles'] = [\"default\"];\n"
+
+def test_stale_bundles_are_removed(project):
+	make_project(project)
+	project.run("-web")
+
+	make_project(project, {"boot": ["*"]})
+	project.run("-web")
+	assert sorted(f for f in os.listdir(project.path("build/web")) if ".data" in f) == ["boot.data"]
+
+def test_invalid_bundle_name_fails(project):
+	make_project(project, {"on_demand": {"default": ["*"]}})
+	res = project.run("-web", check=False)
+
+	assert res.returncode != 0
+	assert "Invalid asset bundle name 'default'" in res.stdout
+
+def test_without_a_manifest_everything_is_preloaded(project):
+	make_project(project)
+	os.remove(project.path("asset_bundles.json"))
+	project.run("-web")
+
+	assert project.tool_calls("file_packager") == []
+	assert "--preload-file assets" in project.tool_calls("emcc")[0]
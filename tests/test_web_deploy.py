@@ -0,0 +1,40 @@
+"""-web-deploy gives web files content-hashed names and writes reproducible .gz siblings"""
+
+import gzip
+import json
+import os
+import re
+
+def web_files(project):
+	return sorted(os.listdir(project.path("build/web")))
+
+def test_hashed_names_and_gzip(project):
+	res = project.run("-web", "-web-deploy")
+	assert "Web build files:" in res.stdout
+
+	files = web_files(project)
+	wasm = [f for f in files if re.fullmatch(r"index\.[0-9a-f]{12}\.wasm", f)]
+	assert len(wasm) == 1
+	assert "index.wasm" not in files
+
+	index = project.read("build/web/index.html").decode()
+	names = json.loads(re.search(r"var webFileNames = (.*?);</script>", index).group(1))
+	assert names["index.wasm"] == wasm[0]
+
+	for name in [wasm[0], "index.html"]:
+		assert gzip.decompress(project.read("build/web/" + name + ".gz")) == project.read("build/web/" + name)
+
+def test_unchanged_build_gives_identical_files(project):
+	project.run("-web", "-web-deploy")
+	first = {name: project.read("build/web/" + name) for name in web_files(project)}
+
+	project.run("-web", "-web-deploy")
+	assert {name: project.read("build/web/" + name) for name in web_files(project)} == first
+
+def test_plain_web_build_removes_deploy_files(project):
+	project.run("-web", "-web-deploy")
+	project.run("-web")
+
+	files = web_files(project)
+	assert "index.wasm" in files
+	assert not [f for f in files if f.endswith((".gz", ".br")) or re.search(r"\.[0-9a-f]{12}\.", f)]
@@ -0,0 +1,96 @@
+"""Web_Dev_Server answers revalidation with 304, serves precompressed siblings and pushes live reloads"""
+
+import gzip
+import http.client
+import os
+
+import pytest
+
+from build_tools import web
+
+@pytest.fixture
+def server(tmp_path):
+	root = tmp_path / "web"
+	root.mkdir()
+	(root / "index.html").write_text("<html><body>game</body></html>")
+	(root / "index.wasm").write_bytes(b"\0asm" + bytes(1000))
+	server = web.Web_Dev_Server(str(root), 0)
+	yield server
+	server.close()
+
+def get(server, path, headers={}):
+	conn = http.client.HTTPConnection("127.0.0.1", server.port, timeout=10)
+	conn.request("GET", path, headers=headers)
+	res = conn.getresponse()
+	body = res.read()
+	conn.close()
+	return res, body
+
+def test_etag_revalidation(server):
+	res, body = get(server, "/index.wasm")
+	assert res.status == 200
+	assert res.getheader("Content-Type") == "application/wasm"
+	assert res.getheader("Cache-Control") == "no-cache"
+	etag = res.getheader("ETag")
+
+	res, body = get(server, "/index.wasm", {"If-None-Match": etag})
+	assert res.status == 304
+	assert body == b""
+
+	# A rebuild changes the file under the same name
+	path = os.path.join(server.root, "index.wasm")
+	with open(path, "ab") as f:
+		f.write(b"more")
+
+	res, body = get(server, "/index.wasm", {"If-None-Match": etag})
+	assert res.status == 200
+	assert body.endswith(b"more")
+
+def test_precompressed_sibling(server):
+	path = os.path.join(server.root, "index.wasm")
+
+	with open(path, 'rb') as f, open(path + ".gz", 'wb') as gz:
+		gz.write(gzip.compress(f.read()))
+
+	res, body = get(server, "/index.wasm", {"Accept-Encoding": "gzip"})
+	assert res.getheader("Content-Encoding") == "gzip"
+	assert gzip.decompress(body) == b"\0asm" + bytes(1000)
+	gzip_etag = res.getheader("ETag")
+
+	res, body = get(server, "/index.wasm", {"Accept-Encoding": "gzip;q=0"})
+	assert res.getheader("Content-Encoding") is None
+	assert res.getheader("ETag") != gzip_etag
+
+	# A sibling older than the file is from an earlier build
+	st = os.stat(path)
+	os.utime(path + ".gz", ns=(st.st_atime_ns, st.st_mtime_ns - 10**9))
+	res, body = get(server, "/index.wasm", {"Accept-Encoding": "gzip"})
+	assert res.getheader("Content-Encoding") is None
+
+def test_html_gets_live_reload(server, monkeypatch):
+	monkeypatch.setattr(web, "WEB_LIVE_RELOAD_HEARTBEAT_SECONDS", 0.1)
+	res, body = get(server, "/")
+	assert web.WEB_LIVE_RELOAD_SNIPPET + b"</body>" in body
+
+	conn = http.client.HTTPConnection("127.0.0.1", server.port, timeout=10)
+	conn.request("GET", web.WEB_LIVE_RELOAD_PATH)
+	res = conn.getresponse()
+	assert res.getheader("Content-Type") == "text/event-stream"
+
+	# The handler may not be waiting yet, a reload before that is only seen as a ping
+	for _ in range(50):
+		server.notify_reload()
+		line = res.fp.readline()
+
+		if line != b": ping\n":
+			break
+
+		res.fp.readline()
+
+	assert line == b"data: reload\n"
+	conn.close()
+
+def test_paths_outside_the_root_are_not_served(server, tmp_path):
+	(tmp_path / "secret.txt").write_text("secret")
+	res, body = get(server, "/../secret.txt")
+	assert res.status == 404